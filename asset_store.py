@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Content-addressed asset store for the assets/ directory
+- Every asset is keyed by the SHA-256 of its bytes
+- URL -> hash manifest, so re-runs skip assets that are already stored
+- Byte-identical copies are stored once and pages reference the canonical file
+- Filenames carry a content hash (name.<hash>.ext), so they can be cached forever
+"""
+
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import re
+from typing import Dict, List, Optional
+from urllib.parse import unquote, urlparse
+
+from results_store import write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+COPY_SUFFIX = re.compile(r'_\d+$')
+HASH_LENGTH = 12
+ASSET_PREFIX = 'assets/'
+HASH_SUFFIX = re.compile(r'\.[0-9a-f]{%d}$' % HASH_LENGTH)
+
+
+def hash_bytes(data: bytes) -> str:
+    """Hash asset content"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def hash_file(path: str) -> str:
+    """Hash a file without loading it all at once"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hashed_name(filename: str, digest: str) -> str:
+    """Filename with the content hash before the extension (replacing an older hash)"""
+    stem, ext = os.path.splitext(filename)
+    return f"{HASH_SUFFIX.sub('', stem)}.{digest[:HASH_LENGTH]}{ext}"
+
+
+def rewrite_references(text: str, renames: Dict[str, str], prefix: str = ASSET_PREFIX) -> str:
+    """Point references to renamed assets at their new names
+
+    prefix "assets/" matches only local references ("assets/x" or "./assets/x"), never CDN
+    paths that contain /assets/; prefix "" matches bare sibling names inside stylesheets.
+    """
+    if not renames:
+        return text
+    pattern = re.compile(
+        (r'(?<![\w/.\-])((?:\./)?assets/)' if prefix else r'(?<=[(\'"])()')
+        + r'(' + '|'.join(re.escape(name) for name in sorted(renames, key=len, reverse=True)) + r')'
+        r'(?![\w.\-])'
+    )
+    return pattern.sub(lambda m: m.group(1) + renames[m.group(2)], text)
+
+
+def canonical_name_key(filename: str):
+    """Sort key preferring original names over '_1' copies, then shorter names"""
+    stem = os.path.splitext(filename)[0]
+    return (bool(COPY_SUFFIX.search(stem)), len(filename), filename)
+
+
+class AssetStore:
+    """Assets stored once per content hash, with a URL -> hash manifest"""
+
+    def __init__(self, root: str = 'assets', manifest_file: Optional[str] = None):
+        self.root = root
+        self.manifest_file = manifest_file or os.path.join(root, 'manifest.json')
+        manifest = {}
+        if os.path.exists(self.manifest_file):
+            with open(self.manifest_file, 'r') as f:
+                manifest = json.load(f)
+        # hash -> canonical filename, URL -> hash
+        self.files: Dict[str, str] = manifest.get('files', {})
+        self.urls: Dict[str, str] = manifest.get('urls', {})
+
+    def save(self):
+        """Write the manifest"""
+        write_json_atomic(self.manifest_file, {'files': self.files, 'urls': self.urls})
+
+    def path(self, digest: str) -> str:
+        """Path of the canonical file for a hash"""
+        return os.path.join(self.root, self.files[digest])
+
+    def lookup(self, url: str) -> Optional[str]:
+        """Canonical filename for an already stored URL"""
+        digest = self.urls.get(url)
+        if digest and digest in self.files and os.path.exists(self.path(digest)):
+            return self.files[digest]
+        return None
+
+    def _filename_for(self, url: str, digest: str, content_type: str = '') -> str:
+        """Pick a filename for new content, never overwriting different bytes"""
+        name = os.path.basename(unquote(urlparse(url).path)) or 'asset'
+        if not os.path.splitext(name)[1] and content_type:
+            # Extensionless URLs (e.g. fonts.googleapis.com/css) need one to be served correctly
+            name += mimetypes.guess_extension(content_type.split(';')[0].strip()) or ''
+        # Same name and hash prefix means same bytes, so existing files are never overwritten
+        return hashed_name(name, digest)
+
+    def put(self, url: str, data: bytes, content_type: str = '') -> str:
+        """Store asset bytes for a URL and return the canonical filename"""
+        digest = hash_bytes(data)
+        self.urls[url] = digest
+        if digest not in self.files:
+            filename = self._filename_for(url, digest, content_type)
+            os.makedirs(self.root, exist_ok=True)
+            with open(os.path.join(self.root, filename), 'wb') as f:
+                f.write(data)
+            self.files[digest] = filename
+            logger.info(f"Stored asset {filename} ({len(data)} bytes)")
+        return self.files[digest]
+
+    def index_existing(self) -> Dict[str, str]:
+        """Hash the files already in the store and return duplicate -> canonical filenames"""
+        by_hash: Dict[str, List[str]] = {}
+        for filename in sorted(os.listdir(self.root)):
+            path = os.path.join(self.root, filename)
+            if not os.path.isfile(path) or path == self.manifest_file or filename.startswith('.'):
+                continue
+            by_hash.setdefault(hash_file(path), []).append(filename)
+
+        duplicates = {}
+        for digest, names in by_hash.items():
+            known = self.files.get(digest)
+            canonical = known if known in names else min(names, key=canonical_name_key)
+            self.files[digest] = canonical
+            for name in names:
+                if name != canonical:
+                    duplicates[name] = canonical
+        return duplicates
+
+    def _rewrite_references(self, paths: List[str], renames: Dict[str, str]) -> List[str]:
+        """Point pages at renamed files, returning the pages changed"""
+        changed = []
+        for path in paths:
+            with open(path, 'r', encoding='utf-8') as f:
+                text = f.read()
+            rewritten = rewrite_references(text, renames, ASSET_PREFIX)
+            if rewritten != text:
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write(rewritten)
+                logger.info(f"Rewrote asset references in {path}")
+                changed.append(path)
+        return changed
+
+    def deduplicate(self, page_paths: List[str]) -> int:
+        """Point pages at canonical files, delete the copies and return the bytes saved"""
+        duplicates = self.index_existing()
+        if not duplicates:
+            return 0
+
+        self._rewrite_references(page_paths, duplicates)
+        saved = 0
+        for name in duplicates:
+            path = os.path.join(self.root, name)
+            saved += os.path.getsize(path)
+            os.remove(path)
+        self.save()
+        return saved
+
+
+def main():
+    """Deduplicate the assets/ directory and the pages that reference it"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    store = AssetStore()
+    pages = sorted(name for name in os.listdir('.') if name.endswith('.html'))
+    saved = store.deduplicate(pages)
+    store.save()
+    print(f"✅ Asset store holds {len(store.files)} unique assets")
+    print(f"   - Removed duplicates: {saved / (1 << 20):.1f} MB saved")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+#!/usr/bin/env python3
+"""
+Back up a fleet of Kajabi sites in parallel
+- Site configs from a JSON file; every site runs in its own process with its own
+  output root (results, progress journal, log, metrics, snapshots and built pages)
+- Global cap on requests in flight across all sites, plus a per-host cap
+- Longest sites start first (by the previous run's time, else URL count), so the fleet
+  finishes close to the time of the slowest site
+- One aggregate report (console + fleet_report.json)
+
+Site config (a list, or {"sites": [...]}):
+    {"name": "melissa", "urls": "melissa_urls.txt", "async": true,
+     "site_name": "Melissa's Kajabi Backup", "site_url": "https://melissa.respira.live"}
+    {"name": "other", "crawl": ["https://other.mykajabi.com/"], "max_depth": 3}
+Optional keys: host_rate, max_host_rate, concurrency, refresh, http2, stream, max_pages, domains,
+build (default true), optimize, mirror_assets, snapshot (default true)
+"""
+
+import argparse
+import json
+import logging
+import os
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from multiprocessing import Manager
+from typing import Dict, List
+from urllib.parse import urlparse
+
+from results_store import load_json, write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+REPORT_FILE = 'fleet_report.json'
+# Per-host slots are striped by host hash; hosts sharing a stripe share its cap
+HOST_STRIPES = 64
+
+
+class FleetLimits:
+    """Request caps shared by every site process (semaphores held by a manager process)"""
+
+    def __init__(self, manager, max_requests: int, host_concurrency: int):
+        self.requests = manager.BoundedSemaphore(max_requests)
+        self.hosts = [manager.BoundedSemaphore(host_concurrency) for _ in range(HOST_STRIPES)]
+
+    def host_slot(self, url: str):
+        host = urlparse(url).netloc.lower()
+        return self.hosts[zlib.crc32(host.encode('utf-8')) % HOST_STRIPES]
+
+
+class CappedTransport:
+    """Wraps a site's HTTP transport (pages or mirrored assets) so each request holds a host
+    slot and a global slot"""
+
+    def __init__(self, transport, limits: FleetLimits):
+        self.transport = transport
+        self.limits = limits
+
+    @contextmanager
+    def _slots(self, url: str):
+        # Host slot first: waiting for a busy host must not hold a global slot
+        host_slot = self.limits.host_slot(url)
+        host_slot.acquire()
+        try:
+            self.limits.requests.acquire()
+            try:
+                yield
+            finally:
+                self.limits.requests.release()
+        finally:
+            host_slot.release()
+
+    def get(self, url: str, headers=None, timeout: float = 30):
+        with self._slots(url):
+            return self.transport.get(url, headers=headers, timeout=timeout)
+
+    @contextmanager
+    def stream(self, url: str, headers=None, timeout: float = 30):
+        """HTTPTransport.stream, holding both slots until the body has been read"""
+        with self._slots(url):
+            with self.transport.stream(url, headers=headers, timeout=timeout) as opened:
+                yield opened
+
+    def close(self):
+        self.transport.close()
+
+
+def load_sites(config_file: str) -> List[Dict]:
+    """Read the site configs, resolving URL files relative to the config file"""
+    with open(config_file, 'r') as f:
+        config = json.load(f)
+    sites = config['sites'] if isinstance(config, dict) else config
+    base = os.path.dirname(os.path.abspath(config_file))
+    names = set()
+    for site in sites:
+        if not site.get('name') or os.sep in site['name'] or site['name'] in names:
+            raise ValueError(f"Every site needs a unique name usable as a directory: {site}")
+        if not site.get('urls') and not site.get('crawl'):
+            raise ValueError(f"Site {site['name']} needs 'urls' (a URL file) or 'crawl' (seed URLs)")
+        if site.get('urls'):
+            site['urls'] = os.path.join(base, site['urls'])
+        names.add(site['name'])
+    return sites
+
+
+def estimated_seconds(site: Dict, previous: Dict) -> float:
+    """Expected run time of a site, used to start the longest ones first"""
+    if site['name'] in previous:
+        return previous[site['name']].get('elapsed_seconds', 0.0)
+    if site.get('urls') and os.path.exists(site['urls']):
+        with open(site['urls'], 'r') as f:
+            urls = sum(1 for line in f if 'http' in line)
+    else:
+        urls = site.get('max_pages') or 1000
+    return urls / site.get('host_rate', 0.3)
+
+
+def run_site(site: Dict, root: str, limits: FleetLimits, workers: int) -> Dict:
+    """Scrape (and build) one site inside its output root (called in a site process)"""
+    site_root = os.path.abspath(os.path.join(root, site['name']))
+    os.makedirs(site_root, exist_ok=True)
+    os.chdir(site_root)
+
+    from build_site import prepare_build
+    from enhanced_scraper import EnhancedKajabiScraper, configure_logging
+    from mirror_assets import asset_transport
+    from results_reader import iter_results
+    from scrape_metrics import metrics
+    from snapshot_store import SnapshotStore
+
+    configure_logging('scraper.log')
+    report = {'name': site['name'], 'root': site_root, 'status': 'ok'}
+    started = time.monotonic()
+    try:
+        if site.get('urls') and not os.path.exists(site['urls']):
+            raise FileNotFoundError(f"URL file not found: {site['urls']}")
+        scraper = EnhancedKajabiScraper(
+            base_delay=2,
+            max_delay=5,
+            batch_size=5,
+            concurrency=site.get('concurrency', 4),
+            host_rate=site.get('host_rate', 0.3),
+            max_host_rate=site.get('max_host_rate'),
+            refresh=site.get('refresh', False),
+            http2=site.get('http2', False),
+            stream_bodies=site.get('stream', False),
+        )
+        scraper.transport = CappedTransport(scraper.transport, limits)
+        if site.get('crawl'):
+            scraper.crawl_site(site['crawl'], max_depth=site.get('max_depth', 3),
+                               allowed_domains=site.get('domains'), max_pages=site.get('max_pages'))
+        elif site.get('async'):
+            scraper.scrape_all_urls_async(site['urls'])
+        else:
+            scraper.scrape_all_urls(site['urls'])
+        report['pages'] = len(scraper.progress['completed_urls'])
+        report['failed'] = len(scraper.progress['failed_urls'])
+        if report['failed'] and not report['pages']:
+            raise RuntimeError(f"All {report['failed']} URLs failed")
+
+        if site.get('snapshot', True) and os.path.exists(scraper.results_file):
+            with metrics.span('snapshot'):
+                report['snapshot'] = SnapshotStore().record(iter_results(scraper.results_file),
+                                                            source=scraper.results_file)
+        if site.get('build', True) and os.path.exists(scraper.results_file):
+            builder_args = {'template_file': os.path.join(REPO_DIR, 'index_template.html')}
+            if site.get('site_name'):
+                builder_args['site_name'] = site['site_name']
+            if site.get('site_url'):
+                builder_args['site_url'] = site['site_url']
+            if site.get('mirror_assets'):
+                # Asset downloads hit shared CDN hosts, so they take the fleet slots too
+                builder_args['mirror_transport'] = CappedTransport(asset_transport(), limits)
+            with metrics.span('build_stage'):
+                builder = prepare_build(mirror_assets=site.get('mirror_assets', False),
+                                        optimize=site.get('optimize', False), workers=workers,
+                                        **builder_args)
+                report['built'] = len(builder.build())
+    except Exception as e:
+        report['status'] = 'failed'
+        report['error'] = f"{type(e).__name__}: {e}"
+        logger.exception(f"Backup of {site['name']} failed")
+
+    report['elapsed_seconds'] = round(time.monotonic() - started, 3)
+    counters = metrics.snapshot()['counters']
+    report['bytes_downloaded'] = counters.get('bytes_downloaded', 0)
+    report['failed_permanent'] = counters.get('pages_failed_permanent', 0)
+    report['metrics_file'] = os.path.join(site_root, metrics.write('fleet'))
+    return report
+
+
+def run_fleet(sites: List[Dict], root: str = 'sites', processes: int = 4, max_requests: int = 16,
+              host_concurrency: int = 2) -> Dict:
+    """Run every site across a process pool and return the aggregate report"""
+    os.makedirs(root, exist_ok=True)
+    report_path = os.path.join(root, REPORT_FILE)
+    previous = {site['name']: site for site in load_json(report_path, {}).get('sites', [])}
+    # Longest first, so no long site starts after the pool has drained
+    ordered = sorted(sites, key=lambda site: estimated_seconds(site, previous), reverse=True)
+    workers = max(1, (os.cpu_count() or 1) // processes)
+
+    started = time.monotonic()
+    reports = []
+    with Manager() as manager:
+        limits = FleetLimits(manager, max_requests, host_concurrency)
+        # One fresh process per site: metrics, logging and the working directory stay per site
+        with ProcessPoolExecutor(max_workers=processes, max_tasks_per_child=1) as executor:
+            futures = {executor.submit(run_site, site, root, limits, workers): site for site in ordered}
+            for future in as_completed(futures):
+                try:
+                    report = future.result()
+                except Exception as e:
+                    report = {'name': futures[future]['name'], 'status': 'failed',
+                              'error': f"{type(e).__name__}: {e}", 'elapsed_seconds': 0.0}
+                reports.append(report)
+                print(f"{'✅' if report['status'] == 'ok' else '❌'} {report['name']}: "
+                      f"{report.get('pages', 0)} pages, {report.get('failed', 0)} failed "
+                      f"in {report['elapsed_seconds']:.1f}s")
+
+    reports.sort(key=lambda report: report['name'])
+    fleet = {
+        'finished_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'wall_seconds': round(time.monotonic() - started, 3),
+        'slowest_site_seconds': max((r['elapsed_seconds'] for r in reports), default=0.0),
+        'total_site_seconds': round(sum(r['elapsed_seconds'] for r in reports), 3),
+        'pages': sum(r.get('pages', 0) for r in reports),
+        'failed': sum(r.get('failed', 0) for r in reports),
+        'bytes_downloaded': sum(r.get('bytes_downloaded', 0) for r in reports),
+        'sites_failed': [r['name'] for r in reports if r['status'] != 'ok'],
+        'sites': reports,
+    }
+    write_json_atomic(report_path, fleet)
+    return fleet
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Back up several Kajabi sites in parallel")
+    parser.add_argument('config', help="JSON file with the site configs")
+    parser.add_argument('--root', default='sites', help="Directory holding one output root per site")
+    parser.add_argument('--processes', type=int, default=4, help="Sites backed up at the same time")
+    parser.add_argument('--max-requests', type=int, default=16,
+                        help="Requests in flight across all sites")
+    parser.add_argument('--host-concurrency', type=int, default=2,
+                        help="Requests in flight per host across all sites")
+    parser.add_argument('--only', action='append', help="Only run this site (repeatable)")
+    args = parser.parse_args()
+
+    sites = load_sites(args.config)
+    if args.only:
+        sites = [site for site in sites if site['name'] in args.only]
+
+    print(f"Backing up {len(sites)} sites ({args.processes} at a time, {args.max_requests} requests "
+          f"in flight, {args.host_concurrency} per host)")
+    print("=" * 50)
+    fleet = run_fleet(sites, args.root, args.processes, args.max_requests, args.host_concurrency)
+
+    print(f"\n📊 Fleet summary:")
+    print(f"   - Sites: {len(fleet['sites'])} ({len(fleet['sites_failed'])} failed)")
+    print(f"   - Pages: {fleet['pages']} ({fleet['failed']} failed URLs)")
+    print(f"   - Downloaded: {fleet['bytes_downloaded'] / (1 << 20):.1f} MB")
+    print(f"   - Wall clock: {fleet['wall_seconds']:.1f}s (slowest site {fleet['slowest_site_seconds']:.1f}s, "
+          f"{fleet['total_site_seconds']:.1f}s if run one after another)")
+    for report in fleet['sites']:
+        if report['status'] != 'ok':
+            print(f"   ❌ {report['name']}: {report.get('error')}")
+    print(f"   - Report: {os.path.join(args.root, REPORT_FILE)}")
+
+
+if __name__ == "__main__":
+    main()
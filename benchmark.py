@@ -0,0 +1,337 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the scrapers and the site build
+- Local mock Kajabi server serving the saved pages with configurable latency and error rate
+- Synthetic sites of 10, 1k and 10k pages
+- Drives EnhancedKajabiScraper, AdditionalScraper and the build (extraction + site build)
+- Reports throughput, p50/p99 latency, peak RSS and bytes written per stage
+- --extractors compares the single-pass scanner with BeautifulSoup on the saved pages
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+
+SAVED_PAGES = [
+    'homepage.html',
+    'oyc.html',
+    'melissa.respira.live-.html',
+    'blog.html',
+    'contact.html',
+    'podcasts.html',
+    'womenscoaching.html',
+    'blog_when_it_comes_to_men_love_is_not_enough.html',
+]
+
+STAGES = ['enhanced', 'additional', 'build']
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+def peak_rss_mb() -> float:
+    """Peak resident set size of this process and its children, in MB"""
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # ru_maxrss is in bytes on macOS and kilobytes elsewhere
+    return peak / (1 << 20) if sys.platform == 'darwin' else peak / 1024
+
+
+def bytes_on_disk(path: str) -> int:
+    """Total size of the files under a directory"""
+    total = 0
+    for root, _, files in os.walk(path):
+        total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+    return total
+
+
+class MockKajabiServer:
+    """Local stand-in for a Kajabi site built from the saved pages"""
+
+    def __init__(self, latency_ms=(0, 0), error_rate=0.0):
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.bodies = []
+        for name in SAVED_PAGES:
+            path = os.path.join(REPO_DIR, name)
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    self.bodies.append(f.read())
+        self.requests = 0
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), self._handler())
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def _handler(self):
+        mock = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                mock.requests += 1
+                low, high = mock.latency_ms
+                if high:
+                    time.sleep(random.uniform(low, high) / 1000)
+                if random.random() < mock.error_rate:
+                    self.send_error(503, 'Service Unavailable')
+                    return
+
+                # Every path maps onto one of the saved pages, made unique per URL
+                index = sum(self.path.encode()) % len(mock.bodies)
+                body = mock.bodies[index] + f'\n<!-- {self.path} -->\n'.encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def urls(self, count: int, prefix: str = '') -> List[str]:
+        """URLs of a synthetic site with the given number of pages"""
+        return [f"{self.base_url}{prefix}/page-{i}" for i in range(count)]
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def run_stage(stage: str, urls: List[str], concurrency: int) -> Dict:
+    """Run one stage in the current directory and measure it (called in a child process)"""
+    latencies = []
+
+    def timed(fetch):
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return fetch(*args, **kwargs)
+            finally:
+                latencies.append(time.perf_counter() - started)
+        return wrapper
+
+    started = time.perf_counter()
+    if stage == 'enhanced':
+        import asyncio
+        from enhanced_scraper import EnhancedKajabiScraper
+        scraper = EnhancedKajabiScraper(base_delay=0.05, max_delay=0.05, concurrency=concurrency,
+                                        host_rate=1e6, per_host_concurrency=concurrency)
+        scraper.scrape_url = timed(scraper.scrape_url)
+        asyncio.run(scraper.scrape_urls_async(urls))
+        scraper.save()
+        items = len(urls)
+    elif stage == 'additional':
+        from scrape_additional_pages import AdditionalScraper
+        scraper = AdditionalScraper(min_delay=0, max_delay=0)
+        scraper.scrape_url = timed(scraper.scrape_url)
+        scraper.scrape_additional_pages(urls)
+        items = len(urls)
+    elif stage == 'build':
+        from build_site import SiteBuilder
+        from extract_pages import PageExtractor
+        with open(os.path.join(REPO_DIR, 'index_template.html'), 'r') as f:
+            template = f.read()
+        with open('index_template.html', 'w') as f:
+            f.write(template)
+        metadata = PageExtractor().run()
+        builder = SiteBuilder(metadata=metadata)
+        builder.write_output = timed(builder.write_output)
+        items = len(builder.build())
+    else:
+        raise ValueError(f"Unknown stage: {stage}")
+    elapsed = time.perf_counter() - started
+
+    return {
+        'stage': stage,
+        'items': items,
+        'seconds': round(elapsed, 3),
+        'throughput': round(items / elapsed, 2) if elapsed else 0.0,
+        'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+        'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+        'peak_rss_mb': round(peak_rss_mb(), 1),
+    }
+
+
+def run_in_subprocess(stage: str, urls: List[str], workdir: str, concurrency: int) -> Dict:
+    """Run a stage in a fresh interpreter so peak RSS is per stage"""
+    before = bytes_on_disk(workdir)
+    env = dict(os.environ, PYTHONPATH=REPO_DIR + os.pathsep + os.environ.get('PYTHONPATH', ''))
+    completed = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--run-stage', stage, '--concurrency', str(concurrency)],
+        input=json.dumps(urls), capture_output=True, text=True, cwd=workdir, env=env, check=True
+    )
+    report = json.loads(completed.stdout.strip().splitlines()[-1])
+    report['bytes_written'] = bytes_on_disk(workdir) - before
+    return report
+
+
+def run_benchmarks(sizes: List[int], stages: List[str], latency_ms=(0, 0), error_rate=0.0,
+                   concurrency: int = 8) -> List[Dict]:
+    """Run every stage against synthetic sites of the given sizes"""
+    server = MockKajabiServer(latency_ms, error_rate)
+    server.start()
+    reports = []
+    try:
+        for size in sizes:
+            with tempfile.TemporaryDirectory(prefix='kajabi-bench-') as tmp:
+                scrape_dir = os.path.join(tmp, 'enhanced')
+                additional_dir = os.path.join(tmp, 'additional')
+                os.makedirs(scrape_dir)
+                os.makedirs(additional_dir)
+
+                for stage in stages:
+                    if stage == 'additional':
+                        urls, workdir = server.urls(size, '/blog'), additional_dir
+                    else:
+                        # The build stage runs on the results of the enhanced stage
+                        urls, workdir = server.urls(size), scrape_dir
+                    report = run_in_subprocess(stage, urls, workdir, concurrency)
+                    report['site_pages'] = size
+                    reports.append(report)
+                    print_report(report)
+    finally:
+        server.stop()
+    return reports
+
+
+def saved_pages() -> List[str]:
+    """Page backups stored in the repository"""
+    return sorted(name for name in os.listdir(REPO_DIR)
+                  if name.endswith('.html') and name not in ('index.html', 'index_template.html'))
+
+
+def run_extractor_benchmark(repeat: int = 5) -> List[Dict]:
+    """Time each metadata extractor over the saved pages and check it agrees with BeautifulSoup"""
+    from html_scanner import scan_page
+    from page_extractors import extract_metadata
+
+    pages = []
+    for name in saved_pages():
+        with open(os.path.join(REPO_DIR, name), 'r', encoding='utf-8') as f:
+            pages.append((f"https://melissa.respira.live/{name[:-5]}", f.read()))
+
+    extractors = {
+        'bs4-lxml': lambda html, url: extract_metadata(html, url, 'lxml'),
+        'bs4-html.parser': lambda html, url: extract_metadata(html, url, 'html.parser'),
+        'fast': scan_page,
+        'fast-head': lambda html, url: scan_page(html, url, head_only=True),
+    }
+    try:
+        import lxml  # noqa: F401
+    except ImportError:
+        del extractors['bs4-lxml']
+    reference = {url: extract_metadata(html, url, 'html.parser') for url, html in pages}
+
+    reports = []
+    for name, extract in extractors.items():
+        latencies = []
+        agree = 0
+        for round_number in range(repeat):
+            for url, html in pages:
+                started = time.perf_counter()
+                metadata = extract(html, url)
+                latencies.append(time.perf_counter() - started)
+                if round_number == 0:
+                    expected = reference[url]
+                    fields = [field for field in ('title', 'description', 'links', 'images', 'text')
+                              if field in metadata]
+                    agree += all(sorted(metadata[field]) == sorted(expected[field])
+                                 if field == 'links' else metadata[field] == expected[field]
+                                 for field in fields)
+        total = sum(latencies)
+        reports.append({
+            'stage': f"extract:{name}",
+            'site_pages': len(pages),
+            'items': len(latencies),
+            'seconds': round(total, 3),
+            'throughput': round(len(latencies) / total, 2) if total else 0.0,
+            'p50_ms': round(percentile(latencies, 50) * 1000, 2),
+            'p99_ms': round(percentile(latencies, 99) * 1000, 2),
+            'agreeing_pages': agree,
+            'peak_rss_mb': round(peak_rss_mb(), 1),
+            'bytes_written': 0,
+        })
+    return reports
+
+
+def print_report(report: Dict):
+    """Print one benchmark line"""
+    print(f"   {report['site_pages']:>6} pages | {report['stage']:<10} | "
+          f"{report['throughput']:>9.2f} items/s | p50 {report['p50_ms']:>8.2f} ms | "
+          f"p99 {report['p99_ms']:>8.2f} ms | RSS {report['peak_rss_mb']:>7.1f} MB | "
+          f"{report['bytes_written'] / (1 << 20):>8.1f} MB written")
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Benchmark the scrapers and the site build")
+    parser.add_argument('--sizes', default='10,1000',
+                        help="Comma-separated synthetic site sizes (e.g. 10,1000,10000)")
+    parser.add_argument('--stages', default=','.join(STAGES), help="Comma-separated stages to run")
+    parser.add_argument('--latency-ms', default='0,0', help="Server latency range in ms (min,max)")
+    parser.add_argument('--error-rate', type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument('--concurrency', type=int, default=8, help="Fetch concurrency for the enhanced scraper")
+    parser.add_argument('--output', default='benchmark_results.json', help="Where to write the JSON report")
+    parser.add_argument('--extractors', action='store_true',
+                        help="Only compare the metadata extractors on the saved pages")
+    parser.add_argument('--run-stage', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run_stage:
+        urls = json.loads(sys.stdin.read())
+        print(json.dumps(run_stage(args.run_stage, urls, args.concurrency)))
+        return
+
+    if args.extractors:
+        print("Metadata extractors on the saved pages")
+        print("=" * 50)
+        reports = run_extractor_benchmark()
+        for report in reports:
+            print_report(report)
+            print(f"{'':>11}{report['agreeing_pages']}/{report['site_pages']} pages agree with BeautifulSoup")
+        with open(args.output, 'w') as f:
+            json.dump(reports, f, indent=2)
+        print(f"\n✅ Wrote {len(reports)} results to {args.output}")
+        return
+
+    sizes = [int(size) for size in args.sizes.split(',')]
+    stages = args.stages.split(',')
+    latency = tuple(float(ms) for ms in args.latency_ms.split(','))
+
+    print("Kajabi Backup Benchmarks")
+    print("=" * 50)
+    reports = run_benchmarks(sizes, stages, latency, args.error_rate, args.concurrency)
+
+    with open(args.output, 'w') as f:
+        json.dump(reports, f, indent=2)
+    print(f"\n✅ Wrote {len(reports)} results to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Build the static backup site in a single pass over the scraped results
+- One shared URL -> filename mapping for every page
+- Pages are written only when their content hash changed (build manifest)
+- index.html is produced in the same pass from the compiled template; only its first
+  page of cards is inline, the rest load lazily from index/ (index_renderer.py)
+- Titles come from the extraction stage's metadata when available
+- Optionally points pages at subresources mirrored into assets/ (mirror_assets.py)
+- Optionally minifies and precompresses the output (optimize_pages.py)
+- Optionally serves images as responsive WebP/AVIF variants (optimize_images.py)
+- Optionally points links between backed-up pages at the local files and checks every
+  link and asset after the build (link_checker.py)
+- Optionally prepares a Vercel deployment after the build: a deploy/ copy of the site with
+  content-hashed asset names, cache headers in vercel.json and an upload manifest of
+  changed files (deploy_manifest.py)
+- Sharded full-text search index for index.html (search_index.py)
+"""
+
+import argparse
+import hashlib
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+
+from deploy_manifest import HTML_MAX_AGE, prepare_deploy, print_upload_manifest
+from extract_pages import PageExtractor
+from html_scanner import scan_page
+from index_renderer import DEFAULT_SITE_NAME, DEFAULT_SITE_URL, INDEX_DIR, load_template, render_index
+from link_checker import LinkMap, check_site, print_report
+from mirror_assets import AssetMirror
+from optimize_images import ImageOptimizer, ImageRewriter
+from optimize_pages import PageOptimizer, has_precompressed, write_precompressed
+from results_reader import iter_results
+from results_store import write_json_atomic
+from revalidation import content_hash
+from scrape_metrics import metrics
+from search_index import SEARCH_DIR, build_search_index
+from url_utils import is_blog_post, url_to_filename
+
+MANIFEST_FILE = '.build_manifest.json'
+
+
+def extract_title_from_html(html_content):
+    """Extract title from HTML content"""
+    # Scans the <head> only and stops there
+    title = scan_page(html_content, '', head_only=True)['title']
+    # Remove extra whitespace and newlines
+    return ' '.join(title.split()) or "Untitled Page"
+
+
+def page_title(page: Dict, metadata: Optional[Dict] = None) -> str:
+    """Title shown for a page in the index"""
+    if metadata and metadata.get('title'):
+        title = ' '.join(metadata['title'].split())
+    else:
+        title = extract_title_from_html(page['html_content'])
+    # Add Blog: prefix for blog posts
+    if is_blog_post(page['url']):
+        title = f"Blog: {title}"
+    return title
+
+
+class SiteBuilder:
+    """Incremental builder for the backup site"""
+
+    def __init__(self, results_file='scraper_results.json', template_file='index_template.html',
+                 output_dir='.', metadata=None, mirror=None, optimizer=None, images=None, links=None,
+                 site_name=DEFAULT_SITE_NAME, site_url=DEFAULT_SITE_URL):
+        self.results_file = results_file
+        self.site_name = site_name
+        self.site_url = site_url
+        self.metadata = metadata or {}
+        self.mirror = mirror
+        self.optimizer = optimizer
+        self.images = images
+        self.links = links
+        self.template_file = template_file
+        self.output_dir = output_dir
+        self.manifest_path = os.path.join(output_dir, MANIFEST_FILE)
+        self.manifest = {}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, 'r') as f:
+                self.manifest = json.load(f)
+        self.stats = {'written': 0, 'unchanged': 0}
+
+    def is_current(self, filename: str, digest: str) -> bool:
+        """Whether the output file already holds content with this hash"""
+        path = os.path.join(self.output_dir, filename)
+        if not os.path.exists(path):
+            return False
+        if filename not in self.manifest:
+            # No manifest entry yet (first build): compare with the file on disk
+            with open(path, 'rb') as f:
+                self.manifest[filename] = hashlib.sha256(f.read()).hexdigest()
+        return self.manifest[filename] == digest
+
+    def write_output(self, filename: str, content: str) -> bool:
+        """Write an output file unless it is unchanged, returning whether it was written"""
+        digest = content_hash(content)
+        if self.is_current(filename, digest):
+            self.mark_unchanged(filename)
+            return False
+        path = os.path.join(self.output_dir, filename)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with metrics.span('build_write'):
+            with open(path, 'w', encoding='utf-8', newline='') as f:
+                f.write(content)
+            if self.optimizer and self.optimizer.precompress:
+                metrics.incr('build_bytes_precompressed', write_precompressed(path, content.encode('utf-8')))
+        self.manifest[filename] = digest
+        self.stats['written'] += 1
+        metrics.incr('build_files_written')
+        metrics.incr('build_bytes_written', len(content))
+        print(f"📝 Wrote {filename}")
+        return True
+
+    def mark_unchanged(self, filename: str):
+        """Count an output that is already current, restoring missing compressed siblings"""
+        self.stats['unchanged'] += 1
+        metrics.incr('build_files_unchanged')
+        path = os.path.join(self.output_dir, filename)
+        if self.optimizer and self.optimizer.precompress and not has_precompressed(path):
+            with open(path, 'rb') as f:
+                write_precompressed(path, f.read())
+
+    def render_pages(self):
+        """Yield (filename, html, page) for every scraped page"""
+        for page in iter_results(self.results_file):
+            html = page['html_content']
+            if self.mirror:
+                html = self.mirror.rewrite(html, page['url'])
+            if self.images:
+                html = self.images.rewrite(html)
+            if self.links:
+                html = self.links.rewrite(html, page['url'])
+            yield url_to_filename(page['url']), html, page
+
+    def build(self):
+        """Build all pages and the index in one pass over the results"""
+        entries = []
+        last_updated = ''
+        pages = self.render_pages()
+        if self.optimizer:
+            # Optimized in parallel, still in results order; None means the output is current
+            pages = self.optimizer.optimize(pages, self.is_current)
+        for filename, html, page in pages:
+            with metrics.span('build_page'):
+                if html is None:
+                    self.mark_unchanged(filename)
+                else:
+                    self.write_output(filename, html)
+                entries.append((page_title(page, self.metadata.get(page['url'])), page['url'], filename))
+            last_updated = max(last_updated, page.get('checked_at') or page.get('scraped_at') or '')
+
+        with metrics.span('build_index'):
+            files = render_index(load_template(self.template_file), entries, last_updated,
+                                 self.site_name, self.site_url)
+            for filename, content in files.items():
+                self.write_output(filename, content)
+            self.remove_stale(INDEX_DIR, files)
+        with metrics.span('build_search'):
+            self.write_search_index(entries)
+
+        if self.optimizer:
+            self.optimizer.save()
+        self.save_manifest()
+        return entries
+
+    def save_manifest(self):
+        """Write the build manifest"""
+        write_json_atomic(self.manifest_path, self.manifest)
+
+    def write_search_index(self, entries: List[Tuple[str, str, str]]):
+        """Write the search shards from the extracted page text, removing stale shards"""
+        docs = []
+        for title, url, filename in entries:
+            metadata = self.metadata.get(url) or {}
+            docs.append({'title': title, 'href': filename, 'text': metadata.get('text'),
+                         'description': metadata.get('description')})
+        files = build_search_index(docs)
+        for filename, content in files.items():
+            self.write_output(filename, content)
+        self.remove_stale(SEARCH_DIR, files)
+
+    def remove_stale(self, directory: str, files: Dict[str, str]):
+        """Remove generated JSON files in a directory that this build did not produce"""
+        path = os.path.join(self.output_dir, directory)
+        for name in os.listdir(path):
+            filename = f"{directory}/{name}"
+            if filename not in files and name.endswith('.json'):
+                os.remove(os.path.join(path, name))
+                self.manifest.pop(filename, None)
+
+
+def prepare_build(mirror_assets=False, optimize_images=False, optimize=False, local_links=False,
+                  internal_hosts=(), workers=None, mirror_transport=None, **builder_args) -> SiteBuilder:
+    """Run the stages that come before the page build and return the configured builder
+
+    mirror_transport replaces the asset mirror's own transport (e.g. one capped by a fleet).
+    """
+    # Extraction stage first: it only parses pages whose content changed
+    with metrics.span('extract_stage'):
+        metadata = PageExtractor(workers=workers).run()
+    
+    builder = SiteBuilder(metadata=metadata, **builder_args)
+    if optimize:
+        builder.optimizer = PageOptimizer(workers=workers)
+    if local_links:
+        builder.links = LinkMap((page['url'] for page in iter_results(builder.results_file)), internal_hosts)
+    if mirror_assets:
+        builder.mirror = AssetMirror(transport=mirror_transport)
+        with metrics.span('mirror_stage'):
+            builder.mirror.mirror_pages(iter_results(builder.results_file))
+        stats = builder.mirror.stats
+        print(f"🖼️  Mirrored assets: {stats['downloaded']} downloaded, "
+              f"{stats['cached']} already local, {stats['failed']} failed")
+    if optimize_images:
+        # After mirroring, so newly downloaded images get variants too
+        image_optimizer = ImageOptimizer(workers=workers)
+        with metrics.span('image_stage'):
+            builder.images = ImageRewriter(images=image_optimizer.run())
+        stats = image_optimizer.stats
+        print(f"🖼️  Image variants: {stats['processed']} processed, {stats['cached']} unchanged, "
+              f"{stats['failed']} failed")
+    return builder
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Build the static backup site")
+    parser.add_argument('--mirror-assets', action='store_true',
+                        help="Download page subresources into assets/ and rewrite pages to use them")
+    parser.add_argument('--optimize-images', action='store_true',
+                        help="Generate WebP/AVIF variants of assets/ images and use them in the pages")
+    parser.add_argument('--optimize', action='store_true',
+                        help="Strip Kajabi runtime markup, minify pages and write .gz/.br siblings")
+    parser.add_argument('--local-links', action='store_true',
+                        help="Point links between backed-up pages at the local files")
+    parser.add_argument('--check-links', action='store_true',
+                        help="Check every link and asset after the build (link_report.json)")
+    parser.add_argument('--internal-host', action='append', default=[],
+                        help="Another host serving the same site, e.g. a custom domain (repeatable)")
+    parser.add_argument('--deploy', action='store_true',
+                        help="Copy the built site into deploy/ with hashed asset names, vercel.json "
+                             "cache headers and upload_manifest.json")
+    parser.add_argument('--html-max-age', type=int, default=HTML_MAX_AGE,
+                        help="With --deploy: seconds browsers may use HTML before revalidating")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--site-name', default=DEFAULT_SITE_NAME, help="Heading of index.html")
+    parser.add_argument('--site-url', default=DEFAULT_SITE_URL, help="Live site linked from index.html")
+    args = parser.parse_args()
+    
+    builder = prepare_build(mirror_assets=args.mirror_assets, optimize_images=args.optimize_images,
+                            optimize=args.optimize, local_links=args.local_links,
+                            internal_hosts=args.internal_host, workers=args.workers,
+                            site_name=args.site_name, site_url=args.site_url)
+    entries = builder.build()
+
+    print(f"✅ Built site with {len(entries)} pages")
+    print(f"📊 Statistics:")
+    print(f"   - Files written: {builder.stats['written']}")
+    print(f"   - Files unchanged: {builder.stats['unchanged']}")
+    if builder.optimizer:
+        stats = builder.optimizer.stats
+        print(f"   - Pages optimized: {stats['optimized']} ({stats['cached']} cached), "
+              f"{stats['bytes_in'] / 1024:.0f} KB -> {stats['bytes_out'] / 1024:.0f} KB")
+
+    if args.check_links:
+        print()
+        print_report(check_site(builder.results_file, builder.output_dir, extra_hosts=args.internal_host))
+    if args.deploy:
+        print()
+        with metrics.span('deploy_stage'):
+            upload = prepare_deploy(builder.output_dir, builder.manifest, html_max_age=args.html_max_age)
+        # Deploy digests join the page digests, so the next build skips unchanged deploy files too
+        builder.save_manifest()
+        print_upload_manifest(upload)
+
+    print(f"   - Run metrics: {metrics.write('build')}")
+
+    # List the pages
+    print(f"\n📄 Pages included:")
+    for i, (title, url, _) in enumerate(entries, 1):
+        print(f"   {i:2d}. {title} ({url})")
+
+
+if __name__ == "__main__":
+    main()
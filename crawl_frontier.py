@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+"""
+Crawl frontier for link-discovery mode
+- Priority queue ordered by depth, then path length (landing pages before deep links)
+- Normalized, deduplicated URLs with a seen set
+- Depth, domain, page-count and resource-type limits
+"""
+
+import heapq
+import itertools
+import os
+from typing import Iterable, List, Optional, Set, Tuple
+from urllib.parse import urlparse
+
+from url_utils import normalize_url
+
+# Links that never lead to backup-worthy HTML pages
+SKIPPED_EXTENSIONS = {
+    '.css', '.js', '.json', '.xml', '.pdf', '.zip',
+    '.png', '.jpg', '.jpeg', '.gif', '.svg', '.webp', '.ico',
+    '.mp3', '.mp4', '.mov', '.wav', '.m4a',
+}
+DEFAULT_EXCLUDES = ['/login', '/logout', '/sign_in', '/password', '/cart', '/checkout']
+
+
+class CrawlFrontier:
+    """Deduplicated priority queue of URLs to crawl"""
+
+    def __init__(self, seeds: Iterable[str], max_depth: int = 3,
+                 allowed_domains: Optional[Iterable[str]] = None,
+                 max_pages: Optional[int] = None,
+                 excludes: Optional[List[str]] = None):
+        seeds = list(seeds)
+        self.max_depth = max_depth
+        self.max_pages = max_pages
+        self.excludes = DEFAULT_EXCLUDES if excludes is None else excludes
+        # Default to the seeds' own hosts
+        self.allowed_domains = {d.lower() for d in (allowed_domains or [urlparse(s).netloc for s in seeds])}
+        self.seen: Set[str] = set()
+        self.heap: List[Tuple[int, int, int, str]] = []
+        self.counter = itertools.count()
+        for seed in seeds:
+            self.push(seed, 0)
+
+    def allows(self, url: str) -> bool:
+        """Whether a URL is in scope for this crawl"""
+        parsed = urlparse(url)
+        if parsed.scheme not in ('http', 'https'):
+            return False
+        if parsed.netloc.lower() not in self.allowed_domains:
+            return False
+        if os.path.splitext(parsed.path)[1].lower() in SKIPPED_EXTENSIONS:
+            return False
+        return not any(parsed.path.startswith(prefix) for prefix in self.excludes)
+
+    def push(self, url: str, depth: int) -> bool:
+        """Add a URL unless it was already seen or is out of scope"""
+        if depth > self.max_depth:
+            return False
+        url = normalize_url(url)
+        if url in self.seen or not self.allows(url):
+            return False
+        if self.max_pages is not None and len(self.seen) >= self.max_pages:
+            return False
+        self.seen.add(url)
+        priority = len(urlparse(url).path.strip('/').split('/'))
+        heapq.heappush(self.heap, (depth, priority, next(self.counter), url))
+        return True
+
+    def push_links(self, links: Iterable[str], parent_depth: int) -> int:
+        """Add the links found on a page, returning how many were new"""
+        return sum(self.push(link, parent_depth + 1) for link in links)
+
+    def pop(self) -> Tuple[str, int]:
+        """Take the next URL and its depth"""
+        depth, _, _, url = heapq.heappop(self.heap)
+        return url, depth
+
+    def __len__(self) -> int:
+        return len(self.heap)
@@ -0,0 +1,294 @@
+#!/usr/bin/env python3
+"""
+Vercel deployment directory for the built site
+- Post-build stage: copies the deployable files into deploy/ with content-hashed asset names
+  and the pages and stylesheets pointing at them; the built site and assets/ are left as they are
+- Only files whose bytes changed are rewritten; their digests go into the build manifest
+- vercel.json headers: hashed assets and image variants are immutable for a year,
+  HTML and the index/search JSON revalidate after a short max-age
+- Upload manifest of the deployable files that changed since the last run, with the
+  SHA-1 and size Vercel's file upload API identifies files by
+"""
+
+import argparse
+import hashlib
+import os
+import posixpath
+import shutil
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from asset_store import HASH_LENGTH, canonical_name_key, hash_bytes, hash_file, hashed_name, rewrite_references
+from index_renderer import INDEX_DIR
+from mirror_assets import ASSET_DIR
+from optimize_images import VARIANT_DIR
+from results_store import load_json, write_json_atomic
+from search_index import SEARCH_DIR
+
+VERCEL_CONFIG = 'vercel.json'
+DEPLOY_DIR = 'deploy'
+UPLOAD_MANIFEST = 'upload_manifest.json'
+STATE_FILE = '.deploy_state.json'
+IMMUTABLE = 'public, max-age=31536000, immutable'
+HTML_MAX_AGE = 300
+# Generated directories deployed with the pages
+DEPLOY_DIRS = [ASSET_DIR, INDEX_DIR, SEARCH_DIR]
+# Vercel compresses responses itself, and the store manifests are build state
+SKIPPED_SUFFIXES = ('.gz', '.br')
+SKIPPED_FILES = {f"{ASSET_DIR}/manifest.json", f"{ASSET_DIR}/{VARIANT_DIR}/manifest.json"}
+
+
+def cache_headers(html_max_age: int = HTML_MAX_AGE) -> List[Dict]:
+    """vercel.json headers rules; the sources do not overlap, so rule order does not matter"""
+    revalidate = f"public, max-age={html_max_age}, must-revalidate"
+
+    def rule(source, value):
+        return {'source': source, 'headers': [{'key': 'Cache-Control', 'value': value}]}
+
+    return [
+        # name.<hash>.ext from the asset store; variants are named <hash>-<width>.<format>
+        rule(f"/{ASSET_DIR}/(.*)\\.([0-9a-f]{{{HASH_LENGTH}}})\\.([A-Za-z0-9]+)", IMMUTABLE),
+        rule(f"/{ASSET_DIR}/{VARIANT_DIR}/(.*)", IMMUTABLE),
+        rule('/', revalidate),
+        rule('/(.*)\\.html', revalidate),
+        rule(f"/({INDEX_DIR}|{SEARCH_DIR})/(.*)", revalidate),
+    ]
+
+
+def write_vercel_config(source: str = VERCEL_CONFIG, path: Optional[str] = None,
+                        html_max_age: int = HTML_MAX_AGE) -> Dict:
+    """Write vercel.json with the cache headers, keeping the rest of the source config"""
+    config = load_json(source, {'version': 2})
+    # Vercel rejects "routes" next to "headers"; the static build already serves / as
+    # index.html and every other path as its file, which is all the old routes did
+    config.pop('routes', None)
+    config['headers'] = cache_headers(html_max_age)
+    write_json_atomic(path or source, config)
+    return config
+
+
+def built_pages(manifest: Dict) -> List[str]:
+    """Root pages the build wrote (its manifest entries) plus index.html
+
+    Other *.html files next to them, such as index_template.html, are not part of the site.
+    """
+    pages = {name for name in manifest if '/' not in name and name.endswith('.html')}
+    pages.add('index.html')
+    return sorted(pages)
+
+
+def deployable_files(output_dir: str = '.', pages: Optional[Iterable[str]] = None) -> List[str]:
+    """Paths (relative, with /) of every file the deployed site serves
+
+    pages are the root pages to include; by default every *.html in output_dir, which is
+    only right for the deploy directory itself.
+    """
+    if pages is None:
+        pages = [name for name in os.listdir(output_dir) if name.endswith('.html')]
+    files = [name for name in pages if os.path.isfile(os.path.join(output_dir, name))]
+    if os.path.exists(os.path.join(output_dir, VERCEL_CONFIG)):
+        files.append(VERCEL_CONFIG)
+    for directory in DEPLOY_DIRS:
+        for root, dirs, names in os.walk(os.path.join(output_dir, directory)):
+            dirs[:] = [d for d in dirs if not d.startswith('.')]
+            for name in names:
+                path = os.path.relpath(os.path.join(root, name), output_dir).replace(os.sep, '/')
+                if not name.startswith('.') and not name.endswith(SKIPPED_SUFFIXES) and path not in SKIPPED_FILES:
+                    files.append(path)
+    return sorted(files)
+
+
+def hashed_asset_names(asset_dir: str, names: List[str]) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """Content-hashed deploy names for files in assets/, plus the rewritten stylesheets
+
+    Returns filename -> hashed name (byte-identical copies share one name) and
+    filename -> stylesheet text pointing at the hashed names of its siblings.
+    """
+    sources = {}
+    digests = {}
+    for name in names:
+        path = os.path.join(asset_dir, name)
+        if name.endswith('.css'):
+            with open(path, 'r', encoding='utf-8') as f:
+                sources[name] = f.read()
+        else:
+            digests[name] = hash_file(path)
+
+    renames: Dict[str, str] = {}
+    stylesheets: Dict[str, str] = {}
+    # Stylesheets name their siblings, so their bytes (and hash) follow those names;
+    # repeat until stylesheets that import other stylesheets settle
+    for _ in range(len(sources) + 1):
+        by_hash: Dict[str, List[str]] = {}
+        for name, digest in digests.items():
+            by_hash.setdefault(digest, []).append(name)
+        renames = {name: hashed_name(min(copies, key=canonical_name_key), digest)
+                   for digest, copies in by_hash.items() for name in copies}
+        stylesheets = {name: rewrite_references(text, renames, '') for name, text in sources.items()}
+        sheet_digests = {name: hash_bytes(text.encode('utf-8')) for name, text in stylesheets.items()}
+        if all(digests.get(name) == digest for name, digest in sheet_digests.items()):
+            break
+        digests.update(sheet_digests)
+    return renames, stylesheets
+
+
+def _is_current(manifest: Dict, key: str, path: str, digest: str) -> bool:
+    """Whether a deploy file already holds these bytes (same check as the site build)"""
+    if not os.path.exists(path):
+        return False
+    if key not in manifest:
+        manifest[key] = hash_file(path)
+    return manifest[key] == digest
+
+
+def build_deploy_dir(output_dir: str = '.', manifest: Optional[Dict] = None,
+                     deploy_dir: Optional[str] = None) -> Dict:
+    """Copy the built site into the deploy directory with content-hashed asset names
+
+    manifest is the build manifest: its page entries name the root pages to deploy, deploy
+    files are recorded in it under their path relative to output_dir, and only files whose
+    digest changed are written.
+    """
+    manifest = {} if manifest is None else manifest
+    deploy_dir = deploy_dir or os.path.join(output_dir, DEPLOY_DIR)
+    files = [name for name in deployable_files(output_dir, built_pages(manifest)) if name != VERCEL_CONFIG]
+    assets = [name.split('/', 1)[1] for name in files if posixpath.dirname(name) == ASSET_DIR]
+    renames, stylesheets = hashed_asset_names(os.path.join(output_dir, ASSET_DIR), assets)
+
+    stats = {'written': 0, 'unchanged': 0, 'removed': 0, 'assets': len(set(renames.values()))}
+    deployed = set()
+    for filename in files:
+        source = os.path.join(output_dir, filename)
+        directory, name = posixpath.split(filename)
+        content = None
+        target = filename
+        if directory == ASSET_DIR:
+            target = f"{ASSET_DIR}/{renames[name]}"
+            if name in stylesheets:
+                content = stylesheets[name].encode('utf-8')
+        elif filename.endswith('.html'):
+            with open(source, 'r', encoding='utf-8') as f:
+                content = rewrite_references(f.read(), renames).encode('utf-8')
+        if target in deployed:
+            # Byte-identical copy of an asset already deployed
+            continue
+        deployed.add(target)
+
+        path = os.path.join(deploy_dir, target)
+        key = os.path.relpath(path, output_dir).replace(os.sep, '/')
+        digest = hash_file(source) if content is None else hash_bytes(content)
+        if _is_current(manifest, key, path, digest):
+            stats['unchanged'] += 1
+            continue
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if content is None:
+            shutil.copyfile(source, path)
+        else:
+            with open(path, 'wb') as f:
+                f.write(content)
+        manifest[key] = digest
+        stats['written'] += 1
+
+    # Files from earlier deploys that this build no longer produces
+    for root, _, names in os.walk(deploy_dir):
+        for name in names:
+            path = os.path.join(root, name)
+            target = os.path.relpath(path, deploy_dir).replace(os.sep, '/')
+            if target not in deployed and target != VERCEL_CONFIG:
+                os.remove(path)
+                manifest.pop(os.path.relpath(path, output_dir).replace(os.sep, '/'), None)
+                stats['removed'] += 1
+    return stats
+
+
+def _sha1(path: str) -> str:
+    digest = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_upload_manifest(output_dir: str = '.', state_file: Optional[str] = None,
+                          manifest_file: Optional[str] = None) -> Dict:
+    """List the deployable files that changed since the last run and remember the current ones
+
+    Files are only re-hashed when their size or mtime changed.
+    """
+    state_file = state_file or os.path.join(output_dir, STATE_FILE)
+    manifest_file = manifest_file or os.path.join(output_dir, UPLOAD_MANIFEST)
+    previous = load_json(state_file, {})
+    current = {}
+    changed = []
+    total_bytes = 0
+    for filename in deployable_files(output_dir):
+        stat = os.stat(os.path.join(output_dir, filename))
+        entry = previous.get(filename)
+        if entry and entry['size'] == stat.st_size and entry['mtime_ns'] == stat.st_mtime_ns:
+            sha = entry['sha']
+        else:
+            sha = _sha1(os.path.join(output_dir, filename))
+        current[filename] = {'sha': sha, 'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns}
+        total_bytes += stat.st_size
+        if not entry or entry['sha'] != sha:
+            changed.append({'file': filename, 'sha': sha, 'size': stat.st_size})
+
+    manifest = {
+        'generated_at': datetime.now().isoformat(),
+        'root': output_dir,
+        'files': len(current),
+        'total_bytes': total_bytes,
+        'changed_bytes': sum(entry['size'] for entry in changed),
+        'changed': changed,
+        'removed': sorted(set(previous) - set(current)),
+    }
+    write_json_atomic(manifest_file, manifest)
+    write_json_atomic(state_file, current, indent=None)
+    return manifest
+
+
+def prepare_deploy(output_dir: str = '.', manifest: Optional[Dict] = None, deploy_dir: Optional[str] = None,
+                   html_max_age: int = HTML_MAX_AGE) -> Dict:
+    """Fill the deploy directory from an already built site and list the files to upload
+
+    The upload manifest and its state stay in output_dir, so they are not deployed.
+    """
+    deploy_dir = deploy_dir or os.path.join(output_dir, DEPLOY_DIR)
+    stats = build_deploy_dir(output_dir, manifest, deploy_dir)
+    write_vercel_config(os.path.join(output_dir, VERCEL_CONFIG), os.path.join(deploy_dir, VERCEL_CONFIG),
+                        html_max_age)
+    upload = write_upload_manifest(deploy_dir, os.path.join(output_dir, STATE_FILE),
+                                   os.path.join(output_dir, UPLOAD_MANIFEST))
+    upload['deploy_stats'] = stats
+    return upload
+
+
+def print_upload_manifest(manifest: Dict):
+    """Print the deployment summary"""
+    stats = manifest['deploy_stats']
+    print(f"🔖 Deploy directory {manifest['root']}: {stats['assets']} content-hashed assets, "
+          f"{stats['written']} files written, {stats['unchanged']} unchanged, {stats['removed']} removed")
+    print(f"🚀 Deployment: {len(manifest['changed'])} of {manifest['files']} files changed "
+          f"({manifest['changed_bytes'] / 1024:.0f} KB of {manifest['total_bytes'] / (1 << 20):.1f} MB), "
+          f"{len(manifest['removed'])} removed")
+    print(f"   - Upload manifest: {UPLOAD_MANIFEST}")
+
+
+def main():
+    """Fill the deploy directory, write its vercel.json and list the files to upload"""
+    from build_site import MANIFEST_FILE
+
+    parser = argparse.ArgumentParser(description="Prepare the built site for a Vercel deployment")
+    parser.add_argument('--html-max-age', type=int, default=HTML_MAX_AGE,
+                        help="Seconds browsers may use HTML and index/search JSON before revalidating")
+    parser.add_argument('--deploy-dir', default=DEPLOY_DIR, help="Directory to deploy (rebuilt from the site)")
+    args = parser.parse_args()
+
+    manifest = load_json(MANIFEST_FILE, {})
+    upload = prepare_deploy(manifest=manifest, deploy_dir=args.deploy_dir, html_max_age=args.html_max_age)
+    write_json_atomic(MANIFEST_FILE, manifest)
+    print_upload_manifest(upload)
+
+
+if __name__ == "__main__":
+    main()
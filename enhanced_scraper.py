@@ -5,40 +5,84 @@ Enhanced Kajabi Scraper with Anti-Blocking Measures
 - User agent rotation
 - Session management
 - Batch processing
-- Progress tracking and resume capability
+- Progress tracking and resume capability (append-only journal)
 - Error handling and retry logic
+- Async fetch mode with per-host rate limits
+- Incremental refresh with ETag/Last-Modified revalidation
+- Link-discovery crawl mode seeded from start URLs
+- Timing/counter metrics per run (JSON file, optional Prometheus endpoint)
+- Optional streaming mode: bodies go straight to disk, only page metadata stays in memory
 """
 
+import argparse
+import asyncio
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 import requests
 from bs4 import BeautifulSoup
 import time
 import random
-import json
-import os
-from urllib.parse import urljoin, urlparse
-from datetime import datetime
+from urllib.parse import urlparse
 import logging
+import os
 from typing import List, Dict, Optional
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('scraper.log'),
-        logging.StreamHandler()
-    ]
-)
+from crawl_frontier import CrawlFrontier
+from page_stream import BodySpool
+from http_transport import MAX_BODY_BYTES, shared_transport
+import page_extractors
+from rate_limiter import (MIN_RATE, PERMANENT, AdaptiveRateController, classify_failure,
+                          retry_after_seconds)
+from results_reader import iter_results
+from results_store import ResultsStore
+from scrape_metrics import metrics
+from snapshot_store import SnapshotStore
+from revalidation import build_result, build_streamed_result, conditional_headers, content_hash
+
 logger = logging.getLogger(__name__)
 
+
+def configure_logging(log_file: str = 'scraper.log'):
+    """Log to the console and to a file (called by main, or per site by backup_sites.py)"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(log_file),
+            logging.StreamHandler()
+        ]
+    )
+
+
 class EnhancedKajabiScraper:
-    def __init__(self, base_delay=2, max_delay=5, batch_size=10):
+    def __init__(self, base_delay=2, max_delay=5, batch_size=10,
+                 concurrency=4, host_rate=0.3, host_burst=1, per_host_concurrency=1,
+                 refresh=False, results_file='scraper_results.json', pool_size=None, http2=False,
+                 max_body_bytes=MAX_BODY_BYTES, stream_bodies=False, max_host_rate=None):
         self.base_delay = base_delay
         self.max_delay = max_delay
+        # Adaptive per-host rate: starts at host_rate and backs off as far as MIN_RATE (slower than
+        # max_delay) while the host throttles or slows down. It never exceeds host_rate unless
+        # max_host_rate opts in, and even then stays at least base_delay apart
+        self.rate_controller = AdaptiveRateController(
+            host_rate, host_burst,
+            min_rate=min(host_rate, MIN_RATE),
+            max_rate=max(host_rate, min(max_host_rate or host_rate, 1 / base_delay)))
         self.batch_size = batch_size
-        self.session = requests.Session()
+        
+        # Async fetch mode settings
+        self.concurrency = concurrency
+        self.host_rate = host_rate
+        self.host_burst = host_burst
+        self.per_host_concurrency = per_host_concurrency
+        
+        # Refresh mode revalidates completed URLs instead of skipping them
+        self.refresh = refresh
+        # Pooled keep-alive connections shared with the other scrapers in this process
+        self.transport = shared_transport(pool_size or max(10, concurrency), http2, max_body_bytes)
         self.progress_file = 'scraper_progress.json'
-        self.results_file = 'scraper_results.json'
+        self.results_file = results_file  # legacy JSON or a page archive (*.archive)
+        self.journal_file = 'scraper_journal.jsonl'
         
         # User agent rotation
         self.user_agents = [
@@ -48,155 +92,129 @@ class EnhancedKajabiScraper:
             'Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15; rv:121.0) Gecko/20100101 Firefox/121.0'
         ]
         
-        # Session configuration
-        self.session.headers.update({
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.5',
-            'Accept-Encoding': 'gzip, deflate',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-        })
+        # Streaming mode writes bodies to spool files as they arrive and keeps metadata only
+        self.spool = BodySpool() if stream_bodies else None
         
-        # Load existing progress
-        self.progress = self.load_progress()
-        self.results = self.load_results()
-    
-    def load_progress(self) -> Dict:
-        """Load processing progress from file"""
-        if os.path.exists(self.progress_file):
-            try:
-                with open(self.progress_file, 'r') as f:
-                    return json.load(f)
-            except:
-                pass
-        return {'completed_urls': [], 'failed_urls': [], 'current_batch': 0}
+        # Load existing progress (legacy JSON files plus any journal left by a crash)
+        self.store = ResultsStore(self.results_file, self.progress_file, self.journal_file,
+                                  body_dir=self.spool.directory if self.spool else None)
+        self.progress = self.store.progress
+        self.results = self.store.results
     
-    def save_progress(self):
-        """Save current progress to file"""
-        with open(self.progress_file, 'w') as f:
-            json.dump(self.progress, f, indent=2)
-    
-    def load_results(self) -> List:
-        """Load existing results from file"""
-        if os.path.exists(self.results_file):
-            try:
-                with open(self.results_file, 'r') as f:
-                    return json.load(f)
-            except:
-                pass
-        return []
-    
-    def save_results(self):
-        """Save current results to file"""
-        with open(self.results_file, 'w') as f:
-            json.dump(self.results, f, indent=2)
+    def save(self):
+        """Compact the journal into the results and progress files"""
+        with metrics.span('compact'):
+            self.store.compact()
     
     def get_random_user_agent(self) -> str:
         """Get a random user agent"""
         return random.choice(self.user_agents)
     
-    def wait_with_jitter(self):
-        """Wait with random jitter to appear more human-like"""
-        delay = random.uniform(self.base_delay, self.max_delay)
-        logger.info(f"Waiting {delay:.2f} seconds...")
-        time.sleep(delay)
+    def wait_for_host(self, url: str):
+        """Wait for the host's adaptive budget (plus a little jitter to appear more human-like)"""
+        delay = self.rate_controller.wait(url)
+        jitter = random.uniform(0, 0.1 / self.rate_controller.rate_for(url))
+        time.sleep(jitter)
+        metrics.observe('sleep_host_budget', delay + jitter)
     
     def scrape_url(self, url: str, retries: int = 3) -> Optional[Dict]:
         """Scrape a single URL with retry logic"""
+        with metrics.span('scrape_url'):
+            return self._scrape_url(url, retries)
+    
+    def _scrape_url(self, url: str, retries: int) -> Optional[Dict]:
+        """Fetch attempts for scrape_url"""
+        previous = self.store.get_result(url) if self.refresh else None
+        
         for attempt in range(retries):
             try:
-                # Update user agent for each request
-                self.session.headers.update({
-                    'User-Agent': self.get_random_user_agent()
-                })
+                # Rotate user agent per request (the transport is shared between threads)
+                headers = {'User-Agent': self.get_random_user_agent()}
+                headers.update(conditional_headers(previous))
                 
                 logger.info(f"Scraping: {url} (attempt {attempt + 1}/{retries})")
                 
-                response = self.session.get(url, timeout=30)
-                response.raise_for_status()
-                
-                # Save the full HTML content
-                result = {
-                    'url': url,
-                    'html_content': response.text,
-                    'scraped_at': datetime.now().isoformat(),
-                    'status_code': response.status_code
-                }
+                # The transport times TTFB and the (size-capped) body download
+                started = time.perf_counter()
+                if self.spool:
+                    result = self.fetch_to_disk(url, headers, previous)
+                else:
+                    response = self.transport.get(url, headers=headers, timeout=30)
+                    response.raise_for_status()
+                    # Save the full HTML content with its validators
+                    result = build_result(url, response, previous)
+                self.rate_controller.record_success(url, time.perf_counter() - started)
                 
-                logger.info(f"Successfully scraped: {url}")
+                if result['changed']:
+                    metrics.incr('pages_fetched')
+                    logger.info(f"Successfully scraped: {url}")
+                else:
+                    metrics.incr('pages_unchanged')
+                    logger.info(f"Unchanged since last backup: {url}")
                 return result
                 
             except requests.exceptions.RequestException as e:
                 logger.warning(f"Attempt {attempt + 1} failed for {url}: {e}")
+                failure = classify_failure(e)
+                if failure == PERMANENT:
+                    # 404s and friends will not change on a retry
+                    metrics.incr('pages_failed_permanent')
+                    logger.error(f"Permanent failure for {url}, not retrying")
+                    return None
+                retry_after = retry_after_seconds(getattr(e, 'response', None))
+                self.rate_controller.record_failure(url, failure, retry_after)
                 if attempt < retries - 1:
-                    # Exponential backoff
-                    wait_time = (2 ** attempt) * self.base_delay
-                    logger.info(f"Waiting {wait_time} seconds before retry...")
-                    time.sleep(wait_time)
+                    # The controller has slowed the host down (and honours Retry-After)
+                    logger.info(f"Backing off {url} ({failure}), host rate now "
+                                f"{self.rate_controller.rate_for(url):.2f} requests/second")
+                    metrics.incr('retries')
+                    with metrics.span('sleep_retry_backoff'):
+                        self.rate_controller.wait(url)
                 else:
+                    metrics.incr('pages_failed')
                     logger.error(f"All attempts failed for {url}")
                     return None
             except Exception as e:
                 logger.error(f"Unexpected error scraping {url}: {e}")
                 return None
     
+    def fetch_to_disk(self, url: str, headers: Dict[str, str], previous: Optional[Dict]) -> Dict:
+        """Stream a page body into its spool file, picking up its links on the way"""
+        with self.transport.stream(url, headers=headers, timeout=30) as (response, chunks):
+            response.raise_for_status()
+            if previous and response.status_code == 304:
+                return build_streamed_result(url, response, None, previous)
+            with metrics.span('download'):
+                page = self.spool.capture(url, chunks, response.encoding)
+        metrics.incr('bytes_spooled', page['size'])
+        
+        if previous and not previous.get('content_hash'):
+            previous = {**previous, 'content_hash': content_hash(self.store.load_html(previous))}
+        result = build_streamed_result(url, response, page, previous)
+        if not result['changed'] and previous.get('body_file') != page['body_file']:
+            # The stored body is still current
+            os.remove(page['body_file'])
+        return result
+    
     def extract_title(self, soup: BeautifulSoup) -> str:
         """Extract page title"""
-        title_tag = soup.find('title')
-        return title_tag.text.strip() if title_tag else ''
+        return page_extractors.extract_title(soup)
     
     def extract_content(self, soup: BeautifulSoup) -> str:
         """Extract main content text"""
-        # Remove script and style elements
-        for script in soup(["script", "style"]):
-            script.decompose()
-        
-        # Try to find main content areas
-        content_selectors = [
-            'main',
-            '[role="main"]',
-            '.main-content',
-            '.content',
-            'article',
-            '.post-content',
-            '.page-content'
-        ]
-        
-        content_text = ""
-        for selector in content_selectors:
-            content_area = soup.select_one(selector)
-            if content_area:
-                content_text = content_area.get_text(separator='\n', strip=True)
-                break
-        
-        # Fallback to body if no main content found
-        if not content_text:
-            content_text = soup.get_text(separator='\n', strip=True)
-        
-        return content_text
+        return page_extractors.extract_content(soup)
     
     def extract_images(self, soup: BeautifulSoup, base_url: str) -> List[str]:
         """Extract image URLs"""
-        images = []
-        for img in soup.find_all('img', src=True):
-            img_url = urljoin(base_url, img['src'])
-            images.append(img_url)
-        return images
+        return page_extractors.extract_images(soup, base_url)
     
     def extract_links(self, soup: BeautifulSoup, base_url: str) -> List[str]:
         """Extract internal links"""
-        links = []
-        for link in soup.find_all('a', href=True):
-            link_url = urljoin(base_url, link['href'])
-            # Only include links from the same domain
-            if urlparse(link_url).netloc == urlparse(base_url).netloc:
-                links.append(link_url)
-        return list(set(links))  # Remove duplicates
+        return page_extractors.extract_links(soup, base_url)
     
     def extract_meta_description(self, soup: BeautifulSoup) -> str:
         """Extract meta description"""
-        meta_desc = soup.find('meta', attrs={'name': 'description'})
-        return meta_desc.get('content', '') if meta_desc else ''
+        return page_extractors.extract_meta_description(soup)
     
     def load_urls_from_file(self, file_path: str) -> List[str]:
         """Load URLs from file"""
@@ -232,33 +250,41 @@ class EnhancedKajabiScraper:
             logger.error(f"Error loading URLs from {file_path}: {e}")
             return []
     
+    def record_result(self, url: str, result: Optional[Dict]):
+        """Record the outcome of a URL in the journal"""
+        if result:
+            # Streamed links only feed the crawl frontier
+            result.pop('links', None)
+        if result and not result['changed']:
+            self.store.mark_unchanged(url, result['checked_at'])
+        elif result:
+            self.store.add_result(result)
+        else:
+            self.store.add_failure(url)
+            logger.error(f"Failed to scrape: {url}")
+    
     def process_batch(self, urls: List[str], batch_num: int) -> List[Dict]:
         """Process a batch of URLs"""
         logger.info(f"Processing batch {batch_num + 1} with {len(urls)} URLs")
+        with metrics.span('process_batch'):
+            return self._process_batch(urls)
+    
+    def _process_batch(self, urls: List[str]) -> List[Dict]:
+        """Scrape the URLs of one batch in order"""
         batch_results = []
         
-        for i, url in enumerate(urls):
-            if url in self.progress['completed_urls']:
+        for position, url in enumerate(urls, 1):
+            if self.store.is_completed(url) and not self.refresh:
                 logger.info(f"Skipping already processed URL: {url}")
                 continue
             
+            # Wait for the host's budget; the controller spaces out requests
+            self.wait_for_host(url)
             result = self.scrape_url(url)
             if result:
                 batch_results.append(result)
-                self.results.append(result)
-                self.progress['completed_urls'].append(url)
-                logger.info(f"Progress: {len(self.progress['completed_urls'])}/{len(urls)} URLs completed")
-            else:
-                self.progress['failed_urls'].append(url)
-                logger.error(f"Failed to scrape: {url}")
-            
-            # Save progress after each URL
-            self.save_progress()
-            self.save_results()
-            
-            # Wait between requests (except for the last URL in batch)
-            if i < len(urls) - 1:
-                self.wait_with_jitter()
+                logger.info(f"Progress: {position}/{len(urls)} URLs of this batch done")
+            self.record_result(url, result)
         
         return batch_results
     
@@ -271,10 +297,11 @@ class EnhancedKajabiScraper:
         
         logger.info(f"Starting scraping process for {len(urls)} URLs")
         logger.info(f"Batch size: {self.batch_size}")
-        logger.info(f"Base delay: {self.base_delay}-{self.max_delay} seconds")
+        logger.info(f"Host rate: {self.host_rate} requests/second, adapting to the server "
+                    f"({self.rate_controller.min_rate:.2f}-{self.rate_controller.max_rate:.2f})")
         
         # Filter out already completed URLs
-        remaining_urls = [url for url in urls if url not in self.progress['completed_urls']]
+        remaining_urls = [url for url in urls if self.refresh or not self.store.is_completed(url)]
         logger.info(f"Remaining URLs to process: {len(remaining_urls)}")
         
         # Process in batches
@@ -284,13 +311,14 @@ class EnhancedKajabiScraper:
             
             try:
                 self.process_batch(batch, batch_num)
-                self.progress['current_batch'] = batch_num + 1
+                self.store.set_batch(batch_num + 1)
                 
                 # Longer pause between batches
                 if i + self.batch_size < len(remaining_urls):
                     batch_pause = random.uniform(10, 20)
                     logger.info(f"Batch completed. Pausing {batch_pause:.2f} seconds before next batch...")
-                    time.sleep(batch_pause)
+                    with metrics.span('sleep_batch_pause'):
+                        time.sleep(batch_pause)
                     
             except KeyboardInterrupt:
                 logger.info("Scraping interrupted by user")
@@ -299,7 +327,152 @@ class EnhancedKajabiScraper:
                 logger.error(f"Error processing batch {batch_num}: {e}")
                 continue
         
-        # Final summary
+        self.save()
+        self.log_summary()
+    
+    async def scrape_urls_async(self, urls: List[str]) -> List[Dict]:
+        """Fetch URLs concurrently, with a politeness budget per host instead of fixed sleeps"""
+        limiter = self.rate_controller
+        slots = asyncio.Semaphore(self.concurrency)
+        loop = asyncio.get_running_loop()
+        
+        # One queue per host so a slow host never blocks the others
+        host_queues = defaultdict(asyncio.Queue)
+        for url in urls:
+            host_queues[urlparse(url).netloc].put_nowait(url)
+        
+        results = []
+        started = time.monotonic()
+        stats = {'done': 0, 'waited': 0.0}
+        
+        async def host_worker(queue: asyncio.Queue):
+            while not queue.empty():
+                url = queue.get_nowait()
+                waited = await limiter.acquire(url)
+                metrics.observe('sleep_host_budget', waited)
+                stats['waited'] += waited
+                async with slots:
+                    result = await loop.run_in_executor(executor, self.scrape_url, url)
+                
+                if result:
+                    results.append(result)
+                self.record_result(url, result)
+                
+                stats['done'] += 1
+                elapsed = time.monotonic() - started
+                logger.info(f"Progress: {stats['done']}/{len(urls)} URLs "
+                            f"({stats['done'] / elapsed:.2f} pages/sec)")
+        
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            workers = [
+                host_worker(queue)
+                for queue in host_queues.values()
+                for _ in range(min(self.per_host_concurrency, queue.qsize()))
+            ]
+            await asyncio.gather(*workers)
+        
+        elapsed = time.monotonic() - started
+        rate = stats['done'] / elapsed if elapsed > 0 else 0.0
+        logger.info(f"Fetched {stats['done']} URLs from {len(host_queues)} hosts in {elapsed:.2f} seconds "
+                    f"({rate:.2f} pages/sec, {stats['waited']:.2f} seconds waiting on host budgets)")
+        return results
+    
+    def fetch_and_extract_links(self, url: str):
+        """Fetch a page (or reuse the stored copy) and return its result and internal links"""
+        result = self.store.get_result(url)
+        fetched = result is None or self.refresh
+        if fetched:
+            result = self.scrape_url(url)
+        if not result:
+            return None, [], fetched
+        if 'links' in result:
+            # Already extracted while the body streamed to disk
+            return result, result['links'], fetched
+        soup = BeautifulSoup(self.store.load_html(result), page_extractors.DEFAULT_PARSER)
+        return result, self.extract_links(soup, url), fetched
+    
+    async def crawl_async(self, frontier: CrawlFrontier) -> int:
+        """Crawl the frontier, adding the links of every page, and return the pages fetched"""
+        limiter = self.rate_controller
+        loop = asyncio.get_running_loop()
+        started = time.monotonic()
+        stats = {'done': 0, 'fetched': 0, 'active': 0}
+        
+        async def worker():
+            while True:
+                if not frontier:
+                    # Pages still in flight may add more links
+                    if stats['active'] == 0:
+                        return
+                    await asyncio.sleep(0.05)
+                    continue
+                
+                url, depth = frontier.pop()
+                stats['active'] += 1
+                try:
+                    if self.refresh or not self.store.has_result(url):
+                        metrics.observe('sleep_host_budget', await limiter.acquire(url))
+                    result, links, fetched = await loop.run_in_executor(
+                        executor, self.fetch_and_extract_links, url)
+                    if fetched:
+                        self.record_result(url, result)
+                        stats['fetched'] += 1
+                    added = frontier.push_links(links, depth)
+                finally:
+                    stats['active'] -= 1
+                
+                stats['done'] += 1
+                elapsed = time.monotonic() - started
+                logger.info(f"Crawled {url} (depth {depth}, {added} new links, "
+                            f"{len(frontier)} queued, {stats['fetched'] / elapsed:.2f} pages/sec)")
+        
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+        
+        logger.info(f"Crawl finished: {stats['done']} pages visited, {stats['fetched']} fetched, "
+                    f"{len(frontier.seen)} URLs discovered")
+        return stats['fetched']
+    
+    def crawl_site(self, seeds: List[str], max_depth: int = 3,
+                   allowed_domains: Optional[List[str]] = None, max_pages: Optional[int] = None):
+        """Discover and scrape a whole site starting from seed URLs"""
+        frontier = CrawlFrontier(seeds, max_depth=max_depth,
+                                 allowed_domains=allowed_domains, max_pages=max_pages)
+        logger.info(f"Starting crawl from {len(seeds)} seeds "
+                    f"(max depth {max_depth}, domains: {', '.join(sorted(frontier.allowed_domains))})")
+        
+        try:
+            asyncio.run(self.crawl_async(frontier))
+        except KeyboardInterrupt:
+            logger.info("Crawl interrupted by user")
+        
+        self.save()
+        self.log_summary()
+    
+    def scrape_all_urls_async(self, file_path: str):
+        """Scrape all URLs from file with the async fetch engine"""
+        urls = self.load_urls_from_file(file_path)
+        if not urls:
+            logger.error("No URLs to process")
+            return
+        
+        logger.info(f"Starting async scraping process for {len(urls)} URLs")
+        logger.info(f"Concurrency: {self.concurrency} ({self.per_host_concurrency} per host)")
+        logger.info(f"Host rate: {self.host_rate} requests/second (burst {self.host_burst})")
+        
+        remaining_urls = [url for url in urls if self.refresh or not self.store.is_completed(url)]
+        logger.info(f"Remaining URLs to process: {len(remaining_urls)}")
+        
+        try:
+            asyncio.run(self.scrape_urls_async(remaining_urls))
+        except KeyboardInterrupt:
+            logger.info("Scraping interrupted by user")
+        
+        self.save()
+        self.log_summary()
+    
+    def log_summary(self):
+        """Log the final summary"""
         logger.info("Scraping completed!")
         logger.info(f"Total URLs processed: {len(self.progress['completed_urls'])}")
         logger.info(f"Total URLs failed: {len(self.progress['failed_urls'])}")
@@ -311,26 +484,90 @@ class EnhancedKajabiScraper:
 
 def main():
     """Main function"""
+    parser = argparse.ArgumentParser(description="Enhanced Kajabi Scraper")
+    parser.add_argument('url_file', nargs='?',
+                        default="/Users/akunay/Downloads/melissa-backup_URLs_to-scrape.txt",
+                        help="File with the URLs to scrape")
+    parser.add_argument('--async', dest='use_async', action='store_true',
+                        help="Fetch hosts in parallel with per-host rate limits")
+    parser.add_argument('--crawl', nargs='+', metavar='SEED',
+                        help="Discover pages by following links from these start URLs")
+    parser.add_argument('--max-depth', type=int, default=3,
+                        help="Maximum link depth from the seeds (crawl mode)")
+    parser.add_argument('--max-pages', type=int, default=None,
+                        help="Maximum number of URLs to discover (crawl mode)")
+    parser.add_argument('--domain', action='append', dest='domains',
+                        help="Domain allowed in crawl mode (repeatable, default: the seeds' domains)")
+    parser.add_argument('--results-file', default='scraper_results.json',
+                        help="Results file: legacy JSON, or a compressed page archive (*.archive)")
+    parser.add_argument('--metrics-port', type=int, default=None,
+                        help="Serve Prometheus metrics on this port while scraping")
+    parser.add_argument('--metrics-host', default='127.0.0.1',
+                        help="Address the metrics endpoint listens on (e.g. 0.0.0.0 to expose it)")
+    parser.add_argument('--refresh', action='store_true',
+                        help="Revalidate already scraped URLs and keep unchanged pages")
+    parser.add_argument('--concurrency', type=int, default=4,
+                        help="Maximum requests in flight (async mode)")
+    parser.add_argument('--host-rate', type=float, default=0.3,
+                        help="Requests per second allowed per host (async mode)")
+    parser.add_argument('--max-host-rate', type=float, default=None,
+                        help="Let the adaptive rate rise above --host-rate up to this while the host "
+                             "responds quickly (default: never exceed --host-rate)")
+    parser.add_argument('--pool-size', type=int, default=None,
+                        help="Keep-alive connections per host (default: max(10, concurrency))")
+    parser.add_argument('--http2', action='store_true',
+                        help="Use HTTP/2 (needs httpx[http2])")
+    parser.add_argument('--stream', action='store_true',
+                        help="Write page bodies straight to disk and keep only metadata in memory")
+    parser.add_argument('--no-snapshot', action='store_true',
+                        help="Do not record this run as a versioned snapshot in snapshots/")
+    args = parser.parse_args()
+    configure_logging()
+    
     print("Enhanced Kajabi Scraper Starting...")
     print("=" * 50)
     
+    if args.metrics_port:
+        metrics.serve(args.metrics_port, args.metrics_host)
+        print(f"Serving metrics on http://{args.metrics_host}:{args.metrics_port}/metrics")
+    
     # Initialize scraper with conservative settings
     scraper = EnhancedKajabiScraper(
-        base_delay=2,      # Minimum 2 seconds between requests
-        max_delay=5,       # Maximum 5 seconds between requests
-        batch_size=5       # Process 5 URLs at a time
+        base_delay=2,      # Minimum 2 seconds between requests, even with --max-host-rate
+        max_delay=5,       # Not a cap: throttled hosts back off to one request every 20 seconds
+        batch_size=5,      # Process 5 URLs at a time
+        concurrency=args.concurrency,
+        host_rate=args.host_rate,
+        max_host_rate=args.max_host_rate,
+        refresh=args.refresh,
+        results_file=args.results_file,
+        pool_size=args.pool_size,
+        http2=args.http2,
+        stream_bodies=args.stream
     )
     
-    # URL file path
-    url_file = "/Users/akunay/Downloads/melissa-backup_URLs_to-scrape.txt"
-    
     # Start scraping
-    scraper.scrape_all_urls(url_file)
+    if args.crawl:
+        scraper.crawl_site(args.crawl, max_depth=args.max_depth,
+                           allowed_domains=args.domains, max_pages=args.max_pages)
+    elif args.use_async:
+        scraper.scrape_all_urls_async(args.url_file)
+    else:
+        scraper.scrape_all_urls(args.url_file)
+    
+    # Keep this run's pages as a snapshot; unchanged content costs no extra space
+    if not args.no_snapshot and os.path.exists(args.results_file):
+        snapshots = SnapshotStore()
+        with metrics.span('snapshot'):
+            snapshot_id = snapshots.record(iter_results(args.results_file), source=args.results_file)
+        print(f"Recorded snapshot {snapshot_id} "
+              f"({snapshots.stats['bytes_written'] / 1024:.0f} KB of new content)")
     
     print("\nScraping process completed!")
-    print(f"Check 'scraper_results.json' for results")
+    print(f"Check '{args.results_file}' for results")
     print(f"Check 'scraper_progress.json' for progress")
     print(f"Check 'scraper.log' for detailed logs")
+    print(f"Check '{metrics.write('scrape')}' for run metrics")
 
 
 if __name__ == "__main__":
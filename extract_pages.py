@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Post-crawl extraction stage
+- Runs the page extractors in a process pool (parsing is CPU-bound)
+- Single-pass html_scanner extractor by default; BeautifulSoup (lxml/html.parser) on request
+- Writes structured per-page metadata (title, text, links, images, description)
+- Pages whose content hash is unchanged reuse their stored metadata
+"""
+
+import argparse
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import Dict
+
+from html_scanner import scan_page
+from page_extractors import extract_metadata
+from results_reader import iter_results
+from revalidation import content_hash
+
+METADATA_FILE = 'page_metadata.jsonl'
+# 'fast' is html_scanner; the others are BeautifulSoup parser backends
+PARSERS = ['fast', 'lxml', 'html.parser']
+DEFAULT_PARSER = 'fast'
+
+
+def load_metadata(metadata_file: str = METADATA_FILE) -> Dict[str, Dict]:
+    """Load per-page metadata keyed by URL"""
+    metadata = {}
+    if os.path.exists(metadata_file):
+        with open(metadata_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                record = json.loads(line)
+                metadata[record['url']] = record
+    return metadata
+
+
+def _extract(url: str, html: str, parser: str) -> Dict:
+    """Worker: extract metadata for one page"""
+    if parser == 'fast':
+        metadata = scan_page(html, url)
+    else:
+        metadata = extract_metadata(html, url, parser)
+    metadata['content_hash'] = content_hash(html)
+    return metadata
+
+
+class PageExtractor:
+    """Extract metadata for every scraped page in parallel"""
+
+    def __init__(self, results_file='scraper_results.json', metadata_file=METADATA_FILE,
+                 workers=None, parser=DEFAULT_PARSER):
+        self.results_file = results_file
+        self.metadata_file = metadata_file
+        self.workers = workers or os.cpu_count() or 1
+        self.parser = parser
+        self.stats = {'extracted': 0, 'cached': 0}
+
+    def run(self) -> Dict[str, Dict]:
+        """Extract metadata for changed pages and write the metadata file"""
+        previous = load_metadata(self.metadata_file)
+        metadata = {}
+        pending = set()
+        # Keep a bounded number of pages in flight so memory stays flat
+        max_pending = self.workers * 2
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            for page in iter_results(self.results_file):
+                url = page['url']
+                digest = page.get('content_hash') or content_hash(page['html_content'])
+                cached = previous.get(url)
+                if cached and cached.get('content_hash') == digest and cached.get('parser') == self.parser:
+                    metadata[url] = cached
+                    self.stats['cached'] += 1
+                    continue
+
+                pending.add(executor.submit(_extract, url, page['html_content'], self.parser))
+                if len(pending) >= max_pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    self._collect(done, metadata)
+
+            self._collect(wait(pending).done, metadata)
+
+        tmp_path = f"{self.metadata_file}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for record in metadata.values():
+                f.write(json.dumps(record) + '\n')
+        os.replace(tmp_path, self.metadata_file)
+        return metadata
+
+    def _collect(self, futures, metadata: Dict[str, Dict]):
+        """Store finished extraction results"""
+        for future in futures:
+            record = future.result()
+            record['parser'] = self.parser
+            metadata[record['url']] = record
+            self.stats['extracted'] += 1
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Extract per-page metadata from the scraped results")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--parser', choices=PARSERS, default=DEFAULT_PARSER,
+                        help="Extractor: the single-pass scanner, or a BeautifulSoup parser backend")
+    args = parser.parse_args()
+
+    extractor = PageExtractor(workers=args.workers, parser=args.parser)
+    metadata = extractor.run()
+
+    print(f"✅ Extracted metadata for {len(metadata)} pages into {extractor.metadata_file}")
+    print(f"   - Parsed: {extractor.stats['extracted']}")
+    print(f"   - Unchanged (cached): {extractor.stats['cached']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+Single-pass page scanner on the stdlib html.parser (no DOM is built)
+- Title, meta tags (including Open Graph), canonical link, internal links, images and
+  main content text in one pass, with the same rules as the BeautifulSoup extractors
+- head_only mode stops at the end of <head> once title, meta tags and canonical are known
+- Can be fed incrementally; links_only mode is what page_stream.py runs while bodies download
+"""
+
+from html.parser import HTMLParser
+from typing import Dict, List, Optional
+from urllib.parse import urljoin, urlparse
+
+VOID_ELEMENTS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'link', 'meta',
+                 'param', 'source', 'track', 'wbr'}
+SKIPPED_ELEMENTS = {'script', 'style'}
+
+
+def _has_class(attrs: Dict, name: str) -> bool:
+    return name in (attrs.get('class') or '').split()
+
+
+# Same order as page_extractors.CONTENT_SELECTORS: the first selector with a match wins
+CONTENT_MATCHERS = [
+    lambda tag, attrs: tag == 'main',
+    lambda tag, attrs: attrs.get('role') == 'main',
+    lambda tag, attrs: _has_class(attrs, 'main-content'),
+    lambda tag, attrs: _has_class(attrs, 'content'),
+    lambda tag, attrs: tag == 'article',
+    lambda tag, attrs: _has_class(attrs, 'post-content'),
+    lambda tag, attrs: _has_class(attrs, 'page-content'),
+]
+
+
+class StopScan(Exception):
+    """Raised inside the parser once everything asked for has been seen"""
+
+
+class PageScanner(HTMLParser):
+    """Collects page metadata from a stream of HTML"""
+
+    def __init__(self, base_url: str, head_only: bool = False, collect_text: bool = True,
+                 links_only: bool = False):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.host = urlparse(base_url).netloc
+        self.head_only = head_only
+        # links_only: just the same-domain links, for the crawl frontier
+        self.links_only = links_only and not head_only
+        self.collect_text = collect_text and not head_only and not links_only
+
+        self.title_parts: List[str] = []
+        self.title_state = 'before'  # before -> inside -> done
+        self.meta: Dict[str, str] = {}
+        self.description: Optional[str] = None
+        self.canonical = ''
+        self.links: Dict[str, None] = {}  # insertion-ordered sets
+        self.images: Dict[str, None] = {}
+        self.og_images: List[str] = []
+
+        # Element stack for content capture; captures are (matcher index, stack depth, strings)
+        self.stack: List[str] = []
+        self.skipping = 0
+        # Text since the last tag; incremental feeds can split it across handle_data calls
+        self.pending: List[str] = []
+        self.strings: List[str] = []
+        self.captures: Dict[int, List] = {}
+        self.open_captures: List[List] = []
+
+    def handle_starttag(self, tag, attr_list):
+        self._flush_text()
+        attrs = dict(attr_list)
+        if self.links_only:
+            self._link(tag, attrs)
+            return
+        if tag == 'title' and self.title_state == 'before':
+            self.title_state = 'inside'
+        elif tag == 'meta':
+            self._meta(attrs)
+        elif tag == 'link' and attrs.get('href') and 'canonical' in (attrs.get('rel') or '').lower().split():
+            self.canonical = self.canonical or urljoin(self.base_url, attrs['href'])
+        elif tag == 'body' and self.head_only:
+            raise StopScan()
+
+        if self.head_only:
+            return
+        self._link(tag, attrs)
+        if tag in ('img', 'source'):
+            refs = [attrs['src']] if attrs.get('src') else []
+            refs += [candidate.split()[0] for candidate in (attrs.get('srcset') or '').split(',')
+                     if candidate.strip()]
+            for ref in refs:
+                self.images[urljoin(self.base_url, ref)] = None
+
+        if tag in VOID_ELEMENTS:
+            return
+        self.stack.append(tag)
+        if tag in SKIPPED_ELEMENTS:
+            self.skipping += 1
+        if self.collect_text:
+            for index, matches in enumerate(CONTENT_MATCHERS):
+                if index not in self.captures and matches(tag, attrs):
+                    capture = [index, len(self.stack), []]
+                    self.captures[index] = capture
+                    self.open_captures.append(capture)
+
+    def handle_startendtag(self, tag, attr_list):
+        # <div/> opens and closes; void elements were never pushed
+        self.handle_starttag(tag, attr_list)
+        if tag not in VOID_ELEMENTS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        self._flush_text()
+        if tag == 'title' and self.title_state == 'inside':
+            self.title_state = 'done'
+        elif tag == 'head' and self.head_only:
+            raise StopScan()
+        if tag not in self.stack:
+            return
+        # Close the element and anything left open inside it
+        while self.stack:
+            closed = self.stack.pop()
+            if closed in SKIPPED_ELEMENTS:
+                self.skipping -= 1
+            if closed == tag:
+                break
+        self.open_captures = [c for c in self.open_captures if c[1] <= len(self.stack)]
+
+    def handle_data(self, data):
+        if self.title_state == 'inside':
+            self.title_parts.append(data)
+        if self.collect_text and not self.skipping:
+            self.pending.append(data)
+
+    def _flush_text(self):
+        """Record the text run that ended at a tag (or at the end of the page)"""
+        if not self.pending:
+            return
+        text = ''.join(self.pending).strip()
+        self.pending = []
+        if text:
+            self.strings.append(text)
+            for capture in self.open_captures:
+                capture[2].append(text)
+
+    def close(self):
+        super().close()
+        self._flush_text()
+
+    def _link(self, tag: str, attrs: Dict):
+        if tag == 'a' and attrs.get('href') is not None:
+            link = urljoin(self.base_url, attrs['href'])
+            # Only links on the same domain, like page_extractors.extract_links
+            if urlparse(link).netloc == self.host:
+                self.links[link] = None
+
+    def _meta(self, attrs: Dict):
+        content = attrs.get('content')
+        if attrs.get('name') == 'description' and self.description is None:
+            self.description = content or ''
+        key = attrs.get('property') or attrs.get('name')
+        if key and content is not None:
+            self.meta.setdefault(key, content)
+            if key == 'og:image' and not self.head_only:
+                self.og_images.append(urljoin(self.base_url, content))
+
+    @property
+    def title(self) -> str:
+        return ''.join(self.title_parts).strip()
+
+    @property
+    def text(self) -> str:
+        """Text of the first matching content area, else of the whole page"""
+        if self.captures:
+            strings = self.captures[min(self.captures)][2]
+            if strings:
+                return '\n'.join(strings)
+        return '\n'.join(self.strings)
+
+    def result(self) -> Dict:
+        """Everything collected so far"""
+        images = dict(self.images)
+        for image in self.og_images:
+            images.setdefault(image, None)
+        result = {
+            'url': self.base_url,
+            'title': self.title,
+            'description': self.description or '',
+            'canonical': self.canonical,
+            'meta': self.meta,
+        }
+        if not self.head_only:
+            result['links'] = list(self.links)
+            result['images'] = list(images)
+        if self.collect_text:
+            result['text'] = self.text
+        return result
+
+
+def scan_page(html: str, url: str, head_only: bool = False, collect_text: bool = True) -> Dict:
+    """Scan a whole page in one pass (head_only: stop once the <head> is done)"""
+    scanner = PageScanner(url, head_only=head_only, collect_text=collect_text)
+    try:
+        scanner.feed(html)
+        scanner.close()
+    except StopScan:
+        pass
+    return scanner.result()
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Shared HTTP transport for the scrapers
+- One pooled session per configuration, reused across hosts and threads (keep-alive)
+- Configurable pool size; optional HTTP/2 when httpx[http2] is installed
+- Advertises every content encoding this install can decode (brotli/zstd when available)
+- Per-request headers only: the shared session is never mutated
+- Streamed bodies with a size cap; TTFB/download timings and byte counters
+- stream() hands out the body chunks so callers can write them to disk as they arrive
+- DNS/connect timing through the transport's own connection classes (urllib3 itself is not patched)
+"""
+
+import socket
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+from urllib3.util.request import ACCEPT_ENCODING
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+from rate_limiter import PERMANENT
+from scrape_metrics import metrics
+
+DEFAULT_HEADERS = {
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+    # urllib3 lists br and zstd only when brotli/zstandard are installed
+    'Accept-Encoding': ACCEPT_ENCODING.replace(',', ', '),
+    'Upgrade-Insecure-Requests': '1',
+}
+CHUNK_SIZE = 64 * 1024
+MAX_BODY_BYTES = 20 * 1024 * 1024
+
+
+class ResponseTooLarge(requests.exceptions.RequestException):
+    """The body exceeded the transport's size cap"""
+    # Retrying will not make the page smaller (see rate_limiter.classify_failure)
+    failure = PERMANENT
+
+
+class _TimedConnectionMixin:
+    """Time DNS resolution and TCP connect for every new connection"""
+
+    def _new_conn(self):
+        with metrics.span('dns'):
+            try:
+                addresses = socket.getaddrinfo(self._dns_host, self.port, 0, socket.SOCK_STREAM)
+            except socket.gaierror:
+                addresses = []
+        if not addresses:
+            # Let urllib3 raise its usual resolution error
+            return super()._new_conn()
+
+        # Connect to the resolved addresses; TLS still uses self.host for SNI and verification
+        metrics.incr('connections_opened')
+        host = self._dns_host
+        error = None
+        with metrics.span('connect'):
+            try:
+                for _, _, _, _, sockaddr in addresses:
+                    self._dns_host = sockaddr[0]
+                    try:
+                        return super()._new_conn()
+                    except (NewConnectionError, ConnectTimeoutError) as e:
+                        error = e
+            finally:
+                self._dns_host = host
+        raise error
+
+
+class TimedHTTPConnection(_TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(_TimedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose connection pools time DNS and connect"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': TimedHTTPConnectionPool,
+            'https': TimedHTTPSConnectionPool,
+        }
+
+
+class HTTPTransport:
+    """Pooled HTTP client shared by the scrapers"""
+
+    def __init__(self, pool_size: int = 10, pool_hosts: int = 32, http2: bool = False,
+                 max_body_bytes: int = MAX_BODY_BYTES):
+        self.pool_size = pool_size
+        self.max_body_bytes = max_body_bytes
+        self.http2 = http2
+        if http2:
+            if httpx is None:
+                raise RuntimeError("HTTP/2 needs the httpx package (pip install 'httpx[http2]')")
+            self.client = httpx.Client(
+                http2=True,
+                headers={k: v for k, v in DEFAULT_HEADERS.items() if k != 'Accept-Encoding'},
+                limits=httpx.Limits(max_connections=pool_size * pool_hosts,
+                                    max_keepalive_connections=pool_size * pool_hosts),
+            )
+        else:
+            self.session = requests.Session()
+            self.session.headers.update(DEFAULT_HEADERS)
+            # Keep-alive pools for up to pool_hosts hosts, pool_size connections each
+            adapter = TimedHTTPAdapter(pool_connections=pool_hosts, pool_maxsize=pool_size)
+            self.session.mount('http://', adapter)
+            self.session.mount('https://', adapter)
+
+    def _capped(self, chunks, url: str) -> Iterator[bytes]:
+        """Pass body chunks through, enforcing the size cap"""
+        size = 0
+        for chunk in chunks:
+            size += len(chunk)
+            if size > self.max_body_bytes:
+                raise ResponseTooLarge(f"Body of {url} exceeds {self.max_body_bytes} bytes")
+            metrics.incr('bytes_downloaded', len(chunk))
+            yield chunk
+
+    def get(self, url: str, headers: Optional[Dict[str, str]] = None, timeout: float = 30) -> requests.Response:
+        """GET a URL with per-request headers; the body is fully read (decoded) before returning"""
+        with self.stream(url, headers=headers, timeout=timeout) as (response, chunks):
+            with metrics.span('download'):
+                response._content = b''.join(chunks)
+        return response
+
+    @contextmanager
+    def stream(self, url: str, headers: Optional[Dict[str, str]] = None, timeout: float = 30):
+        """Open a GET without reading the body; yields (response, size-capped decoded body chunks)"""
+        if self.http2:
+            with self._stream_http2(url, headers, timeout) as opened:
+                yield opened
+            return
+
+        with metrics.span('ttfb'):
+            response = self.session.get(url, headers=headers, timeout=timeout, stream=True)
+        try:
+            yield response, self._capped(response.iter_content(CHUNK_SIZE), url)
+        finally:
+            response.close()
+            # Bytes on the wire, before content decoding
+            metrics.incr('bytes_transferred', response.raw.tell())
+
+    @contextmanager
+    def _stream_http2(self, url: str, headers: Optional[Dict[str, str]], timeout: float):
+        """Stream over httpx, exposed as a requests.Response so callers see one interface"""
+        started = time.perf_counter()
+        try:
+            with self.client.stream('GET', url, headers=headers, timeout=timeout) as upstream:
+                metrics.observe('ttfb', time.perf_counter() - started)
+                metrics.incr(f"responses_{upstream.http_version.replace('/', '').replace('.', '_').lower()}")
+                response = requests.Response()
+                response.status_code = upstream.status_code
+                response.reason = upstream.reason_phrase
+                response.url = str(upstream.url)
+                # httpx decodes the content encoding itself
+                response.headers = CaseInsensitiveDict(
+                    (k, v) for k, v in upstream.headers.items() if k.lower() != 'content-encoding')
+                response.encoding = get_encoding_from_headers(response.headers)
+                yield response, self._capped(upstream.iter_bytes(CHUNK_SIZE), url)
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(str(e)) from e
+        except httpx.TransportError as e:
+            raise requests.exceptions.ConnectionError(str(e)) from e
+
+    def close(self):
+        if self.http2:
+            self.client.close()
+        else:
+            self.session.close()
+
+
+_shared: Dict[tuple, HTTPTransport] = {}
+_shared_lock = threading.Lock()
+
+
+def shared_transport(pool_size: int = 10, http2: bool = False, max_body_bytes: int = MAX_BODY_BYTES) -> HTTPTransport:
+    """Process-wide transport per configuration, so every scraper reuses the same connections"""
+    key = (pool_size, http2, max_body_bytes)
+    with _shared_lock:
+        if key not in _shared:
+            _shared[key] = HTTPTransport(pool_size=pool_size, http2=http2, max_body_bytes=max_body_bytes)
+        return _shared[key]
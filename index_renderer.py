@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Index page renderer
+- Handlebars-style template ({{VAR}}, {{#each list}}...{{/each}}) compiled once per file version
+- Values are HTML-escaped when rendered
+- Only the first page of cards is rendered into index.html; the rest ship as JSON chunks
+  (index/manifest.json + index/pages-N.json) that the page loads as the reader scrolls
+"""
+
+import json
+import os
+import re
+from html import escape
+from typing import Dict, List, Tuple
+from urllib.parse import urlparse
+
+INDEX_DIR = 'index'
+# Cards rendered into index.html itself (also what readers without JavaScript see)
+FIRST_PAGE_SIZE = 50
+# Entries per lazily loaded chunk
+CHUNK_SIZE = 200
+DEFAULT_SITE_NAME = "Melissa's Kajabi Backup"
+DEFAULT_SITE_URL = 'https://melissakajabi.respira.live'
+
+EACH_BLOCK = re.compile(r'\{\{#each (\w+)\}\}(.*?)\{\{/each\}\}', re.DOTALL)
+VARIABLE = re.compile(r'\{\{(\w+)\}\}')
+
+
+class CompiledTemplate:
+    """A template split into literal text, variables and each-blocks"""
+
+    def __init__(self, source: str):
+        self.parts = self._compile(source)
+
+    def _compile(self, source: str) -> List[Tuple]:
+        parts = []
+        last = 0
+        for block in EACH_BLOCK.finditer(source):
+            parts += self._compile_variables(source[last:block.start()])
+            parts.append(('each', block.group(1), self._compile_variables(block.group(2))))
+            last = block.end()
+        parts += self._compile_variables(source[last:])
+        return parts
+
+    @staticmethod
+    def _compile_variables(source: str) -> List[Tuple]:
+        parts = []
+        last = 0
+        for variable in VARIABLE.finditer(source):
+            parts.append(('text', source[last:variable.start()]))
+            parts.append(('var', variable.group(1)))
+            last = variable.end()
+        parts.append(('text', source[last:]))
+        return parts
+
+    @staticmethod
+    def _render_parts(parts: List[Tuple], context: Dict, out: List[str]):
+        for part in parts:
+            if part[0] == 'text':
+                out.append(part[1])
+            elif part[0] == 'var':
+                out.append(escape(str(context.get(part[1], ''))))
+
+    def render(self, context: Dict) -> str:
+        """Render with a context; each-blocks iterate over lists of dicts"""
+        out = []
+        for part in self.parts:
+            if part[0] == 'each':
+                for item in context.get(part[1], []):
+                    self._render_parts(part[2], item, out)
+            else:
+                self._render_parts([part], context, out)
+        return ''.join(out)
+
+
+_compiled: Dict[str, Tuple[float, CompiledTemplate]] = {}
+
+
+def load_template(path: str) -> CompiledTemplate:
+    """Compile a template file, reusing the compiled form until the file changes"""
+    mtime = os.path.getmtime(path)
+    cached = _compiled.get(path)
+    if cached is None or cached[0] != mtime:
+        with open(path, 'r') as f:
+            cached = (mtime, CompiledTemplate(f.read()))
+        _compiled[path] = cached
+    return cached[1]
+
+
+def render_index(template: CompiledTemplate, entries: List[Tuple[str, str, str]], last_updated: str,
+                 site_name: str = DEFAULT_SITE_NAME, site_url: str = DEFAULT_SITE_URL) -> Dict[str, str]:
+    """Render index.html and its JSON chunks from (title, url, filename) entries; returns path -> content"""
+    rest = entries[FIRST_PAGE_SIZE:]
+    chunks = [rest[i:i + CHUNK_SIZE] for i in range(0, len(rest), CHUNK_SIZE)]
+    compact = {'separators': (',', ':'), 'ensure_ascii': False}
+
+    files = {
+        'index.html': template.render({
+            'pages': [{'title': title, 'url': url, 'href': filename}
+                      for title, url, filename in entries[:FIRST_PAGE_SIZE]],
+            'TOTAL_PAGES': len(entries),
+            'RENDERED_PAGES': min(len(entries), FIRST_PAGE_SIZE),
+            'INDEX_MANIFEST': f"{INDEX_DIR}/manifest.json",
+            'LAST_UPDATED': last_updated.split('T')[0],
+            'TIMESTAMP': last_updated,
+            'SITE_NAME': site_name,
+            'SITE_URL': site_url,
+            'SITE_HOST': urlparse(site_url).netloc or site_url,
+        }),
+        f"{INDEX_DIR}/manifest.json": json.dumps({
+            'total': len(entries),
+            'rendered': min(len(entries), FIRST_PAGE_SIZE),
+            'chunks': [f"{INDEX_DIR}/pages-{number}.json" for number in range(len(chunks))],
+        }, **compact),
+    }
+    for number, chunk in enumerate(chunks):
+        files[f"{INDEX_DIR}/pages-{number}.json"] = json.dumps([list(entry) for entry in chunk], **compact)
+    return files
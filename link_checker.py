@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+Internal links and link integrity for the generated site
+- URL -> local file map from the shared url_to_filename logic
+- Rewrites links between backed-up pages to the local .html files in one regex pass per page
+- Checks the built pages in the output directory: relative links and assets must exist in
+  the output tree, other targets are checked concurrently (HTTP, per-host rate limited);
+  targets that are backed up or mirrored locally need no request
+- Per-page link lists and per-URL results are cached, so unchanged pages are not re-scanned
+  and a URL is only re-checked once its result is older than the TTL
+- Report of broken links and of internal pages missing from the backup
+"""
+
+import argparse
+import logging
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from html import unescape
+from typing import Dict, Iterable, Iterator, List, Optional
+from urllib.parse import unquote, urljoin, urlparse
+
+import requests
+
+from asset_store import AssetStore
+from http_transport import shared_transport
+from mirror_assets import ASSET_DIR, ASSET_HEADERS, find_subresources
+from rate_limiter import HostRateLimiter
+from results_reader import iter_results
+from results_store import load_json, write_json_atomic
+from revalidation import content_hash
+from scrape_metrics import metrics
+from url_utils import normalize_url, url_to_filename
+
+logger = logging.getLogger(__name__)
+
+CACHE_FILE = '.link_check_cache.json'
+REPORT_FILE = 'link_report.json'
+CACHE_VERSION = 2
+# Built pages are read as if served from this origin (reserved, never resolvable), so
+# relative and root-relative references resolve to paths in the output tree
+OUTPUT_ORIGIN = 'https://output.invalid'
+# Link results younger than this are reused
+CHECK_TTL = 7 * 24 * 3600
+CHECK_TIMEOUT = 15
+# Entries per list printed to the console (the report has all of them)
+PRINT_LIMIT = 20
+
+ANCHOR_PATTERN = re.compile(r'(<a\b[^>]*?\bhref\s*=\s*)(["\'])(.*?)\2', re.IGNORECASE | re.DOTALL)
+
+
+def _link_target(ref: str, page_url: str) -> Optional[str]:
+    """Absolute http(s) URL of a link (fragment kept), or None for fragments, mailto: and the like"""
+    ref = unescape(ref).strip()
+    if not ref or ref.startswith('#'):
+        return None
+    url = urljoin(page_url, ref)
+    return url if urlparse(url).scheme in ('http', 'https') else None
+
+
+def find_links(html: str, page_url: str) -> List[str]:
+    """Absolute URLs of the pages a page links to, without fragments"""
+    links = {}
+    for m in ANCHOR_PATTERN.finditer(html):
+        url = _link_target(m.group(3), page_url)
+        if url:
+            links[url.split('#')[0]] = None
+    return list(links)
+
+
+class LinkMap:
+    """Backed-up page URLs and the local files they are stored as
+
+    Like url_to_filename, pages are keyed by path: the same page linked through any of
+    the site's hosts (the scraped hosts plus extra_hosts, e.g. a custom domain) is local.
+    """
+
+    def __init__(self, urls: Iterable[str], extra_hosts: Iterable[str] = ()):
+        self.files: Dict[str, str] = {}
+        self.hosts = {host.lower() for host in extra_hosts}
+        for url in urls:
+            parsed = urlparse(normalize_url(url))
+            self.hosts.add(parsed.netloc)
+            self.files[self._key(parsed)] = url_to_filename(url)
+
+    @staticmethod
+    def _key(parsed) -> str:
+        return f"{parsed.path}?{parsed.query}" if parsed.query else parsed.path
+
+    def lookup(self, url: str) -> Optional[str]:
+        """Local file for a page URL (query strings fall back to the plain page)"""
+        parsed = urlparse(normalize_url(url))
+        if parsed.netloc not in self.hosts:
+            return None
+        return self.files.get(self._key(parsed)) or self.files.get(parsed.path)
+
+    def is_internal(self, url: str) -> bool:
+        return urlparse(normalize_url(url)).netloc in self.hosts
+
+    def rewrite(self, html: str, page_url: str) -> str:
+        """Point links to backed-up pages at their local files"""
+        def replace(m):
+            url = _link_target(m.group(3), page_url)
+            if not url:
+                return m.group(0)
+            base, _, fragment = url.partition('#')
+            filename = self.lookup(base)
+            if not filename:
+                return m.group(0)
+            metrics.incr('links_rewritten')
+            return f"{m.group(1)}{m.group(2)}{filename}{'#' + fragment if fragment else ''}{m.group(2)}"
+
+        with metrics.span('link_rewrite'):
+            return ANCHOR_PATTERN.sub(replace, html)
+
+
+def output_url(path: str) -> str:
+    """URL of a file in the output tree (path relative to the output directory, with /)"""
+    return f"{OUTPUT_ORIGIN}/{path}"
+
+
+def output_path(url: str) -> Optional[str]:
+    """Path in the output tree of an output URL (directories mean their index.html), else None"""
+    parsed = urlparse(url)
+    if f"{parsed.scheme}://{parsed.netloc}" != OUTPUT_ORIGIN:
+        return None
+    path = unquote(parsed.path).lstrip('/')
+    return path + 'index.html' if not path or path.endswith('/') else path
+
+
+def built_pages(output_dir: str = '.', results_file: str = 'scraper_results.json') -> Iterator[Dict]:
+    """The pages the build wrote for the results, plus index.html, as page records addressed
+    by their output URL (other *.html files, such as the index template, are not pages)"""
+    names = {url_to_filename(page['url']) for page in iter_results(results_file)}
+    names.add('index.html')
+    for name in sorted(names):
+        path = os.path.join(output_dir, name)
+        if os.path.isfile(path):
+            with open(path, 'r', encoding='utf-8', errors='replace') as f:
+                yield {'url': output_url(name), 'html_content': f.read()}
+
+
+class LinkChecker:
+    """Check the link and asset targets of every page, with a cache across runs
+
+    Targets in the output tree (see output_url) are checked against the files in output_dir.
+    """
+
+    def __init__(self, link_map: LinkMap, store: Optional[AssetStore] = None, cache_file: str = CACHE_FILE,
+                 workers: int = 16, ttl: float = CHECK_TTL, host_rate: float = 2.0, output_dir: str = '.'):
+        self.link_map = link_map
+        self.store = store
+        self.output_dir = output_dir
+        self.cache_file = cache_file
+        self.workers = workers
+        self.ttl = ttl
+        self.limiter = HostRateLimiter(host_rate, burst=workers)
+        self.transport = shared_transport(pool_size=workers)
+        cache = load_json(cache_file, {})
+        if cache.get('version') != CACHE_VERSION:
+            cache = {}
+        # page URL -> content hash and the targets found in it; target URL -> last check
+        self.pages: Dict[str, Dict] = cache.get('pages', {})
+        self.urls: Dict[str, Dict] = cache.get('urls', {})
+        self.stats = {'pages_scanned': 0, 'pages_cached': 0, 'checked': 0, 'cached': 0, 'local': 0,
+                      'missing': 0}
+
+    def scan(self, pages: Iterable[Dict]) -> Dict[str, Dict]:
+        """Link and asset targets of every page, reusing the lists of unchanged pages"""
+        scanned = {}
+        for page in pages:
+            url = page['url']
+            digest = page.get('content_hash') or content_hash(page['html_content'])
+            cached = self.pages.get(url)
+            if cached and cached['hash'] == digest:
+                self.stats['pages_cached'] += 1
+                scanned[url] = cached
+                continue
+            with metrics.span('link_scan'):
+                scanned[url] = {
+                    'hash': digest,
+                    'links': find_links(page['html_content'], url),
+                    'assets': sorted(find_subresources(page['html_content'], url)),
+                }
+            self.stats['pages_scanned'] += 1
+        # Pages no longer in the results drop out of the cache
+        self.pages = scanned
+        return scanned
+
+    def _is_local(self, url: str, kind: str) -> bool:
+        path = output_path(url)
+        if path is not None:
+            return os.path.isfile(os.path.join(self.output_dir, path))
+        if kind == 'link':
+            return self.link_map.lookup(url) is not None
+        return bool(self.store and self.store.lookup(url))
+
+    def _check(self, url: str) -> Dict:
+        """Request a URL without reading its body (runs in the thread pool)"""
+        self.limiter.wait(url)
+        result = {'checked_at': time.time(), 'status': None, 'error': None}
+        try:
+            with metrics.span('link_check'):
+                with self.transport.stream(url, headers=ASSET_HEADERS, timeout=CHECK_TIMEOUT) as (response, _):
+                    result['status'] = response.status_code
+        except requests.exceptions.RequestException as e:
+            result['error'] = f"{type(e).__name__}: {e}"
+        return result
+
+    def check(self, pages: Iterable[Dict]) -> Dict:
+        """Check every target and return the report"""
+        scanned = self.scan(pages)
+        # target -> kind and the pages referencing it
+        targets: Dict[str, Dict] = {}
+        references = 0
+        for page_url, entry in scanned.items():
+            for kind in ('links', 'assets'):
+                for url in entry[kind]:
+                    target = targets.setdefault(url, {'kind': kind[:-1], 'pages': []})
+                    target['pages'].append(output_path(page_url) or url_to_filename(page_url))
+                    references += 1
+
+        now = time.time()
+        todo = []
+        for url, target in targets.items():
+            target['local'] = self._is_local(url, target['kind'])
+            if target['local']:
+                self.stats['local'] += 1
+                continue
+            if output_path(url) is not None:
+                # Nothing to request: the file is simply not in the output
+                self.stats['missing'] += 1
+                continue
+            cached = self.urls.get(url)
+            # Network errors are retried on the next run; HTTP answers are kept for the TTL
+            if cached and cached['status'] and now - cached['checked_at'] < self.ttl:
+                self.stats['cached'] += 1
+                continue
+            todo.append(url)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for url, result in zip(todo, executor.map(self._check, todo)):
+                self.urls[url] = result
+                self.stats['checked'] += 1
+        # Forget URLs nothing links to any more
+        self.urls = {url: result for url, result in self.urls.items() if url in targets}
+        write_json_atomic(self.cache_file, {'version': CACHE_VERSION, 'pages': self.pages, 'urls': self.urls},
+                          indent=None)
+        return self._report(targets, references)
+
+    def _report(self, targets: Dict[str, Dict], references: int) -> Dict:
+        broken = []
+        missing = []
+        for url, target in sorted(targets.items()):
+            if target['local']:
+                continue
+            path = output_path(url)
+            if path is not None:
+                broken.append({'url': path, 'kind': target['kind'], 'status': None,
+                               'error': 'Missing from the build output', 'pages': sorted(set(target['pages'])),
+                               'internal': True})
+                continue
+            result = self.urls.get(url, {})
+            entry = {'url': url, 'kind': target['kind'], 'status': result.get('status'),
+                     'error': result.get('error'), 'pages': sorted(set(target['pages']))}
+            if result.get('error') or (result.get('status') or 0) >= 400:
+                entry['internal'] = target['kind'] == 'link' and self.link_map.is_internal(url)
+                broken.append(entry)
+            elif target['kind'] == 'link' and self.link_map.is_internal(url):
+                # Live, but links to it leave the backup
+                missing.append(entry)
+        return {
+            'checked_at': datetime.now().isoformat(),
+            'pages': len(self.pages),
+            'references': references,
+            'targets': len(targets),
+            'stats': dict(self.stats),
+            'broken': broken,
+            'not_backed_up': missing,
+        }
+
+
+def check_site(results_file: str = 'scraper_results.json', output_dir: str = '.', workers: int = 16,
+               ttl: float = CHECK_TTL, extra_hosts: Iterable[str] = ()) -> Dict:
+    """Check the links and assets of every built page in output_dir and write the report
+
+    The results only tell which live URLs are backed up; the pages checked are the built files.
+    """
+    link_map = LinkMap((page['url'] for page in iter_results(results_file)), extra_hosts)
+    asset_dir = os.path.join(output_dir, ASSET_DIR)
+    store = AssetStore(asset_dir) if os.path.isdir(asset_dir) else None
+    checker = LinkChecker(link_map, store, cache_file=os.path.join(output_dir, CACHE_FILE), workers=workers,
+                          ttl=ttl, output_dir=output_dir)
+    with metrics.span('link_check_stage'):
+        report = checker.check(built_pages(output_dir, results_file))
+    write_json_atomic(os.path.join(output_dir, REPORT_FILE), report)
+    return report
+
+
+def print_report(report: Dict):
+    """Print the link check summary"""
+    stats = report['stats']
+    print(f"🔗 Checked {report['references']} links and assets ({report['targets']} targets) "
+          f"on {report['pages']} pages")
+    print(f"   - Local (in the output, backed up or mirrored): {stats['local']}")
+    print(f"   - Missing from the output: {stats['missing']}")
+    print(f"   - Requested: {stats['checked']} ({stats['cached']} cached results reused)")
+    print(f"   - Pages rescanned: {stats['pages_scanned']} ({stats['pages_cached']} unchanged)")
+    print(f"   - Broken: {len(report['broken'])}")
+    for entry in report['broken'][:PRINT_LIMIT]:
+        # Exception name only; the full message is in the report
+        problem = entry['error'].split(':')[0] if entry['error'] else f"HTTP {entry['status']}"
+        print(f"     ❌ {entry['url']} ({problem}) on {', '.join(entry['pages'][:3])}"
+              f"{' ...' if len(entry['pages']) > 3 else ''}")
+    print(f"   - Internal pages missing from the backup: {len(report['not_backed_up'])}")
+    for entry in report['not_backed_up'][:PRINT_LIMIT]:
+        print(f"     ⚠️  {entry['url']} on {', '.join(entry['pages'][:3])}")
+    hidden = max(len(report['broken']), len(report['not_backed_up'])) - PRINT_LIMIT
+    if hidden > 0:
+        print(f"     ... see the report for the rest")
+    print(f"   - Report: {REPORT_FILE}")
+
+
+def main():
+    """Check every link and asset of the built pages"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Check the links and assets of the built pages")
+    parser.add_argument('--results-file', default='scraper_results.json')
+    parser.add_argument('--workers', type=int, default=16, help="Concurrent checks")
+    parser.add_argument('--ttl-hours', type=float, default=CHECK_TTL / 3600,
+                        help="Reuse link results younger than this")
+    parser.add_argument('--internal-host', action='append', default=[],
+                        help="Another host serving the same site, e.g. a custom domain (repeatable)")
+    args = parser.parse_args()
+
+    report = check_site(args.results_file, workers=args.workers, ttl=args.ttl_hours * 3600,
+                        extra_hosts=args.internal_host)
+    print_report(report)
+
+
+if __name__ == "__main__":
+    main()
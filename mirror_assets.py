@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""
+Mirror page subresources into assets/ so the backup is self-contained
+- Finds img/srcset, stylesheet/icon/preload links, scripts, og:image and CSS url() references
+- Downloads them concurrently into the content-addressed asset store
+- Stylesheets are mirrored recursively (fonts and images they reference)
+- Rewrites HTML to local assets/ paths in one regex pass per page
+"""
+
+import argparse
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+from html import unescape
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from urllib.parse import quote, urljoin, urlparse
+
+import requests
+
+from asset_store import AssetStore
+from http_transport import HTTPTransport, shared_transport
+from results_reader import iter_results
+from scrape_metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+ASSET_DIR = 'assets'
+ASSET_MAX_BYTES = 200 * 1024 * 1024
+ASSET_HEADERS = {
+    # A current browser UA, so font CSS (e.g. Google Fonts) serves woff2
+    'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': '*/*',
+}
+
+# Tags that can load subresources, and the link rels that do
+TAG_PATTERN = re.compile(r'<(img|source|link|script|meta|video|audio|input)\b[^>]*>', re.IGNORECASE)
+ATTR_PATTERN = re.compile(r'([\w:-]+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\')', re.DOTALL)
+STYLE_BLOCK_PATTERN = re.compile(r'<style\b[^>]*>(.*?)</style>', re.IGNORECASE | re.DOTALL)
+STYLE_ATTR_PATTERN = re.compile(r'\bstyle\s*=\s*(?:"([^"]*)"|\'([^\']*)\')', re.IGNORECASE)
+CSS_URL_PATTERN = re.compile(r'url\(\s*([\'"]?)([^\'")]+)\1\s*\)', re.IGNORECASE)
+CSS_IMPORT_PATTERN = re.compile(r'@import\s+([\'"])([^\'"]+)\1', re.IGNORECASE)
+
+ASSET_LINK_RELS = {'stylesheet', 'icon', 'shortcut', 'apple-touch-icon', 'preload', 'modulepreload',
+                   'mask-icon', 'manifest'}
+IMAGE_META = {'og:image', 'og:image:url', 'og:image:secure_url', 'twitter:image'}
+
+# Any quoted attribute value or CSS url(); the rewrite pass looks each one up
+REWRITE_PATTERN = re.compile(
+    r'(?P<attr>\b(?:src|href|srcset|content|poster|data-src|data-srcset)\s*=\s*)(?P<q>["\'])(?P<value>.*?)(?P=q)'
+    r'|(?P<css>url\(\s*)(?P<cq>[\'"]?)(?P<url>[^\'")]+)(?P=cq)(?P<end>\s*\))',
+    re.IGNORECASE | re.DOTALL,
+)
+
+
+def _unescape(value: str) -> str:
+    """Undo HTML escaping (&amp; in query strings, &quot; around url() in style attributes)"""
+    return unescape(value).strip()
+
+
+def _absolute(ref: str, base_url: str) -> Optional[str]:
+    """Absolute http(s) URL for a reference, or None for data:, fragments and the like"""
+    # Quotes left from an escaped url(&quot;...&quot;)
+    ref = _unescape(ref).strip('\'"')
+    if not ref or ref.startswith(('data:', '#', 'javascript:', 'mailto:', 'about:', 'blob:')):
+        return None
+    url = urljoin(base_url, ref).split('#')[0]
+    return url if urlparse(url).scheme in ('http', 'https') else None
+
+
+def _srcset_urls(srcset: str) -> List[str]:
+    """URLs of the candidates in a srcset"""
+    return [candidate.split()[0] for candidate in _unescape(srcset).split(',') if candidate.strip()]
+
+
+def css_references(css: str) -> List[str]:
+    """url() and @import references in a stylesheet"""
+    refs = [m.group(2) for m in CSS_URL_PATTERN.finditer(css)]
+    refs += [m.group(2) for m in CSS_IMPORT_PATTERN.finditer(css)]
+    return refs
+
+
+def find_subresources(html: str, page_url: str) -> Set[str]:
+    """Absolute URLs of everything a page loads (not the pages it links to)"""
+    refs = []
+    for tag in TAG_PATTERN.finditer(html):
+        name = tag.group(1).lower()
+        attrs = {m.group(1).lower(): m.group(2) if m.group(2) is not None else m.group(3)
+                 for m in ATTR_PATTERN.finditer(tag.group(0))}
+        if name in ('img', 'source', 'video', 'audio', 'input', 'script'):
+            refs += [attrs[key] for key in ('src', 'data-src', 'poster') if attrs.get(key)]
+            for key in ('srcset', 'data-srcset'):
+                if attrs.get(key):
+                    refs += _srcset_urls(attrs[key])
+        elif name == 'link':
+            rels = set((attrs.get('rel') or '').lower().split())
+            if rels & ASSET_LINK_RELS and attrs.get('href'):
+                refs.append(attrs['href'])
+        elif name == 'meta':
+            key = (attrs.get('property') or attrs.get('name') or '').lower()
+            if key in IMAGE_META and attrs.get('content'):
+                refs.append(attrs['content'])
+
+    for block in STYLE_BLOCK_PATTERN.finditer(html):
+        refs += css_references(block.group(1))
+    for style in STYLE_ATTR_PATTERN.finditer(html):
+        refs += css_references(_unescape(style.group(1) or style.group(2) or ''))
+
+    return {url for url in (_absolute(ref, page_url) for ref in refs) if url}
+
+
+def asset_transport(pool_size: int = 8) -> HTTPTransport:
+    """Shared transport for asset downloads; assets (videos, large images) get a higher body
+    cap than pages"""
+    return shared_transport(pool_size=pool_size, max_body_bytes=ASSET_MAX_BYTES)
+
+
+def _is_stylesheet(url: str, content_type: str) -> bool:
+    return 'text/css' in content_type or urlparse(url).path.endswith('.css')
+
+
+class AssetMirror:
+    """Download page subresources into the asset store and rewrite pages to use them"""
+
+    def __init__(self, store: Optional[AssetStore] = None, workers: int = 8, timeout: int = 30, transport=None):
+        self.store = store or AssetStore(ASSET_DIR)
+        self.workers = workers
+        self.timeout = timeout
+        # Anything with HTTPTransport.get, e.g. backup_sites.CappedTransport
+        self.transport = transport or asset_transport(workers)
+        self.stats = {'downloaded': 0, 'cached': 0, 'failed': 0}
+        # Stylesheets waiting for the files they reference
+        self.pending_css: Dict[str, Tuple[str, str]] = {}
+
+    def _download(self, url: str) -> Optional[requests.Response]:
+        """Fetch one asset (runs in the thread pool)"""
+        try:
+            with metrics.span('asset_download'):
+                response = self.transport.get(url, headers=ASSET_HEADERS, timeout=self.timeout)
+            response.raise_for_status()
+            return response
+        except requests.exceptions.RequestException as e:
+            logger.warning(f"Failed to download asset {url}: {e}")
+            return None
+
+    def _store(self, url: str, response: requests.Response) -> List[str]:
+        """Store a downloaded asset, returning the URLs a stylesheet references"""
+        content_type = response.headers.get('Content-Type', '')
+        if _is_stylesheet(url, content_type):
+            # Stored by mirror() once the files it references are in the store
+            css = response.text
+            self.pending_css[url] = (css, content_type)
+            return [ref for ref in (_absolute(ref, url) for ref in css_references(css)) if ref]
+        self.store.put(url, response.content, content_type)
+        metrics.incr('asset_bytes_downloaded', len(response.content))
+        return []
+
+    def mirror(self, urls: Iterable[str]) -> Dict[str, str]:
+        """Download every URL not yet in the store, returning URL -> local filename"""
+        todo = {url for url in urls if not self.store.lookup(url)}
+        seen = set(todo)
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            # Stylesheets add rounds of fonts and images they reference
+            while todo:
+                round_urls = sorted(todo)
+                todo = set()
+                # Downloads run in the pool; storing stays on this thread
+                for url, response in zip(round_urls, executor.map(self._download, round_urls)):
+                    if response is None:
+                        self.stats['failed'] += 1
+                        continue
+                    self.stats['downloaded'] += 1
+                    for ref in self._store(url, response):
+                        if ref not in seen and not self.store.lookup(ref):
+                            seen.add(ref)
+                            todo.add(ref)
+
+        # Stylesheets last, pointing at the files their references were stored as;
+        # imported stylesheets were discovered later, so they are stored first
+        for url, (css, content_type) in reversed(list(self.pending_css.items())):
+            rewritten = self.rewrite_css(css, url)
+            self.store.put(url, rewritten.encode('utf-8'), content_type)
+            metrics.incr('asset_bytes_downloaded', len(rewritten))
+        self.pending_css = {}
+        self.store.save()
+        return {url: self.store.lookup(url) for url in seen if self.store.lookup(url)}
+
+    def mirror_pages(self, pages: Iterable[Dict]) -> Dict[str, str]:
+        """Find and mirror the subresources of page records"""
+        urls = set()
+        for page in pages:
+            urls |= find_subresources(page['html_content'], page['url'])
+        cached = {url for url in urls if self.store.lookup(url)}
+        self.stats['cached'] += len(cached)
+        logger.info(f"Found {len(urls)} subresources ({len(cached)} already mirrored)")
+        return self.mirror(urls - cached)
+
+    def _local(self, ref: str, base_url: str, prefix: str) -> Optional[str]:
+        """Local path for a reference, if it has been mirrored"""
+        url = _absolute(ref, base_url)
+        filename = self.store.lookup(url) if url else None
+        return prefix + quote(filename) if filename else None
+
+    def rewrite_css(self, css: str, css_url: str) -> str:
+        """Point a mirrored stylesheet at its sibling files in assets/"""
+        def replace_url(m):
+            local = self._local(m.group(2), css_url, '')
+            return f"url({m.group(1)}{local}{m.group(1)})" if local else m.group(0)
+
+        def replace_import(m):
+            local = self._local(m.group(2), css_url, '')
+            return f"@import {m.group(1)}{local}{m.group(1)}" if local else m.group(0)
+
+        css = CSS_URL_PATTERN.sub(replace_url, css)
+        return CSS_IMPORT_PATTERN.sub(replace_import, css)
+
+    def rewrite(self, html: str, page_url: str, prefix: str = ASSET_DIR + '/') -> str:
+        """Replace mirrored subresource URLs in a page with local paths, in one pass"""
+        def replace(m):
+            if m.group('css'):
+                local = self._local(m.group('url'), page_url, prefix)
+                if not local:
+                    return m.group(0)
+                return f"{m.group('css')}{m.group('cq')}{local}{m.group('cq')}{m.group('end')}"
+
+            value = m.group('value')
+            if 'srcset' in m.group('attr').lower():
+                candidates = []
+                for candidate in value.split(','):
+                    parts = candidate.split(None, 1)
+                    local = self._local(parts[0], page_url, prefix) if parts else None
+                    candidates.append(' '.join([local] + parts[1:]) if local else candidate.strip())
+                new_value = ', '.join(candidates)
+            else:
+                new_value = self._local(value, page_url, prefix) or value
+            return f"{m.group('attr')}{m.group('q')}{new_value}{m.group('q')}"
+
+        with metrics.span('asset_rewrite'):
+            return REWRITE_PATTERN.sub(replace, html)
+
+
+def main():
+    """Mirror the subresources of every scraped page into assets/"""
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Mirror page subresources into assets/")
+    parser.add_argument('--results-file', default='scraper_results.json')
+    parser.add_argument('--workers', type=int, default=8, help="Concurrent downloads")
+    args = parser.parse_args()
+
+    mirror = AssetMirror(workers=args.workers)
+    mirror.mirror_pages(iter_results(args.results_file))
+
+    print(f"✅ Mirrored subresources into {ASSET_DIR}/")
+    print(f"   - Downloaded: {mirror.stats['downloaded']}")
+    print(f"   - Already mirrored: {mirror.stats['cached']}")
+    print(f"   - Failed: {mirror.stats['failed']}")
+    print("   - Run build_site.py --mirror-assets to point the pages at the local copies")
+
+
+if __name__ == "__main__":
+    main()
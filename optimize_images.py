@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Responsive image pipeline for assets/
+- Resizes PNG/JPEG assets to a few widths as WebP (and AVIF when Pillow supports it)
+- Runs in a process pool; inputs whose hash is unchanged are skipped
+- Rewrites local <img> tags in the pages to <picture> with srcset, intrinsic size and lazy loading
+- Needs the Pillow package (the rewrite only needs the variants manifest)
+"""
+
+import argparse
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+from urllib.parse import quote, unquote
+
+try:
+    from PIL import Image, ImageOps, features
+except ImportError:
+    Image = None
+
+from asset_store import hash_file
+from results_store import load_json, write_json_atomic
+from scrape_metrics import metrics
+
+ASSET_DIR = 'assets'
+VARIANT_DIR = 'variants'
+WIDTHS = (480, 960, 1600)
+QUALITY = {'webp': 80, 'avif': 55}
+MIME_TYPES = {'avif': 'image/avif', 'webp': 'image/webp'}
+RASTER_EXTENSIONS = ('.png', '.jpg', '.jpeg')
+SIZES = '(max-width: 1600px) 100vw, 1600px'
+# Bump when the encoding settings change so variants are regenerated
+PIPELINE_VERSION = 1
+
+PICTURE_OR_IMG = re.compile(r'(<picture\b.*?</picture>)|<img\b([^>]*?)\s*/?>', re.IGNORECASE | re.DOTALL)
+ATTR_PATTERN = re.compile(r'([\w:-]+)(?:\s*=\s*(?:"([^"]*)"|\'([^\']*)\'|([^\s"\'>]+)))?', re.DOTALL)
+
+
+def available_formats() -> List[str]:
+    """Variant formats this Pillow build can encode, best first"""
+    if Image is None:
+        return []
+    formats = ['webp'] if features.check('webp') else []
+    if features.check('avif'):
+        formats.insert(0, 'avif')
+    else:
+        try:
+            import pillow_avif  # noqa: F401 (registers the AVIF plugin)
+            formats.insert(0, 'avif')
+        except ImportError:
+            pass
+    return formats
+
+
+def _make_variants(source: str, out_dir: str, digest: str, widths, formats) -> Dict:
+    """Worker: resize one image to every width and format"""
+    if 'avif' in formats:
+        try:
+            import pillow_avif  # noqa: F401 (plugin registration is per process)
+        except ImportError:
+            pass
+    variants = {fmt: [] for fmt in formats}
+    with Image.open(source) as original:
+        # Apply EXIF rotation so the variants match what browsers show
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ('RGB', 'RGBA'):
+            has_alpha = image.mode in ('LA', 'PA') or 'transparency' in image.info
+            image = image.convert('RGBA' if has_alpha else 'RGB')
+        width, height = image.size
+        # Never upscale: widths above the original collapse to the original width
+        targets = sorted({min(w, width) for w in widths})
+        for target in targets:
+            resized = image if target == width else image.resize(
+                (target, max(1, round(height * target / width))), Image.LANCZOS)
+            for fmt in formats:
+                filename = f"{digest[:16]}-{target}.{fmt}"
+                resized.save(os.path.join(out_dir, filename), fmt.upper(), quality=QUALITY[fmt])
+                variants[fmt].append([target, filename])
+    return {'hash': digest, 'width': width, 'height': height, 'variants': variants}
+
+
+class ImageOptimizer:
+    """Generate responsive variants for the raster images in assets/"""
+
+    def __init__(self, root: str = ASSET_DIR, workers: Optional[int] = None, widths=WIDTHS):
+        self.root = root
+        self.out_dir = os.path.join(root, VARIANT_DIR)
+        self.manifest_file = os.path.join(self.out_dir, 'manifest.json')
+        self.workers = workers or os.cpu_count() or 1
+        self.widths = tuple(widths)
+        manifest = load_json(self.manifest_file, {})
+        # source filename -> hash, intrinsic size and variant files
+        self.images: Dict[str, Dict] = manifest.get('images', {}) if manifest.get('version') == PIPELINE_VERSION else {}
+        self.stats = {'processed': 0, 'cached': 0, 'failed': 0, 'bytes_in': 0, 'bytes_out': 0}
+
+    def sources(self) -> List[str]:
+        """Raster images in the asset directory"""
+        return sorted(name for name in os.listdir(self.root)
+                      if name.lower().endswith(RASTER_EXTENSIONS) and os.path.isfile(os.path.join(self.root, name)))
+
+    def _is_current(self, name: str, digest: str, formats: List[str]) -> bool:
+        """Whether a source's variants exist for this hash and format set"""
+        entry = self.images.get(name)
+        if not entry or entry['hash'] != digest or sorted(entry['variants']) != sorted(formats):
+            return False
+        return all(os.path.exists(os.path.join(self.out_dir, filename))
+                   for files in entry['variants'].values() for _, filename in files)
+
+    def run(self) -> Dict[str, Dict]:
+        """Process changed images and write the variants manifest"""
+        formats = available_formats()
+        if not formats:
+            raise RuntimeError("The image pipeline needs the Pillow package (with WebP support)")
+        os.makedirs(self.out_dir, exist_ok=True)
+
+        names = self.sources()
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            futures = {}
+            for name in names:
+                source = os.path.join(self.root, name)
+                digest = hash_file(source)
+                if self._is_current(name, digest, formats):
+                    self.stats['cached'] += 1
+                    continue
+                futures[name] = executor.submit(_make_variants, source, self.out_dir, digest, self.widths, formats)
+
+            for name, future in futures.items():
+                try:
+                    with metrics.span('image_variants'):
+                        self.images[name] = future.result()
+                except Exception as e:
+                    print(f"⚠️  Could not process {name}: {e}")
+                    self.stats['failed'] += 1
+                    continue
+                self.stats['processed'] += 1
+                self.stats['bytes_in'] += os.path.getsize(os.path.join(self.root, name))
+                self.stats['bytes_out'] += sum(os.path.getsize(os.path.join(self.out_dir, filename))
+                                               for files in self.images[name]['variants'].values()
+                                               for _, filename in files)
+
+        # Forget images that are no longer in assets/
+        self.images = {name: entry for name, entry in self.images.items() if name in names}
+        write_json_atomic(self.manifest_file, {'version': PIPELINE_VERSION, 'images': self.images})
+        return self.images
+
+
+class ImageRewriter:
+    """Rewrite local <img> tags to responsive <picture> elements"""
+
+    def __init__(self, root: str = ASSET_DIR, images: Optional[Dict[str, Dict]] = None):
+        self.prefix = f"{root}/"
+        self.variant_prefix = f"{root}/{VARIANT_DIR}/"
+        if images is None:
+            manifest = load_json(os.path.join(root, VARIANT_DIR, 'manifest.json'), {})
+            images = manifest.get('images', {})
+        self.images = images
+
+    def _srcset(self, files) -> str:
+        return ', '.join(f"{self.variant_prefix}{quote(filename)} {width}w" for width, filename in files)
+
+    def rewrite(self, html: str) -> str:
+        """Wrap images that have variants in <picture>; the first image stays eager for LCP"""
+        state = {'first': True}
+
+        def replace(m):
+            if m.group(1):
+                return m.group(0)
+            attrs_text = m.group(2)
+            attrs = {a.group(1).lower(): next((v for v in a.group(2, 3, 4) if v is not None), '')
+                     for a in ATTR_PATTERN.finditer(attrs_text)}
+            first, state['first'] = state['first'], False
+            src = attrs.get('src', '')
+            entry = self.images.get(unquote(src[len(self.prefix):])) if src.startswith(self.prefix) else None
+
+            extra = ''
+            if 'loading' not in attrs and not first:
+                extra += ' loading="lazy"'
+            if 'decoding' not in attrs:
+                extra += ' decoding="async"'
+            if entry is None or 'srcset' in attrs:
+                return f"<img{attrs_text}{extra}>"
+
+            if 'width' not in attrs and 'height' not in attrs:
+                extra += f' width="{entry["width"]}" height="{entry["height"]}"'
+            sizes = attrs.get('sizes', SIZES)
+            sources = ''.join(
+                f'<source type="{MIME_TYPES[fmt]}" srcset="{self._srcset(files)}" sizes="{sizes}">'
+                for fmt, files in entry['variants'].items())
+            metrics.incr('images_rewritten')
+            return f"<picture>{sources}<img{attrs_text}{extra}></picture>"
+
+        return PICTURE_OR_IMG.sub(replace, html)
+
+
+def main():
+    """Generate responsive image variants for assets/"""
+    parser = argparse.ArgumentParser(description="Generate WebP/AVIF variants for the images in assets/")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--widths', default=','.join(str(w) for w in WIDTHS), help="Comma-separated widths")
+    args = parser.parse_args()
+
+    optimizer = ImageOptimizer(workers=args.workers, widths=[int(w) for w in args.widths.split(',')])
+    images = optimizer.run()
+    stats = optimizer.stats
+
+    print(f"✅ {len(images)} images have variants in {optimizer.out_dir}/ ({', '.join(available_formats())})")
+    print(f"   - Processed: {stats['processed']} ({stats['bytes_in'] / (1 << 20):.1f} MB of originals)")
+    print(f"   - Variants written: {stats['bytes_out'] / (1 << 20):.1f} MB")
+    print(f"   - Unchanged (cached): {stats['cached']}")
+    print(f"   - Failed: {stats['failed']}")
+    print("   - Run build_site.py --optimize-images to use them in the pages")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+Build-time optimization of the generated pages
+- Strips dead Kajabi runtime markup (CSRF tokens, analytics snippets)
+- Minifies inline CSS and collapses HTML whitespace (scripts, pre and textarea untouched)
+- Runs in a process pool, cached by input hash so unchanged pages are skipped
+- Emits .gz (and .br when the brotli package is installed) siblings
+"""
+
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from results_store import write_json_atomic
+from scrape_metrics import metrics
+
+CACHE_FILE = '.optimize_cache.json'
+# Bump when the transforms change so cached outputs are rebuilt
+OPTIMIZER_VERSION = 2
+
+# Kajabi runtime that does nothing on a static copy
+DEAD_MARKUP = [
+    re.compile(r'<meta\s+name="csrf-(?:param|token)"[^>]*>\s*', re.IGNORECASE),
+    re.compile(r'<script\b[^>]*>(?:(?!</script>).)*?rudderanalytics(?:(?!</script>).)*?</script>\s*',
+               re.IGNORECASE | re.DOTALL),
+    re.compile(r'<script\b[^>]*src="[^"]*track_?(?:product_?)?analytics[^"]*"[^>]*>\s*</script>\s*', re.IGNORECASE),
+    re.compile(r'<link\b[^>]*href="[^"]*track_?(?:product_?)?analytics[^"]*"[^>]*>\s*', re.IGNORECASE),
+]
+
+RAW_BLOCK = re.compile(r'(<(script|style|pre|textarea)\b[^>]*>)(.*?)(</\2\s*>)', re.IGNORECASE | re.DOTALL)
+# Conditional comments are kept
+HTML_COMMENT = re.compile(r'<!--(?!\[if|\s*\[endif).*?-->', re.DOTALL)
+WHITESPACE = re.compile(r'\s+')
+CSS_COMMENT = re.compile(r'/\*.*?\*/', re.DOTALL)
+CSS_STRING = re.compile(r'("(?:\\.|[^"\\])*"|\'(?:\\.|[^\'\\])*\')')
+CSS_PUNCTUATION = re.compile(r'\s*([{};,>])\s*|(:)\s+')
+
+
+def strip_dead_markup(html: str) -> str:
+    """Remove Kajabi runtime markup that has no effect on the static backup"""
+    for pattern in DEAD_MARKUP:
+        html = pattern.sub('', html)
+    return html
+
+
+def minify_css(css: str) -> str:
+    """Drop comments and redundant whitespace from CSS (string literals untouched)"""
+    parts = CSS_STRING.split(CSS_COMMENT.sub('', css))
+    for i in range(0, len(parts), 2):
+        code = WHITESPACE.sub(' ', parts[i])
+        code = CSS_PUNCTUATION.sub(lambda m: m.group(1) or m.group(2), code)
+        parts[i] = code.replace(';}', '}')
+    return ''.join(parts).strip()
+
+
+def _collapse_whitespace(text: str) -> str:
+    """Collapse whitespace runs to one character (a newline if the run had one)"""
+    return WHITESPACE.sub(lambda m: '\n' if '\n' in m.group(0) else ' ', text)
+
+
+def minify_html(html: str) -> str:
+    """Minify a page, leaving scripts and pre/textarea content intact
+
+    Script bodies are not minified: whitespace inside template literals, strings and regex
+    literals is significant, and gzip/brotli already remove most of the indentation cost.
+    """
+    parts = []
+    last = 0
+    for block in RAW_BLOCK.finditer(html):
+        parts.append(_collapse_whitespace(HTML_COMMENT.sub('', html[last:block.start()])))
+        open_tag, tag, body, close_tag = block.group(1), block.group(2).lower(), block.group(3), block.group(4)
+        if tag == 'style':
+            body = minify_css(body)
+        parts.append(open_tag + body + close_tag)
+        last = block.end()
+    parts.append(_collapse_whitespace(HTML_COMMENT.sub('', html[last:])))
+    return ''.join(parts)
+
+
+def optimize_html(html: str) -> str:
+    """Worker: the full optimization pass for one page"""
+    return minify_html(strip_dead_markup(html))
+
+
+def write_precompressed(path: str, data: bytes) -> int:
+    """Write .gz (and .br) siblings of an output file, returning the bytes written"""
+    written = 0
+    with metrics.span('precompress'):
+        # mtime=0 keeps the .gz byte-identical across builds
+        compressed = gzip.compress(data, compresslevel=9, mtime=0)
+        with open(f"{path}.gz", 'wb') as f:
+            f.write(compressed)
+        written += len(compressed)
+        if brotli is not None:
+            compressed = brotli.compress(data, quality=11)
+            with open(f"{path}.br", 'wb') as f:
+                f.write(compressed)
+            written += len(compressed)
+    return written
+
+
+def has_precompressed(path: str) -> bool:
+    """Whether the compressed siblings of an output file exist"""
+    return os.path.exists(f"{path}.gz") and (brotli is None or os.path.exists(f"{path}.br"))
+
+
+class PageOptimizer:
+    """Optimize pages in parallel, skipping pages whose input and output are unchanged"""
+
+    def __init__(self, cache_file: str = CACHE_FILE, workers: Optional[int] = None, precompress: bool = True):
+        self.cache_file = cache_file
+        self.workers = workers or os.cpu_count() or 1
+        self.precompress = precompress
+        # filename -> {'input': hash of the page before optimization, 'output': hash after}
+        self.cache: Dict[str, Dict] = {}
+        if os.path.exists(cache_file):
+            with open(cache_file, 'r') as f:
+                cache = json.load(f)
+            if cache.get('version') == OPTIMIZER_VERSION:
+                self.cache = cache['files']
+        self.stats = {'optimized': 0, 'cached': 0, 'bytes_in': 0, 'bytes_out': 0}
+
+    def optimize(self, pages: Iterable[Tuple[str, str, object]],
+                 is_current: Callable[[str, str], bool]) -> Iterator[Tuple[str, Optional[str], object]]:
+        """Yield (filename, optimized html, item) in input order; html is None when the output is current"""
+        # Keep a bounded number of pages in flight so memory stays flat
+        max_pending = self.workers * 2
+        pending = deque()
+
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            for filename, html, item in pages:
+                data = html.encode('utf-8')
+                digest = hashlib.sha256(data).hexdigest()
+                cached = self.cache.get(filename)
+                if cached and cached['input'] == digest and is_current(filename, cached['output']):
+                    self.stats['cached'] += 1
+                    metrics.incr('optimize_cached')
+                    pending.append((filename, digest, None, item))
+                else:
+                    self.stats['bytes_in'] += len(data)
+                    pending.append((filename, digest, executor.submit(optimize_html, html), item))
+                while len(pending) > max_pending or (pending and pending[0][2] is None):
+                    yield self._collect(pending.popleft())
+            while pending:
+                yield self._collect(pending.popleft())
+
+    def _collect(self, entry) -> Tuple[str, Optional[str], object]:
+        """Wait for one optimized page and record it in the cache"""
+        filename, digest, future, item = entry
+        if future is None:
+            return filename, None, item
+        with metrics.span('optimize_wait'):
+            html = future.result()
+        data = html.encode('utf-8')
+        self.cache[filename] = {'input': digest, 'output': hashlib.sha256(data).hexdigest()}
+        self.stats['optimized'] += 1
+        self.stats['bytes_out'] += len(data)
+        metrics.incr('optimize_pages')
+        return filename, html, item
+
+    def save(self):
+        """Write the cache"""
+        write_json_atomic(self.cache_file, {'version': OPTIMIZER_VERSION, 'files': self.cache})
+
+
+def main():
+    """Optimize HTML files in place (pages not produced by build_site.py, e.g. legacy dumps)"""
+    parser = argparse.ArgumentParser(description="Minify and precompress HTML pages in place")
+    parser.add_argument('files', nargs='*', help="HTML files (default: every *.html here)")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--no-precompress', action='store_true', help="Do not write .gz/.br siblings")
+    args = parser.parse_args()
+
+    optimizer = PageOptimizer(workers=args.workers, precompress=not args.no_precompress)
+    files = args.files or sorted(name for name in os.listdir('.') if name.endswith('.html'))
+
+    def file_hash(path: str) -> str:
+        with open(path, 'rb') as f:
+            return hashlib.sha256(f.read()).hexdigest()
+
+    def pages():
+        for path in files:
+            cached = optimizer.cache.get(path)
+            if cached and cached['output'] == file_hash(path):
+                # Already optimized by an earlier run
+                optimizer.stats['cached'] += 1
+                continue
+            with open(path, 'r', encoding='utf-8') as f:
+                yield path, f.read(), None
+
+    for path, html, _ in optimizer.optimize(pages(), lambda path, digest: file_hash(path) == digest):
+        if html is None:
+            continue
+        with open(path, 'w', encoding='utf-8', newline='') as f:
+            f.write(html)
+        if optimizer.precompress:
+            write_precompressed(path, html.encode('utf-8'))
+    optimizer.save()
+
+    stats = optimizer.stats
+    print(f"✅ Optimized {stats['optimized']} pages ({stats['cached']} already optimized)")
+    print(f"   - {stats['bytes_in'] / 1024:.0f} KB -> {stats['bytes_out'] / 1024:.0f} KB")
+    if brotli is None:
+        print("   - Install the brotli package to also write .br files")
+
+
+if __name__ == "__main__":
+    main()
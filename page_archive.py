@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+Compressed, seekable archive for scraped pages
+- Length-prefixed compressed records appended to a single file
+- Sidecar offset index for random access by URL (rebuilt from the frames if stale)
+- Optional shared dictionary trained on the pages (Kajabi boilerplate compresses away)
+- zlib by default, zstd when the zstandard package is installed
+- Export to the legacy scraper_results.json format
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import struct
+import zlib
+from collections import Counter
+from typing import Dict, Iterator, List, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+MAGIC = 'kajabi-page-archive'
+FRAME_HEADER = struct.Struct('>I')
+# zlib only uses the last 32 KB of a preset dictionary
+ZLIB_DICT_SIZE = 32 * 1024
+ZSTD_DICT_SIZE = 110 * 1024
+
+
+def is_archive(path: str) -> bool:
+    """Whether a file is a page archive rather than legacy JSON"""
+    if not os.path.exists(path):
+        return path.endswith('.archive')
+    with open(path, 'rb') as f:
+        return f.read(len(MAGIC) + 16).find(MAGIC.encode()) != -1
+
+
+def train_dictionary(pages: List[str], codec: str = 'zlib') -> bytes:
+    """Build a shared dictionary from sample page bodies"""
+    samples = [page.encode('utf-8') for page in pages]
+    if codec == 'zstd':
+        return zstandard.train_dictionary(ZSTD_DICT_SIZE, samples).as_bytes()
+
+    # Lines shared by many pages, most valuable (frequency x length) last,
+    # because zlib favours the end of the dictionary
+    counts = Counter()
+    for sample in samples:
+        counts.update(set(line.strip() for line in sample.splitlines() if len(line.strip()) > 8))
+    shared = [line for line, count in counts.items() if count > 1]
+    shared.sort(key=lambda line: counts[line] * len(line))
+    dictionary = b'\n'.join(shared)
+    return dictionary[-ZLIB_DICT_SIZE:]
+
+
+class PageArchive:
+    """Append-only archive of page records with random access by URL"""
+
+    def __init__(self, path: str, codec: str = 'zlib', dictionary: Optional[bytes] = None,
+                 level: int = 6):
+        self.path = path
+        self.index_file = f"{path}.idx"
+        self.dict_file = f"{path}.dict"
+        self.level = level
+
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                self.header = json.loads(f.readline())
+                self.data_start = f.tell()
+            if self.header.get('format') != MAGIC:
+                raise ValueError(f"{path} is not a page archive")
+            self.dictionary = None
+            if self.header.get('dict'):
+                with open(self.dict_file, 'rb') as f:
+                    self.dictionary = f.read()
+                if hashlib.sha256(self.dictionary).hexdigest() != self.header['dict']:
+                    raise ValueError(f"{self.dict_file} does not match {path}")
+        else:
+            if codec == 'zstd' and zstandard is None:
+                raise RuntimeError("The zstd codec needs the zstandard package")
+            self.dictionary = dictionary
+            self.header = {
+                'format': MAGIC,
+                'version': 1,
+                'codec': codec,
+                'dict': hashlib.sha256(dictionary).hexdigest() if dictionary else None,
+            }
+            if dictionary:
+                with open(self.dict_file, 'wb') as f:
+                    f.write(dictionary)
+            with open(path, 'wb') as f:
+                f.write(json.dumps(self.header).encode() + b'\n')
+                self.data_start = f.tell()
+
+        self.codec = self.header['codec']
+        self._setup_codec()
+        self.offsets: Dict[str, Tuple[int, int]] = self._load_index()
+        self.file = None
+
+    def _setup_codec(self):
+        """Prepare compressors for the archive's codec"""
+        if self.codec == 'zstd':
+            if zstandard is None:
+                raise RuntimeError("Reading this archive needs the zstandard package")
+            zdict = zstandard.ZstdCompressionDict(self.dictionary) if self.dictionary else None
+            self._zstd_compressor = zstandard.ZstdCompressor(level=self.level, dict_data=zdict)
+            self._zstd_decompressor = zstandard.ZstdDecompressor(dict_data=zdict)
+
+    def compress(self, data: bytes) -> bytes:
+        """Compress one record"""
+        if self.codec == 'zstd':
+            return self._zstd_compressor.compress(data)
+        if self.dictionary:
+            compressor = zlib.compressobj(self.level, zdict=self.dictionary)
+        else:
+            compressor = zlib.compressobj(self.level)
+        return compressor.compress(data) + compressor.flush()
+
+    def decompress(self, data: bytes) -> bytes:
+        """Decompress one record"""
+        if self.codec == 'zstd':
+            return self._zstd_decompressor.decompress(data)
+        if self.dictionary:
+            decompressor = zlib.decompressobj(zdict=self.dictionary)
+        else:
+            decompressor = zlib.decompressobj()
+        return decompressor.decompress(data) + decompressor.flush()
+
+    def _stamp(self) -> Dict:
+        """Size and mtime used to detect a stale index"""
+        stat = os.stat(self.path)
+        return {'size': stat.st_size, 'mtime': stat.st_mtime}
+
+    def _load_index(self) -> Dict[str, Tuple[int, int]]:
+        """Load the offset index, rebuilding it from the frames if stale"""
+        if os.path.exists(self.index_file):
+            with open(self.index_file, 'r') as f:
+                index = json.load(f)
+            if index.get('stamp') == self._stamp():
+                return {url: tuple(location) for url, location in index['offsets'].items()}
+        return self._rebuild_index()
+
+    def _rebuild_index(self) -> Dict[str, Tuple[int, int]]:
+        """Scan every frame, truncating a torn final frame left by a crash"""
+        offsets = {}
+        good_end = self.data_start
+        with open(self.path, 'rb') as f:
+            f.seek(self.data_start)
+            while True:
+                header = f.read(FRAME_HEADER.size)
+                if len(header) < FRAME_HEADER.size:
+                    break
+                (length,) = FRAME_HEADER.unpack(header)
+                payload = f.read(length)
+                if len(payload) < length:
+                    break
+                record = json.loads(self.decompress(payload))
+                offsets[record['url']] = (good_end + FRAME_HEADER.size, length)
+                good_end = f.tell()
+        if good_end < os.path.getsize(self.path):
+            with open(self.path, 'r+b') as f:
+                f.truncate(good_end)
+        self.offsets = offsets
+        self._write_index()
+        return offsets
+
+    def _write_index(self):
+        """Persist the offset index"""
+        tmp_path = f"{self.index_file}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'stamp': self._stamp(), 'offsets': self.offsets}, f)
+        os.replace(tmp_path, self.index_file)
+
+    def append(self, record: Dict):
+        """Append a record; a newer record for the same URL replaces the old one"""
+        if self.file is None:
+            self.file = open(self.path, 'ab')
+        payload = self.compress(json.dumps(record).encode('utf-8'))
+        offset = self.file.tell()
+        self.file.write(FRAME_HEADER.pack(len(payload)) + payload)
+        self.offsets[record['url']] = (offset + FRAME_HEADER.size, len(payload))
+
+    def flush(self):
+        """Flush appended records to disk and update the index"""
+        if self.file is not None:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+        self._write_index()
+
+    def close(self):
+        """Flush and close the archive"""
+        self.flush()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+    def get(self, url: str) -> Optional[Dict]:
+        """Read the latest record for a URL"""
+        location = self.offsets.get(url)
+        if location is None:
+            return None
+        if self.file is not None:
+            self.file.flush()
+        offset, length = location
+        with open(self.path, 'rb') as f:
+            f.seek(offset)
+            return json.loads(self.decompress(f.read(length)))
+
+    def __contains__(self, url: str) -> bool:
+        return url in self.offsets
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def __iter__(self) -> Iterator[Dict]:
+        """Yield the latest record of every URL, in archive order"""
+        if self.file is not None:
+            self.file.flush()
+        with open(self.path, 'rb') as f:
+            for offset, length in sorted(self.offsets.values()):
+                f.seek(offset)
+                yield json.loads(self.decompress(f.read(length)))
+
+    def export_json(self, results_file: str):
+        """Export the archive to the legacy scraper_results.json format"""
+        from results_store import write_results_atomic
+        write_results_atomic(results_file, list(self))
+
+
+def pack(results_file: str, archive_file: str, codec: str = 'zlib', use_dictionary: bool = True,
+         sample_size: int = 50) -> PageArchive:
+    """Convert a legacy results file into an archive"""
+    from results_reader import iter_results
+    dictionary = None
+    if use_dictionary:
+        samples = []
+        for record in iter_results(results_file):
+            samples.append(record['html_content'])
+            if len(samples) >= sample_size:
+                break
+        dictionary = train_dictionary(samples, codec)
+    archive = PageArchive(archive_file, codec=codec, dictionary=dictionary)
+    for record in iter_results(results_file):
+        archive.append(record)
+    archive.close()
+    return archive
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Compressed archive for scraped pages")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    pack_parser = subparsers.add_parser('pack', help="Convert scraper_results.json into an archive")
+    pack_parser.add_argument('results_file', nargs='?', default='scraper_results.json')
+    pack_parser.add_argument('archive_file', nargs='?', default='scraper_results.archive')
+    pack_parser.add_argument('--codec', choices=['zlib', 'zstd'], default='zlib')
+    pack_parser.add_argument('--no-dict', action='store_true', help="Compress without a shared dictionary")
+
+    export_parser = subparsers.add_parser('export', help="Export an archive to the legacy JSON format")
+    export_parser.add_argument('archive_file', nargs='?', default='scraper_results.archive')
+    export_parser.add_argument('results_file', nargs='?', default='scraper_results.json')
+
+    get_parser = subparsers.add_parser('get', help="Print the HTML stored for a URL")
+    get_parser.add_argument('url')
+    get_parser.add_argument('archive_file', nargs='?', default='scraper_results.archive')
+
+    args = parser.parse_args()
+
+    if args.command == 'pack':
+        archive = pack(args.results_file, args.archive_file, args.codec, not args.no_dict)
+        before = os.path.getsize(args.results_file)
+        after = os.path.getsize(args.archive_file)
+        if os.path.exists(archive.dict_file):
+            after += os.path.getsize(archive.dict_file)
+        print(f"✅ Packed {len(archive)} pages into {args.archive_file}")
+        print(f"   - {before / 1024:.0f} KB -> {after / 1024:.0f} KB ({after / before:.1%})")
+    elif args.command == 'export':
+        archive = PageArchive(args.archive_file)
+        archive.export_json(args.results_file)
+        print(f"✅ Exported {len(archive)} pages to {args.results_file}")
+    elif args.command == 'get':
+        record = PageArchive(args.archive_file).get(args.url)
+        if record is None:
+            print(f"❌ {args.url} is not in {args.archive_file}")
+        else:
+            print(record['html_content'])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+BeautifulSoup extractors for scraped pages
+- Title, main content text, images, internal links and meta description
+- Configurable parser backend (lxml when installed, html.parser otherwise)
+"""
+
+from bs4 import BeautifulSoup
+from urllib.parse import urljoin, urlparse
+from typing import Dict, List
+
+try:
+    import lxml  # noqa: F401
+    DEFAULT_PARSER = 'lxml'
+except ImportError:
+    DEFAULT_PARSER = 'html.parser'
+
+CONTENT_SELECTORS = [
+    'main',
+    '[role="main"]',
+    '.main-content',
+    '.content',
+    'article',
+    '.post-content',
+    '.page-content'
+]
+
+
+def extract_title(soup: BeautifulSoup) -> str:
+    """Extract page title"""
+    title_tag = soup.find('title')
+    return title_tag.text.strip() if title_tag else ''
+
+
+def extract_content(soup: BeautifulSoup) -> str:
+    """Extract main content text (removes script and style elements from the soup)"""
+    for script in soup(["script", "style"]):
+        script.decompose()
+
+    # Try to find main content areas
+    content_text = ""
+    for selector in CONTENT_SELECTORS:
+        content_area = soup.select_one(selector)
+        if content_area:
+            content_text = content_area.get_text(separator='\n', strip=True)
+            break
+
+    # Fallback to body if no main content found
+    if not content_text:
+        content_text = soup.get_text(separator='\n', strip=True)
+
+    return content_text
+
+
+def extract_images(soup: BeautifulSoup, base_url: str) -> List[str]:
+    """Extract image URLs (src, srcset candidates and og:image)"""
+    images = []
+    for img in soup.find_all(['img', 'source']):
+        refs = [img['src']] if img.get('src') else []
+        refs += [candidate.split()[0] for candidate in img.get('srcset', '').split(',') if candidate.strip()]
+        for ref in refs:
+            img_url = urljoin(base_url, ref)
+            if img_url not in images:
+                images.append(img_url)
+    for meta in soup.find_all('meta', property='og:image', content=True):
+        img_url = urljoin(base_url, meta['content'])
+        if img_url not in images:
+            images.append(img_url)
+    return images
+
+
+def extract_links(soup: BeautifulSoup, base_url: str) -> List[str]:
+    """Extract internal links"""
+    links = []
+    for link in soup.find_all('a', href=True):
+        link_url = urljoin(base_url, link['href'])
+        # Only include links from the same domain
+        if urlparse(link_url).netloc == urlparse(base_url).netloc:
+            links.append(link_url)
+    return list(set(links))  # Remove duplicates
+
+
+def extract_meta_description(soup: BeautifulSoup) -> str:
+    """Extract meta description"""
+    meta_desc = soup.find('meta', attrs={'name': 'description'})
+    return meta_desc.get('content', '') if meta_desc else ''
+
+
+def extract_metadata(html: str, url: str, parser: str = DEFAULT_PARSER) -> Dict:
+    """Run every extractor over a page with a single parse"""
+    soup = BeautifulSoup(html, parser)
+    metadata = {
+        'url': url,
+        'title': extract_title(soup),
+        'description': extract_meta_description(soup),
+        'links': extract_links(soup, url),
+        'images': extract_images(soup, url),
+    }
+    # Content extraction strips scripts from the soup, so it runs last
+    metadata['text'] = extract_content(soup)
+    return metadata
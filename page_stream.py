@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+"""
+Streaming page capture for the scrapers
+- Response bodies are written to a per-page spool file as they arrive, never held whole in memory
+- An incremental html_scanner pass over the same chunks captures the internal links for the
+  crawl frontier; titles and descriptions come from the extraction stage, as for plain results
+- Spool files are folded into the results file (or archive) when the results store compacts
+"""
+
+import codecs
+import hashlib
+import os
+from typing import Dict, Iterable
+
+from html_scanner import PageScanner
+from url_utils import normalize_url
+
+BODY_DIR = '.bodies'
+
+
+class BodySpool:
+    """Per-page body files written while the response streams in"""
+
+    def __init__(self, directory: str = BODY_DIR):
+        self.directory = directory
+
+    def path_for(self, url: str) -> str:
+        digest = hashlib.sha256(normalize_url(url).encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, f"{digest[:32]}.html")
+
+    def capture(self, url: str, chunks: Iterable[bytes], encoding: str = None) -> Dict:
+        """Decode body chunks into the URL's spool file while finding its links; returns the body details"""
+        try:
+            decoder = codecs.getincrementaldecoder(encoding or 'utf-8')(errors='replace')
+        except LookupError:
+            decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        parser = PageScanner(url, links_only=True)
+        # Same hash as revalidation.content_hash of the decoded text
+        digest = hashlib.sha256()
+        size = 0
+
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path_for(url)
+        tmp_path = f"{path}.tmp"
+        try:
+            with open(tmp_path, 'wb') as f:
+                def write(text: str):
+                    nonlocal size
+                    data = text.encode('utf-8')
+                    f.write(data)
+                    digest.update(data)
+                    size += len(data)
+                    parser.feed(text)
+
+                for chunk in chunks:
+                    write(decoder.decode(chunk))
+                write(decoder.decode(b'', final=True))
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        parser.close()
+
+        return {
+            'body_file': path,
+            'content_hash': digest.hexdigest(),
+            'size': size,
+            'links': list(parser.links),
+        }
+
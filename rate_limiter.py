@@ -0,0 +1,193 @@
+#!/usr/bin/env python3
+"""
+Per-host politeness budgets for the scrapers
+- Token bucket per host (requests/second plus burst)
+- Hosts are independent, so different origins are fetched in parallel
+- Adaptive (AIMD) control of each host's rate from server responses
+- Failure classification so permanent errors are not retried
+"""
+
+import asyncio
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Optional
+from urllib.parse import urlparse
+
+# Failure classes for the retry loop
+PERMANENT = 'permanent'
+THROTTLED = 'throttled'
+TRANSIENT = 'transient'
+
+PERMANENT_STATUSES = {400, 401, 403, 404, 405, 410, 414, 451}
+THROTTLED_STATUSES = {429, 503}
+# Slowest adaptive rate: one request every 20 seconds
+MIN_RATE = 0.05
+
+
+def classify_status(status_code: int) -> str:
+    """Classify a failed HTTP status"""
+    if status_code in THROTTLED_STATUSES:
+        return THROTTLED
+    if status_code in PERMANENT_STATUSES:
+        return PERMANENT
+    return TRANSIENT
+
+
+def classify_failure(error: Exception) -> str:
+    """Classify a request exception (timeouts and connection errors are transient)"""
+    if getattr(error, 'failure', None):
+        # Exceptions that know their class, e.g. http_transport.ResponseTooLarge
+        return error.failure
+    response = getattr(error, 'response', None)
+    if response is not None:
+        return classify_status(response.status_code)
+    return TRANSIENT
+
+
+def retry_after_seconds(response) -> Optional[float]:
+    """Parse a Retry-After header (seconds or HTTP date)"""
+    if response is None:
+        return None
+    value = response.headers.get('Retry-After')
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+class TokenBucket:
+    """Token bucket limiting the request rate to a single host"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+
+    def _refill(self) -> float:
+        """Add the tokens earned since the last update at the current rate (lock held)"""
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return now
+
+    def reserve(self) -> float:
+        """Take a token, returning how long the caller must wait before using it"""
+        with self.lock:
+            now = self._refill()
+            # Tokens may go negative: later callers queue up behind earlier reservations
+            self.tokens -= 1
+            wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+            return max(wait, self.blocked_until - now)
+
+    def set_rate(self, update: Callable[[float], float]) -> float:
+        """Change the rate to update(current rate); tokens earned so far keep the old rate"""
+        with self.lock:
+            self._refill()
+            self.rate = update(self.rate)
+            return self.rate
+
+    def block(self, seconds: float):
+        """Pause the host, e.g. for a Retry-After"""
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+    async def acquire(self) -> float:
+        """Wait until a token is available and take it, returning the time waited"""
+        delay = self.reserve()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return delay
+
+    def wait(self) -> float:
+        """Blocking version of acquire"""
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+
+class HostRateLimiter:
+    """One token bucket per host, created on first use"""
+
+    def __init__(self, rate: float, burst: int = 1, host_rates: Optional[Dict[str, float]] = None):
+        self.rate = rate
+        self.burst = burst
+        self.host_rates = host_rates or {}
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.lock = threading.Lock()
+
+    def bucket(self, url: str) -> TokenBucket:
+        """Get the bucket for the host of a URL"""
+        host = urlparse(url).netloc
+        with self.lock:
+            if host not in self.buckets:
+                rate = self.host_rates.get(host, self.rate)
+                self.buckets[host] = TokenBucket(rate, self.burst)
+            return self.buckets[host]
+
+    async def acquire(self, url: str) -> float:
+        """Wait for the politeness budget of the URL's host"""
+        return await self.bucket(url).acquire()
+
+    def wait(self, url: str) -> float:
+        """Blocking wait for the politeness budget of the URL's host"""
+        return self.bucket(url).wait()
+
+
+class AdaptiveRateController(HostRateLimiter):
+    """AIMD control of each host's rate: speed up on fast 2xx, back off on throttling or latency spikes"""
+
+    def __init__(self, rate: float, burst: int = 1, min_rate: float = MIN_RATE, max_rate: float = 2.0,
+                 increase: float = 0.05, decrease: float = 0.5, spike_factor: float = 3.0,
+                 host_rates: Optional[Dict[str, float]] = None):
+        super().__init__(rate, burst, host_rates)
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.increase = increase
+        self.decrease = decrease
+        self.spike_factor = spike_factor
+        # Smoothed latency per host, the baseline for spike detection
+        self.latency: Dict[str, float] = {}
+
+    def _adjust(self, bucket: TokenBucket, update: Callable[[float], float]):
+        """Apply update to the bucket's rate, within [min_rate, max_rate]"""
+        bucket.set_rate(lambda rate: min(self.max_rate, max(self.min_rate, update(rate))))
+
+    def record_success(self, url: str, latency: float):
+        """Additive increase after a fast 2xx, multiplicative decrease on a latency spike"""
+        host = urlparse(url).netloc
+        bucket = self.bucket(url)
+        with self.lock:
+            baseline = self.latency.get(host, latency)
+            self.latency[host] = 0.8 * baseline + 0.2 * latency
+        if latency > self.spike_factor * baseline:
+            self._adjust(bucket, lambda rate: rate * self.decrease)
+        else:
+            self._adjust(bucket, lambda rate: rate + self.increase)
+
+    def record_failure(self, url: str, failure: str, retry_after: Optional[float] = None):
+        """Back off after throttling or server errors; permanent failures say nothing about load"""
+        if failure == PERMANENT:
+            return
+        bucket = self.bucket(url)
+        self._adjust(bucket, lambda rate: rate * self.decrease)
+        if retry_after:
+            bucket.block(retry_after)
+
+    def rate_for(self, url: str) -> float:
+        """Current request rate for the URL's host"""
+        return self.bucket(url).rate
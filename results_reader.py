@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Streaming access to scraper_results.json
+- Incremental JSON array parser that yields one page record at a time
+- Sidecar offset index (<results>.idx) for seeking straight to a URL's record
+- Page archives (page_archive.py) are read through the same functions
+"""
+
+import json
+import os
+from typing import Dict, Iterator, Optional, Tuple
+
+from page_archive import PageArchive, is_archive
+
+CHUNK_SIZE = 1 << 16
+
+_decoder = json.JSONDecoder()
+
+
+def index_path(results_file: str) -> str:
+    """Path of the sidecar offset index"""
+    return f"{results_file}.idx"
+
+
+def _file_stamp(path: str) -> Dict:
+    """Size and mtime used to detect a stale index"""
+    stat = os.stat(path)
+    return {'size': stat.st_size, 'mtime': stat.st_mtime}
+
+
+def iter_records_with_offsets(results_file: str) -> Iterator[Tuple[Dict, int, int]]:
+    """Yield (record, byte offset, byte length) for each element of the results array"""
+    with open(results_file, 'rb') as f:
+        buffer = ''
+        base = 0        # byte offset of buffer[0]
+        pos = 0         # position in buffer
+        started = False
+        eof = False
+        want = CHUNK_SIZE
+
+        def byte_len(text: str) -> int:
+            return len(text) if text.isascii() else len(text.encode('utf-8'))
+
+        while True:
+            # Skip whitespace, the opening bracket and separators
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n,[':
+                if buffer[pos] == '[':
+                    started = True
+                pos += 1
+            if pos < len(buffer) and buffer[pos] == ']' and started:
+                return
+
+            if pos < len(buffer):
+                try:
+                    record, end = _decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError:
+                    if eof:
+                        raise
+                    record = None
+                if record is not None:
+                    start = base + byte_len(buffer[:pos])
+                    length = byte_len(buffer[pos:end])
+                    yield record, start, length
+                    # Drop the consumed text so memory stays at about one record
+                    base = start + length
+                    buffer = buffer[end:]
+                    pos = 0
+                    want = CHUNK_SIZE
+                    continue
+            elif eof:
+                return
+
+            # Record incomplete: read more, growing the read size for large pages
+            chunk = f.read(want)
+            if not chunk:
+                eof = True
+                continue
+            while True:
+                try:
+                    buffer += chunk.decode('utf-8')
+                    break
+                except UnicodeDecodeError:
+                    more = f.read(1)
+                    if not more:
+                        raise
+                    chunk += more
+            want = min(want * 2, 1 << 24)
+
+
+def iter_results(results_file: str = 'scraper_results.json') -> Iterator[Dict]:
+    """Yield page records one at a time"""
+    if is_archive(results_file):
+        yield from PageArchive(results_file)
+        return
+    for record, _, _ in iter_records_with_offsets(results_file):
+        yield record
+
+
+def write_index(results_file: str, offsets: Dict[str, Tuple[int, int]]):
+    """Write the sidecar index for a results file"""
+    index = {'stamp': _file_stamp(results_file), 'offsets': offsets}
+    tmp_path = f"{index_path(results_file)}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(index, f)
+    os.replace(tmp_path, index_path(results_file))
+
+
+def build_index(results_file: str) -> Dict[str, Tuple[int, int]]:
+    """Scan a results file once and write its offset index"""
+    offsets = {}
+    for record, offset, length in iter_records_with_offsets(results_file):
+        offsets[record['url']] = (offset, length)
+    write_index(results_file, offsets)
+    return offsets
+
+
+def load_index(results_file: str) -> Dict[str, Tuple[int, int]]:
+    """Load the offset index, rebuilding it if the results file changed"""
+    path = index_path(results_file)
+    if os.path.exists(path):
+        with open(path, 'r') as f:
+            index = json.load(f)
+        if index.get('stamp') == _file_stamp(results_file):
+            return index['offsets']
+    return build_index(results_file)
+
+
+def load_result(url: str, results_file: str = 'scraper_results.json') -> Optional[Dict]:
+    """Read a single page record by URL without parsing the rest of the file"""
+    if is_archive(results_file):
+        return PageArchive(results_file).get(url)
+    location = load_index(results_file).get(url)
+    if location is None:
+        return None
+    offset, length = location
+    with open(results_file, 'rb') as f:
+        f.seek(offset)
+        return json.loads(f.read(length))
@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+"""
+Crash-safe storage for scraper results and progress
+- Append-only JSON Lines journal, one record per completed/failed URL
+- fsync batching so each page costs O(page) I/O
+- Compaction into the legacy scraper_results.json / scraper_progress.json format
+- Atomic file replacement, so a crash never leaves a half-written JSON file
+- Hashed indexes of normalized URLs for O(1) resume checks
+- Results can live in a compressed page archive instead of legacy JSON
+- Optional bodies-on-disk mode: records in memory hold metadata only; bodies stay in their
+  spool files (page_stream.py) or the results file and are read back one at a time
+"""
+
+import json
+import logging
+import os
+import shutil
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from page_archive import PageArchive, is_archive, train_dictionary
+from results_reader import iter_records_with_offsets, write_index
+from scrape_metrics import metrics
+from url_utils import normalize_url
+
+logger = logging.getLogger(__name__)
+
+# Per-run result fields that are never stored
+RUN_ONLY_KEYS = ('changed',)
+
+
+def write_json_atomic(path: str, data, indent: Optional[int] = 2):
+    """Write JSON to a temporary file and move it over the target"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=indent)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def write_results_atomic(path: str, results: Iterable[Dict]) -> Dict[str, Tuple[int, int]]:
+    """Write the results array in the legacy layout and record (and return) each page's offset"""
+    tmp_path = f"{path}.tmp"
+    offsets = {}
+    with open(tmp_path, 'w') as f:
+        f.write('[')
+        offset = 1
+        for position, result in enumerate(results):
+            separator = ',\n  ' if position else '\n  '
+            with metrics.span('json_serialize'):
+                record = json.dumps(result, indent=2).replace('\n', '\n  ')
+            with metrics.span('results_write'):
+                f.write(separator + record)
+            offset += len(separator)
+            offsets[result['url']] = (offset, len(record))
+            offset += len(record)
+        f.write('\n]' if offsets else ']')
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    write_index(path, offsets)
+    return offsets
+
+
+def load_json(path: str, default):
+    """Load a JSON file, refusing to silently discard a corrupt one"""
+    if not os.path.exists(path):
+        return default
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except json.JSONDecodeError as e:
+        logger.error(f"{path} is corrupt ({e}); fix or move it aside before resuming")
+        raise
+
+
+class ResultsJournal:
+    """Append-only JSON Lines log of scrape outcomes"""
+
+    def __init__(self, path: str, fsync_every: int = 10, fsync_interval: float = 5.0):
+        self.path = path
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.pending = 0
+        self.last_sync = time.monotonic()
+        self.file = None
+
+    def replay(self) -> Iterator[Dict]:
+        """Yield journal records, dropping a torn final line left by a crash"""
+        if not os.path.exists(self.path):
+            return
+        good_offset = 0
+        missing_newline = False
+        with open(self.path, 'rb') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    logger.warning(f"Ignoring incomplete journal record at byte {good_offset} of {self.path}")
+                    break
+                good_offset += len(line)
+                missing_newline = not line.endswith(b'\n')
+                yield record
+        with open(self.path, 'r+b') as f:
+            f.truncate(good_offset)
+            if missing_newline:
+                f.seek(good_offset)
+                f.write(b'\n')
+
+    def append(self, record: Dict):
+        """Append a record, fsyncing once per batch"""
+        if self.file is None:
+            self.file = open(self.path, 'a', encoding='utf-8')
+        with metrics.span('json_serialize'):
+            line = json.dumps(record) + '\n'
+        with metrics.span('journal_write'):
+            self.file.write(line)
+            self.file.flush()
+        metrics.incr('journal_bytes', len(line))
+        self.pending += 1
+        if self.pending >= self.fsync_every or time.monotonic() - self.last_sync >= self.fsync_interval:
+            self.sync()
+
+    def sync(self):
+        """Force appended records to disk"""
+        if self.file is not None and self.pending:
+            with metrics.span('journal_fsync'):
+                os.fsync(self.file.fileno())
+        self.pending = 0
+        self.last_sync = time.monotonic()
+
+    def reset(self):
+        """Empty the journal once its records are compacted"""
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+    def close(self):
+        """Sync and close the journal file"""
+        if self.file is not None:
+            self.sync()
+            self.file.close()
+            self.file = None
+
+
+class ResultsStore:
+    """Scraper results and progress backed by the legacy JSON files plus a journal"""
+
+    def __init__(self, results_file: str = 'scraper_results.json',
+                 progress_file: str = 'scraper_progress.json',
+                 journal_file: str = 'scraper_journal.jsonl',
+                 fsync_every: int = 10, body_dir: Optional[str] = None):
+        self.results_file = results_file
+        self.progress_file = progress_file
+        self.journal = ResultsJournal(journal_file, fsync_every=fsync_every)
+        # Bodies-on-disk mode: new bodies are spool files in body_dir until compaction
+        self.body_dir = body_dir
+        self.offsets: Dict[str, Tuple[int, int]] = {}
+
+        # Archive backend: compaction appends changed records instead of rewriting the file
+        self.use_archive = is_archive(results_file)
+        if body_dir is not None:
+            self.results: List[Dict] = self._load_without_bodies()
+        elif self.use_archive:
+            self.results = list(PageArchive(results_file)) if os.path.exists(results_file) else []
+        else:
+            self.results = load_json(results_file, [])
+        self.dirty = set()
+        self.progress: Dict = load_json(progress_file, {'completed_urls': [], 'failed_urls': [], 'current_batch': 0})
+
+        # Indexes keyed by normalized URL, built once and kept in step with the journal
+        self.completed = {normalize_url(url) for url in self.progress['completed_urls']}
+        self.failed = {normalize_url(url) for url in self.progress['failed_urls']}
+        self.result_index: Dict[str, int] = {}
+        for position, result in enumerate(self.results):
+            self.result_index[normalize_url(result['url'])] = position
+
+        replayed = 0
+        for record in self.journal.replay():
+            self._apply(record)
+            replayed += 1
+        if replayed:
+            logger.info(f"Replayed {replayed} journal records from {journal_file}")
+
+    def _load_without_bodies(self) -> List[Dict]:
+        """Load the stored records without their bodies, remembering where each body is"""
+        results = []
+        if not os.path.exists(self.results_file):
+            return results
+        if self.use_archive:
+            for record in PageArchive(self.results_file):
+                record.pop('html_content', None)
+                results.append(record)
+        else:
+            for record, offset, length in iter_records_with_offsets(self.results_file):
+                record.pop('html_content', None)
+                self.offsets[record['url']] = (offset, length)
+                results.append(record)
+        return results
+
+    def load_html(self, result: Dict) -> str:
+        """A result's page body, from the record itself, its spool file or the results file"""
+        if 'html_content' in result:
+            return result['html_content']
+        if result.get('body_file'):
+            with open(result['body_file'], 'r', encoding='utf-8', newline='') as f:
+                return f.read()
+        if self.use_archive:
+            return PageArchive(self.results_file).get(result['url'])['html_content']
+        offset, length = self.offsets[result['url']]
+        with open(self.results_file, 'rb') as f:
+            f.seek(offset)
+            return json.loads(f.read(length))['html_content']
+
+    def _with_bodies(self, results: Iterable[Dict]) -> Iterator[Dict]:
+        """Yield full records in the results format, reading bodies back one at a time"""
+        for result in results:
+            if 'html_content' in result:
+                yield result
+                continue
+            record = {key: value for key, value in result.items() if key != 'body_file'}
+            record['html_content'] = self.load_html(result)
+            yield record
+
+    def _apply(self, record: Dict):
+        """Apply a journal record to the in-memory state"""
+        kind = record.get('type')
+        if kind == 'result':
+            result = record['result']
+            if result.get('body_file') and not os.path.exists(result['body_file']):
+                # Spool file lost (e.g. removed after a crash): without its body the result is
+                # missing, so the URL is scraped again (an older stored result is kept)
+                logger.warning(f"Body file {result['body_file']} of {result['url']} is missing; "
+                               f"dropping the journaled result")
+                return
+            if self.body_dir is None and 'body_file' in result:
+                # Journal left by a bodies-on-disk run
+                result = next(self._with_bodies([result]))
+            key = normalize_url(result['url'])
+            # A newer result (refresh run, or a replay after compaction) replaces the stored one
+            if key in self.result_index:
+                self.results[self.result_index[key]] = result
+            else:
+                self.result_index[key] = len(self.results)
+                self.results.append(result)
+            self.dirty.add(key)
+            if key not in self.completed:
+                self.completed.add(key)
+                self.progress['completed_urls'].append(result['url'])
+        elif kind == 'failed':
+            key = normalize_url(record['url'])
+            if key not in self.failed:
+                self.failed.add(key)
+                self.progress['failed_urls'].append(record['url'])
+        elif kind == 'checked':
+            key = normalize_url(record['url'])
+            position = self.result_index.get(key)
+            if position is not None:
+                self.results[position]['checked_at'] = record['checked_at']
+                # Left by older runs that stored the flag
+                self.results[position].pop('changed', None)
+                self.dirty.add(key)
+        elif kind == 'batch':
+            self.progress['current_batch'] = record['current_batch']
+
+    def is_completed(self, url: str) -> bool:
+        """Whether a URL was already scraped successfully"""
+        return normalize_url(url) in self.completed
+
+    def is_failed(self, url: str) -> bool:
+        """Whether a URL has failed before"""
+        return normalize_url(url) in self.failed
+
+    def has_result(self, url: str) -> bool:
+        """Whether a URL has a stored result"""
+        return normalize_url(url) in self.result_index
+
+    def get_result(self, url: str) -> Optional[Dict]:
+        """Get the stored result for a URL"""
+        position = self.result_index.get(normalize_url(url))
+        return self.results[position] if position is not None else None
+
+    def _log(self, record: Dict):
+        """Apply a record and append it to the journal"""
+        self._apply(record)
+        self.journal.append(record)
+
+    def add_result(self, result: Dict):
+        """Record a successfully scraped page"""
+        record = {key: value for key, value in result.items() if key not in RUN_ONLY_KEYS}
+        self._log({'type': 'result', 'result': record})
+
+    def mark_unchanged(self, url: str, checked_at: str):
+        """Record that a stored page was revalidated without changes"""
+        self._log({'type': 'checked', 'url': url, 'checked_at': checked_at})
+
+    def add_failure(self, url: str):
+        """Record a URL that could not be scraped"""
+        self._log({'type': 'failed', 'url': url})
+
+    def set_batch(self, batch_num: int):
+        """Record the next batch to process"""
+        self._log({'type': 'batch', 'current_batch': batch_num})
+
+    def _append_to_archive(self):
+        """Append the results changed since the last compaction to the archive"""
+        changed = [self.results[self.result_index[key]] for key in self.dirty]
+        dictionary = None
+        if not os.path.exists(self.results_file) and changed:
+            # New archive: train the shared dictionary on the first pages
+            dictionary = train_dictionary([self.load_html(result) for result in changed[:50]])
+        archive = PageArchive(self.results_file, dictionary=dictionary)
+        for result in self._with_bodies(changed):
+            archive.append(result)
+        archive.close()
+
+    def _release_bodies(self):
+        """Drop the spool files once their bodies are in the results file"""
+        for result in self.results:
+            result.pop('body_file', None)
+        if os.path.isdir(self.body_dir):
+            shutil.rmtree(self.body_dir)
+
+    def compact(self):
+        """Rewrite the legacy JSON files from the current state and empty the journal"""
+        self.journal.sync()
+        if self.use_archive:
+            self._append_to_archive()
+        else:
+            offsets = write_results_atomic(self.results_file, self._with_bodies(self.results))
+            if self.body_dir is not None:
+                self.offsets = offsets
+        write_json_atomic(self.progress_file, self.progress)
+        self.journal.reset()
+        # After the journal reset, so a crash never leaves records pointing at removed files
+        if self.body_dir is not None:
+            self._release_bodies()
+        self.dirty.clear()
+        logger.info(f"Compacted {len(self.results)} results into {self.results_file}")
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Conditional re-crawl helpers shared by the scrapers
+- ETag / Last-Modified validators and a body hash stored with each result
+- If-None-Match / If-Modified-Since headers for refresh runs
+- 304 or identical body keeps the stored record and marks it unchanged
+- Results for bodies streamed to disk carry the body file instead of the HTML
+"""
+
+import hashlib
+from datetime import datetime
+from typing import Dict, Optional
+
+
+def content_hash(text: str) -> str:
+    """Hash a page body"""
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def conditional_headers(previous: Optional[Dict]) -> Dict[str, str]:
+    """Build conditional request headers from a stored result"""
+    headers = {}
+    if previous:
+        if previous.get('etag'):
+            headers['If-None-Match'] = previous['etag']
+        if previous.get('last_modified'):
+            headers['If-Modified-Since'] = previous['last_modified']
+    return headers
+
+
+def build_result(url: str, response, previous: Optional[Dict] = None) -> Dict:
+    """Build a result record from a response, reusing the stored record when unchanged"""
+    checked_at = datetime.now().isoformat()
+
+    if previous and response.status_code == 304:
+        return {**previous, 'checked_at': checked_at, 'changed': False}
+
+    body_hash = content_hash(response.text)
+    if previous:
+        previous_hash = previous.get('content_hash') or content_hash(previous['html_content'])
+        if body_hash == previous_hash:
+            return {**previous, 'content_hash': body_hash, 'checked_at': checked_at, 'changed': False}
+
+    return {
+        'url': url,
+        'html_content': response.text,
+        'scraped_at': checked_at,
+        'status_code': response.status_code,
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+        'content_hash': body_hash,
+        'checked_at': checked_at,
+        'changed': True
+    }
+
+
+def build_streamed_result(url: str, response, page: Optional[Dict], previous: Optional[Dict] = None) -> Dict:
+    """Like build_result, for a body already written to disk (page_stream.BodySpool.capture)"""
+    checked_at = datetime.now().isoformat()
+
+    if previous and (response.status_code == 304 or previous.get('content_hash') == page['content_hash']):
+        return {**previous, 'checked_at': checked_at, 'changed': False}
+
+    # Same fields as build_result, with the body file in place of the HTML; the links only
+    # feed the crawl frontier and are dropped before the result is journaled
+    return {
+        'url': url,
+        'body_file': page['body_file'],
+        'links': page['links'],
+        'scraped_at': checked_at,
+        'status_code': response.status_code,
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+        'content_hash': page['content_hash'],
+        'checked_at': checked_at,
+        'changed': True
+    }
@@ -3,16 +3,20 @@
 Scrape additional blog pages and add them to the existing results
 """
 
+import argparse
 import requests
 from bs4 import BeautifulSoup
 import time
 import random
-import json
-import os
-from urllib.parse import urlparse
-from datetime import datetime
 import logging
 
+from http_transport import shared_transport
+from rate_limiter import PERMANENT, classify_failure, retry_after_seconds
+from results_store import ResultsStore
+from revalidation import build_result, conditional_headers
+from scrape_metrics import metrics
+from url_utils import url_to_filename
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -25,8 +29,12 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 class AdditionalScraper:
-    def __init__(self):
-        self.session = requests.Session()
+    def __init__(self, min_delay=2, max_delay=5, results_file='scraper_results.json', http2=False):
+        self.results_file = results_file  # legacy JSON or a page archive (*.archive)
+        self.min_delay = min_delay
+        self.max_delay = max_delay
+        # Pooled keep-alive connections shared with the other scrapers in this process
+        self.transport = shared_transport(http2=http2)
         
         # User agents for rotation
         self.user_agents = [
@@ -35,52 +43,54 @@ class AdditionalScraper:
             'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36 Edg/120.0.0.0',
             'Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15; rv:121.0) Gecko/20100101 Firefox/121.0'
         ]
-        
-        # Session configuration
-        self.session.headers.update({
-            'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-            'Accept-Language': 'en-US,en;q=0.5',
-            'Accept-Encoding': 'gzip, deflate',
-            'Connection': 'keep-alive',
-            'Upgrade-Insecure-Requests': '1',
-        })
+
     
     def get_random_user_agent(self):
         """Get a random user agent"""
         return random.choice(self.user_agents)
     
-    def scrape_url(self, url, retries=3):
-        """Scrape a single URL with retry logic"""
+    def scrape_url(self, url, retries=3, previous=None):
+        """Scrape a single URL with retry logic, revalidating against a previous result if given"""
         for attempt in range(retries):
             try:
-                # Update user agent for each request
-                self.session.headers.update({
-                    'User-Agent': self.get_random_user_agent()
-                })
+                # Rotate user agent per request
+                headers = {'User-Agent': self.get_random_user_agent()}
+                headers.update(conditional_headers(previous))
                 
                 logger.info(f"Scraping: {url} (attempt {attempt + 1}/{retries})")
                 
-                response = self.session.get(url, timeout=30)
+                # The transport times TTFB and the (size-capped) body download
+                response = self.transport.get(url, headers=headers, timeout=30)
                 response.raise_for_status()
                 
-                # Save the full HTML content
-                result = {
-                    'url': url,
-                    'html_content': response.text,
-                    'scraped_at': datetime.now().isoformat(),
-                    'status_code': response.status_code
-                }
+                # Save the full HTML content with its validators
+                result = build_result(url, response, previous)
                 
-                logger.info(f"Successfully scraped: {url}")
+                if result['changed']:
+                    metrics.incr('pages_fetched')
+                    logger.info(f"Successfully scraped: {url}")
+                else:
+                    metrics.incr('pages_unchanged')
+                    logger.info(f"Unchanged since last backup: {url}")
                 return result
                 
             except requests.exceptions.RequestException as e:
                 logger.warning(f"Attempt {attempt + 1} failed for {url}: {e}")
+                if classify_failure(e) == PERMANENT:
+                    # 404s and friends will not change on a retry
+                    metrics.incr('pages_failed_permanent')
+                    logger.error(f"Permanent failure for {url}, not retrying")
+                    return None
                 if attempt < retries - 1:
-                    wait_time = (2 ** attempt) * 2
+                    # Honour Retry-After on 429/503
+                    retry_after = retry_after_seconds(getattr(e, 'response', None)) or 0
+                    wait_time = max(retry_after, (2 ** attempt) * self.min_delay)
                     logger.info(f"Waiting {wait_time} seconds before retry...")
-                    time.sleep(wait_time)
+                    metrics.incr('retries')
+                    with metrics.span('sleep_retry_backoff'):
+                        time.sleep(wait_time)
                 else:
+                    metrics.incr('pages_failed')
                     logger.error(f"All attempts failed for {url}")
                     return None
             except Exception as e:
@@ -89,19 +99,7 @@ class AdditionalScraper:
     
     def url_to_filename(self, url):
         """Convert URL to filename"""
-        parsed = urlparse(url)
-        path = parsed.path.strip('/')
-        if not path:
-            path = 'index'
-        
-        # Extract the blog post slug from the path
-        if '/blog/' in path:
-            slug = path.split('/blog/')[-1]
-            filename = f"blog_{slug.replace('-', '_')}.html"
-        else:
-            filename = path.replace('/', '_').replace('-', '_') + '.html'
-        
-        return filename
+        return url_to_filename(url)
     
     def create_html_file(self, page_data):
         """Create HTML file from scraped data"""
@@ -113,16 +111,12 @@ class AdditionalScraper:
         logger.info(f"Created HTML file: {filename}")
         return filename
     
-    def scrape_additional_pages(self, urls):
-        """Scrape the additional pages"""
+    def scrape_additional_pages(self, urls, refresh=False):
+        """Scrape the additional pages (refresh revalidates pages already in the results)"""
         results = []
         
-        # Load existing results if they exist
-        if os.path.exists('scraper_results.json'):
-            with open('scraper_results.json', 'r') as f:
-                existing_results = json.load(f)
-        else:
-            existing_results = []
+        # Load existing results (legacy JSON plus any journal left by a crash)
+        store = ResultsStore(self.results_file)
         
         logger.info(f"Starting to scrape {len(urls)} additional pages")
         
@@ -130,23 +124,22 @@ class AdditionalScraper:
             logger.info(f"Processing {i+1}/{len(urls)}: {url}")
             
             # Check if URL already exists
-            if any(existing['url'] == url for existing in existing_results):
+            if store.has_result(url) and not refresh:
                 logger.info(f"URL already exists in results, skipping: {url}")
                 continue
             
-            result = self.scrape_url(url)
-            if result:
+            result = self.scrape_url(url, previous=store.get_result(url))
+            if result and not result['changed']:
+                # Keep the stored record and the existing HTML file
+                store.mark_unchanged(url, result['checked_at'])
+            elif result:
                 results.append(result)
                 
                 # Create individual HTML file
                 self.create_html_file(result)
                 
                 # Add to existing results
-                existing_results.append(result)
-                
-                # Save updated results
-                with open('scraper_results.json', 'w') as f:
-                    json.dump(existing_results, f, indent=2)
+                store.add_result(result)
                 
                 logger.info(f"Added to results: {url}")
             else:
@@ -154,15 +147,23 @@ class AdditionalScraper:
             
             # Wait between requests
             if i < len(urls) - 1:
-                delay = random.uniform(2, 5)
+                delay = random.uniform(self.min_delay, self.max_delay)
                 logger.info(f"Waiting {delay:.2f} seconds...")
-                time.sleep(delay)
+                with metrics.span('sleep_politeness'):
+                    time.sleep(delay)
         
+        with metrics.span('compact'):
+            store.compact()
         logger.info(f"Scraping completed! Successfully scraped {len(results)} additional pages")
         return results
 
 def main():
     """Main function"""
+    parser = argparse.ArgumentParser(description="Scrape additional blog pages")
+    parser.add_argument('--refresh', action='store_true',
+                        help="Revalidate pages already in the results and keep unchanged ones")
+    args = parser.parse_args()
+    
     additional_urls = [
         "https://melissalouise.mykajabi.com/blog/feminine-embodiment-is-such-a-catch-phrase-now-a-days",
         "https://melissalouise.mykajabi.com/blog/the-hypocrisy-many-men-refuse-to-address-with-pornography",
@@ -170,7 +171,7 @@ def main():
     ]
     
     scraper = AdditionalScraper()
-    results = scraper.scrape_additional_pages(additional_urls)
+    results = scraper.scrape_additional_pages(additional_urls, refresh=args.refresh)
     
     print(f"\n✅ Successfully scraped {len(results)} additional pages!")
     print("Files created:")
@@ -178,8 +179,10 @@ def main():
         filename = scraper.url_to_filename(result['url'])
         print(f"  - {filename}")
     
+    print(f"\n📊 Run metrics: {metrics.write('additional')}")
+    
     print("\n🔄 Next steps:")
-    print("1. Run generate_index.py to update the main index")
+    print("1. Run build_site.py to update the pages and the main index")
     print("2. Commit and push changes")
 
 if __name__ == "__main__":
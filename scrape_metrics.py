@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+Run metrics for the scrapers and the site build
+- Timing spans and counters in one process-wide registry
+- Per-run JSON metrics file and an optional Prometheus text endpoint
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+
+# Samples kept per timing for percentiles; totals and counts stay exact
+MAX_SAMPLES = 10000
+
+
+class Metrics:
+    """Thread-safe counters and timings"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.started = time.time()
+        self.counters: Dict[str, float] = {}
+        self.timings: Dict[str, Dict] = {}
+
+    def incr(self, name: str, value: float = 1):
+        """Add to a counter"""
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name: str, seconds: float):
+        """Record one timing"""
+        with self.lock:
+            timing = self.timings.setdefault(name, {'count': 0, 'total': 0.0, 'max': 0.0, 'samples': []})
+            timing['count'] += 1
+            timing['total'] += seconds
+            timing['max'] = max(timing['max'], seconds)
+            if len(timing['samples']) < MAX_SAMPLES:
+                timing['samples'].append(seconds)
+
+    @contextmanager
+    def span(self, name: str):
+        """Time a block of code"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - started)
+
+    def snapshot(self) -> Dict:
+        """Summarize counters and timings"""
+        with self.lock:
+            timings = {}
+            for name, timing in self.timings.items():
+                samples = sorted(timing['samples'])
+                timings[name] = {
+                    'count': timing['count'],
+                    'total_seconds': round(timing['total'], 6),
+                    'mean_seconds': round(timing['total'] / timing['count'], 6),
+                    'p50_seconds': round(_percentile(samples, 50), 6),
+                    'p99_seconds': round(_percentile(samples, 99), 6),
+                    'max_seconds': round(timing['max'], 6),
+                }
+            return {
+                'started_at': datetime.fromtimestamp(self.started).isoformat(),
+                'elapsed_seconds': round(time.time() - self.started, 3),
+                'counters': dict(self.counters),
+                'timings': timings,
+            }
+
+    def write(self, run_name: str, directory: str = 'metrics') -> str:
+        """Write this run's metrics to a timestamped JSON file"""
+        os.makedirs(directory, exist_ok=True)
+        stamp = datetime.fromtimestamp(self.started).strftime('%Y%m%d-%H%M%S')
+        path = os.path.join(directory, f"{run_name}-{stamp}.json")
+        with open(path, 'w') as f:
+            json.dump({'run': run_name, **self.snapshot()}, f, indent=2)
+        return path
+
+    def prometheus_text(self) -> str:
+        """Render metrics in the Prometheus text exposition format"""
+        snapshot = self.snapshot()
+        lines = []
+        for name, value in sorted(snapshot['counters'].items()):
+            metric = f"kajabi_backup_{_metric_name(name)}_total"
+            lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+        for name, timing in sorted(snapshot['timings'].items()):
+            metric = f"kajabi_backup_{_metric_name(name)}_seconds"
+            lines += [
+                f"# TYPE {metric} summary",
+                f'{metric}{{quantile="0.5"}} {timing["p50_seconds"]}',
+                f'{metric}{{quantile="0.99"}} {timing["p99_seconds"]}',
+                f"{metric}_sum {timing['total_seconds']}",
+                f"{metric}_count {timing['count']}",
+            ]
+        return '\n'.join(lines) + '\n'
+
+    def serve(self, port: int, host: str = '127.0.0.1') -> ThreadingHTTPServer:
+        """Expose /metrics for Prometheus in a background thread (local only unless host says otherwise)"""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path != '/metrics':
+                    self.send_error(404)
+                    return
+                body = registry.prometheus_text().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        return server
+
+
+def _percentile(ordered: List[float], pct: float) -> float:
+    """Nearest-rank percentile of sorted samples"""
+    if not ordered:
+        return 0.0
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[rank]
+
+
+def _metric_name(name: str) -> str:
+    """Make a metric name Prometheus-safe"""
+    return ''.join(c if c.isalnum() else '_' for c in name)
+
+
+# Process-wide registry
+metrics = Metrics()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Prebuilt full-text search index for the backup site
+- Tokenized, accent-folded and lightly stemmed page text (from the extraction stage)
+- Inverted index split into hashed shards: a query only loads the shards of its terms
+- The tokenizer rules ship in search/meta.json so the browser tokenizes queries the same way
+"""
+
+import json
+import math
+import re
+import unicodedata
+from collections import Counter
+from typing import Dict, List
+
+SEARCH_DIR = 'search'
+TERMS_PER_SHARD = 2000
+DESCRIPTION_LENGTH = 160
+
+# Suffix -> replacement, first match wins; the stem must keep at least MIN_STEM characters
+STEM_RULES = [
+    ['ingly', ''], ['edly', ''], ['ies', 'y'], ['ied', 'y'], ['ing', ''], ['ed', ''], ['ly', ''], ['s', ''],
+]
+MIN_STEM = 3
+
+STOPWORDS = sorted({
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'but', 'by', 'for', 'from', 'has', 'have', 'he', 'her',
+    'his', 'i', 'if', 'in', 'into', 'is', 'it', 'its', 'me', 'my', 'not', 'of', 'on', 'or', 'our', 'she',
+    'so', 'that', 'the', 'their', 'them', 'there', 'they', 'this', 'to', 'was', 'we', 'were', 'what',
+    'when', 'which', 'who', 'will', 'with', 'you', 'your',
+})
+_STOPWORDS = set(STOPWORDS)
+
+TOKEN_PATTERN = re.compile(r'[^\W_]+')
+
+
+def fold(text: str) -> str:
+    """Lowercase and strip accents"""
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def stem(word: str) -> str:
+    """Light suffix stripping (mirrored in the index.html search script)"""
+    for suffix, replacement in STEM_RULES:
+        if word.endswith(suffix) and len(word) - len(suffix) >= MIN_STEM:
+            word = word[:-len(suffix)] + replacement
+            break
+    if word.endswith('e') and len(word) > MIN_STEM:
+        word = word[:-1]
+    return word
+
+
+def tokenize(text: str) -> List[str]:
+    """Search terms of a text"""
+    return [stem(token) for token in TOKEN_PATTERN.findall(fold(text))
+            if len(token) > 1 and token not in _STOPWORDS]
+
+
+def shard_of(term: str, shard_count: int) -> int:
+    """FNV-1a hash of the term's code points (mirrored in the search script)"""
+    h = 0x811c9dc5
+    for c in term:
+        h = ((h ^ ord(c)) * 0x01000193) & 0xffffffff
+    return h % shard_count
+
+
+def build_search_index(docs: List[Dict]) -> Dict[str, str]:
+    """Build the index files from {'title', 'url', 'href', 'description', 'text'} docs; returns path -> JSON"""
+    postings: Dict[str, List[int]] = {}
+    for doc_id, doc in enumerate(docs):
+        # Title words count extra
+        counts = Counter(tokenize(doc.get('text') or ''))
+        for term in tokenize(doc['title']):
+            counts[term] += 3
+        for term, count in sorted(counts.items()):
+            postings.setdefault(term, []).extend([doc_id, count])
+
+    shard_count = max(1, math.ceil(len(postings) / TERMS_PER_SHARD))
+    shards: List[Dict[str, List[int]]] = [{} for _ in range(shard_count)]
+    for term in sorted(postings):
+        shards[shard_of(term, shard_count)][term] = postings[term]
+
+    compact = {'separators': (',', ':'), 'ensure_ascii': False}
+    files = {
+        f"{SEARCH_DIR}/meta.json": json.dumps({
+            'version': 1,
+            'doc_count': len(docs),
+            'shard_count': shard_count,
+            'stem_rules': STEM_RULES,
+            'min_stem': MIN_STEM,
+            'stopwords': STOPWORDS,
+        }, **compact),
+        f"{SEARCH_DIR}/docs.json": json.dumps([
+            [doc['title'], doc['href'], (doc.get('description') or '')[:DESCRIPTION_LENGTH]] for doc in docs
+        ], **compact),
+    }
+    for number, shard in enumerate(shards):
+        files[f"{SEARCH_DIR}/shard-{number}.json"] = json.dumps(shard, **compact)
+    return files
@@ -0,0 +1,245 @@
+#!/usr/bin/env python3
+"""
+Versioned snapshots of the backup with deduplicated storage
+- Each crawl is recorded as a snapshot manifest (URL -> page metadata and chunk list)
+- Page bodies are split into content-defined chunks stored once per SHA-256
+  (a page that changed in one place only adds the chunks around the change)
+- diff between snapshots (pages added/removed/changed, or a unified diff of one page)
+- restore a snapshot to page files and/or a results file
+"""
+
+import argparse
+import difflib
+import hashlib
+import json
+import os
+import zlib
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from results_reader import iter_results
+from results_store import write_results_atomic
+from url_utils import url_to_filename
+
+SNAPSHOT_DIR = 'snapshots'
+# Chunk boundaries fall after lines whose hash matches the mask (about one line in 32)
+# once a chunk has MIN_CHUNK bytes, so an edit only changes the chunks around it;
+# long lines are split at MAX_CHUNK
+BOUNDARY_MASK = 0x1f
+MIN_CHUNK = 8 * 1024
+MAX_CHUNK = 64 * 1024
+PAGE_FIELDS = ('status_code', 'scraped_at', 'checked_at', 'etag', 'last_modified', 'content_hash')
+
+
+def chunk_text(text: str) -> Iterator[bytes]:
+    """Split a page into content-defined chunks"""
+    chunk = []
+    size = 0
+    for line in text.encode('utf-8').splitlines(keepends=True):
+        while len(line) > MAX_CHUNK:
+            if chunk:
+                yield b''.join(chunk)
+                chunk, size = [], 0
+            yield line[:MAX_CHUNK]
+            line = line[MAX_CHUNK:]
+        chunk.append(line)
+        size += len(line)
+        if (size >= MIN_CHUNK and zlib.crc32(line) & BOUNDARY_MASK == 0) or size >= MAX_CHUNK:
+            yield b''.join(chunk)
+            chunk, size = [], 0
+    if chunk:
+        yield b''.join(chunk)
+
+
+class SnapshotStore:
+    """Snapshot manifests plus a shared content-addressed chunk store"""
+
+    def __init__(self, root: str = SNAPSHOT_DIR):
+        self.root = root
+        self.chunk_dir = os.path.join(root, 'chunks')
+        self.manifest_dir = os.path.join(root, 'manifests')
+        self.stats = {'chunks_written': 0, 'bytes_written': 0, 'chunks_reused': 0}
+
+    def _chunk_path(self, digest: str) -> str:
+        return os.path.join(self.chunk_dir, digest[:2], digest)
+
+    def put_chunk(self, data: bytes) -> str:
+        """Store a chunk unless it already exists, returning its hash"""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._chunk_path(digest)
+        if os.path.exists(path):
+            self.stats['chunks_reused'] += 1
+            return digest
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        compressed = zlib.compress(data, 9)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(compressed)
+        os.replace(tmp_path, path)
+        self.stats['chunks_written'] += 1
+        self.stats['bytes_written'] += len(compressed)
+        return digest
+
+    def get_chunk(self, digest: str) -> bytes:
+        with open(self._chunk_path(digest), 'rb') as f:
+            return zlib.decompress(f.read())
+
+    def snapshot_ids(self) -> List[str]:
+        """Snapshot ids, oldest first"""
+        if not os.path.isdir(self.manifest_dir):
+            return []
+        return sorted(name[:-5] for name in os.listdir(self.manifest_dir) if name.endswith('.json'))
+
+    def resolve(self, snapshot_id: Optional[str], offset: int = 0) -> str:
+        """A snapshot id, or the latest (offset=1: the one before it) when None"""
+        ids = self.snapshot_ids()
+        if snapshot_id is None:
+            if len(ids) <= offset:
+                raise ValueError("Not enough snapshots")
+            return ids[-1 - offset]
+        matches = [i for i in ids if i.startswith(snapshot_id)]
+        if len(matches) != 1:
+            raise ValueError(f"Unknown or ambiguous snapshot: {snapshot_id}")
+        return matches[0]
+
+    def load(self, snapshot_id: str) -> Dict:
+        with open(os.path.join(self.manifest_dir, f"{snapshot_id}.json"), 'r') as f:
+            return json.load(f)
+
+    def record(self, pages: Iterable[Dict], source: str = '') -> str:
+        """Store a snapshot of page records and return its id"""
+        snapshot_id = datetime.now().strftime('%Y%m%d-%H%M%S')
+        if os.path.exists(os.path.join(self.manifest_dir, f"{snapshot_id}.json")):
+            snapshot_id += datetime.now().strftime('-%f')
+        manifest = {'id': snapshot_id, 'created_at': datetime.now().isoformat(), 'source': source, 'pages': {}}
+        for page in pages:
+            entry = {field: page.get(field) for field in PAGE_FIELDS if page.get(field) is not None}
+            entry['chunks'] = [self.put_chunk(chunk) for chunk in chunk_text(page['html_content'])]
+            manifest['pages'][page['url']] = entry
+
+        os.makedirs(self.manifest_dir, exist_ok=True)
+        path = os.path.join(self.manifest_dir, f"{snapshot_id}.json")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(manifest, f, separators=(',', ':'))
+        os.replace(tmp_path, path)
+        return snapshot_id
+
+    def page_html(self, entry: Dict) -> str:
+        """Reassemble a page body from its chunks"""
+        return b''.join(self.get_chunk(digest) for digest in entry['chunks']).decode('utf-8')
+
+    def iter_pages(self, snapshot_id: str) -> Iterator[Dict]:
+        """Yield the page records of a snapshot in the results format"""
+        for url, entry in self.load(snapshot_id)['pages'].items():
+            record = {'url': url, 'html_content': self.page_html(entry)}
+            record.update({field: entry[field] for field in PAGE_FIELDS if field in entry})
+            yield record
+
+    def diff(self, old_id: str, new_id: str) -> Dict[str, List[str]]:
+        """URLs added, removed and changed between two snapshots"""
+        old = self.load(old_id)['pages']
+        new = self.load(new_id)['pages']
+        return {
+            'added': sorted(set(new) - set(old)),
+            'removed': sorted(set(old) - set(new)),
+            'changed': sorted(url for url in set(old) & set(new) if old[url]['chunks'] != new[url]['chunks']),
+        }
+
+    def page_diff(self, old_id: str, new_id: str, url: str) -> str:
+        """Unified diff of one page between two snapshots"""
+        old = self.load(old_id)['pages'].get(url)
+        new = self.load(new_id)['pages'].get(url)
+        old_lines = self.page_html(old).splitlines(keepends=True) if old else []
+        new_lines = self.page_html(new).splitlines(keepends=True) if new else []
+        return ''.join(difflib.unified_diff(old_lines, new_lines, f"{old_id}/{url}", f"{new_id}/{url}"))
+
+    def prune(self, keep: int) -> int:
+        """Delete all but the newest snapshots and the chunks only they used; returns chunks removed"""
+        ids = self.snapshot_ids()
+        for snapshot_id in ids[:-keep] if keep else ids:
+            os.remove(os.path.join(self.manifest_dir, f"{snapshot_id}.json"))
+        live = {digest for snapshot_id in self.snapshot_ids()
+                for entry in self.load(snapshot_id)['pages'].values() for digest in entry['chunks']}
+        removed = 0
+        for prefix in os.listdir(self.chunk_dir) if os.path.isdir(self.chunk_dir) else []:
+            for digest in os.listdir(os.path.join(self.chunk_dir, prefix)):
+                if digest not in live:
+                    os.remove(os.path.join(self.chunk_dir, prefix, digest))
+                    removed += 1
+        return removed
+
+
+def main():
+    """Main function"""
+    parser = argparse.ArgumentParser(description="Versioned snapshots of the scraped pages")
+    parser.add_argument('--root', default=SNAPSHOT_DIR, help="Snapshot directory")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    snapshot_parser = subparsers.add_parser('snapshot', help="Record the current results as a snapshot")
+    snapshot_parser.add_argument('results_file', nargs='?', default='scraper_results.json')
+
+    subparsers.add_parser('list', help="List snapshots")
+
+    diff_parser = subparsers.add_parser('diff', help="Compare two snapshots (default: the last two)")
+    diff_parser.add_argument('old', nargs='?', help="Older snapshot id (prefix)")
+    diff_parser.add_argument('new', nargs='?', help="Newer snapshot id (prefix)")
+    diff_parser.add_argument('--url', help="Show a unified diff of this page")
+
+    restore_parser = subparsers.add_parser('restore', help="Write a snapshot's pages back out")
+    restore_parser.add_argument('snapshot', nargs='?', help="Snapshot id (prefix, default: latest)")
+    restore_parser.add_argument('--output-dir', default=None, help="Write the page .html files here")
+    restore_parser.add_argument('--results-file', default=None, help="Write a results file in the legacy format")
+
+    prune_parser = subparsers.add_parser('prune', help="Keep only the newest snapshots")
+    prune_parser.add_argument('--keep', type=int, required=True)
+
+    args = parser.parse_args()
+    store = SnapshotStore(args.root)
+
+    if args.command == 'snapshot':
+        snapshot_id = store.record(iter_results(args.results_file), source=args.results_file)
+        pages = len(store.load(snapshot_id)['pages'])
+        print(f"✅ Recorded snapshot {snapshot_id} ({pages} pages)")
+        print(f"   - New chunks: {store.stats['chunks_written']} ({store.stats['bytes_written'] / 1024:.0f} KB)")
+        print(f"   - Reused chunks: {store.stats['chunks_reused']}")
+    elif args.command == 'list':
+        for snapshot_id in store.snapshot_ids():
+            manifest = store.load(snapshot_id)
+            print(f"{snapshot_id}  {len(manifest['pages']):4d} pages  {manifest.get('source', '')}")
+    elif args.command == 'diff':
+        new_id = store.resolve(args.new) if args.new else store.resolve(None)
+        old_id = store.resolve(args.old) if args.old else store.resolve(None, offset=1)
+        if args.url:
+            print(store.page_diff(old_id, new_id, args.url), end='')
+        else:
+            changes = store.diff(old_id, new_id)
+            print(f"Changes from {old_id} to {new_id}:")
+            for kind, symbol in (('added', '+'), ('removed', '-'), ('changed', '~')):
+                for url in changes[kind]:
+                    print(f"  {symbol} {url}")
+            print(f"{len(changes['added'])} added, {len(changes['removed'])} removed, "
+                  f"{len(changes['changed'])} changed")
+    elif args.command == 'restore':
+        snapshot_id = store.resolve(args.snapshot)
+        if not args.output_dir and not args.results_file:
+            parser.error("restore needs --output-dir and/or --results-file")
+        if args.output_dir:
+            os.makedirs(args.output_dir, exist_ok=True)
+            count = 0
+            for page in store.iter_pages(snapshot_id):
+                with open(os.path.join(args.output_dir, url_to_filename(page['url'])), 'w',
+                          encoding='utf-8', newline='') as f:
+                    f.write(page['html_content'])
+                count += 1
+            print(f"✅ Restored {count} pages from {snapshot_id} into {args.output_dir}")
+        if args.results_file:
+            write_results_atomic(args.results_file, list(store.iter_pages(snapshot_id)))
+            print(f"✅ Restored {snapshot_id} to {args.results_file}")
+    elif args.command == 'prune':
+        removed = store.prune(args.keep)
+        print(f"✅ Kept {len(store.snapshot_ids())} snapshots, removed {removed} unused chunks")
+
+
+if __name__ == "__main__":
+    main()
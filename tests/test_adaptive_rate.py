@@ -0,0 +1,99 @@
+import threading
+import time
+
+import pytest
+
+from enhanced_scraper import EnhancedKajabiScraper
+from rate_limiter import (MIN_RATE, PERMANENT, THROTTLED, TRANSIENT, AdaptiveRateController, TokenBucket,
+                          classify_status, retry_after_seconds)
+
+URL = 'https://site.test/page'
+
+
+class FakeResponse:
+    def __init__(self, headers):
+        self.headers = headers
+
+
+def test_additive_increase_stops_at_max_rate():
+    controller = AdaptiveRateController(1.0, min_rate=0.1, max_rate=1.2, increase=0.05)
+    for _ in range(10):
+        controller.record_success(URL, 0.1)
+    assert controller.rate_for(URL) == pytest.approx(1.2)
+
+
+def test_multiplicative_decrease_stops_at_min_rate():
+    controller = AdaptiveRateController(1.0, min_rate=0.1, max_rate=1.0, decrease=0.5)
+    controller.record_failure(URL, THROTTLED)
+    assert controller.rate_for(URL) == pytest.approx(0.5)
+    for _ in range(10):
+        controller.record_failure(URL, TRANSIENT)
+    assert controller.rate_for(URL) == pytest.approx(0.1)
+
+
+def test_permanent_failures_leave_the_rate_alone():
+    controller = AdaptiveRateController(1.0)
+    controller.record_failure(URL, PERMANENT)
+    assert controller.rate_for(URL) == 1.0
+
+
+def test_latency_spike_backs_off():
+    controller = AdaptiveRateController(1.0, max_rate=1.0, spike_factor=3.0)
+    for _ in range(5):
+        controller.record_success(URL, 0.1)
+    controller.record_success(URL, 1.0)
+    assert controller.rate_for(URL) == pytest.approx(0.5)
+
+
+def test_retry_after_blocks_the_host():
+    controller = AdaptiveRateController(100.0, max_rate=100.0)
+    controller.record_failure(URL, THROTTLED, retry_after=0.5)
+    assert controller.bucket(URL).reserve() == pytest.approx(0.5, abs=0.05)
+
+
+def test_rate_change_keeps_tokens_earned_at_the_old_rate():
+    bucket = TokenBucket(rate=10, burst=5)
+    bucket.tokens = 0.0
+    bucket.updated = time.monotonic() - 0.2
+    bucket.set_rate(lambda rate: rate / 10)
+    # Two tokens were earned at 10/s before the rate dropped
+    assert bucket.tokens == pytest.approx(2.0, abs=0.05)
+    assert bucket.rate == 1.0
+
+
+def test_concurrent_updates_are_not_lost():
+    controller = AdaptiveRateController(0.0, min_rate=0.0, max_rate=1e9, increase=1.0)
+
+    def succeed():
+        for _ in range(200):
+            controller.record_success(URL, 0.1)
+
+    threads = [threading.Thread(target=succeed) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert controller.rate_for(URL) == pytest.approx(1600)
+
+
+def test_scraper_never_exceeds_host_rate_by_default(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    scraper = EnhancedKajabiScraper(base_delay=2, max_delay=5, host_rate=0.3)
+    assert scraper.rate_controller.max_rate == 0.3
+    # Throttled hosts may back off beyond one request per max_delay
+    assert scraper.rate_controller.min_rate == MIN_RATE < 1 / 5
+
+
+def test_scraper_max_host_rate_opt_in_respects_base_delay(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assert EnhancedKajabiScraper(base_delay=2, host_rate=0.3, max_host_rate=0.4).rate_controller.max_rate == 0.4
+    assert EnhancedKajabiScraper(base_delay=2, host_rate=0.3, max_host_rate=5).rate_controller.max_rate == 0.5
+
+
+def test_failure_classification_and_retry_after():
+    assert classify_status(429) == THROTTLED
+    assert classify_status(404) == PERMANENT
+    assert classify_status(502) == TRANSIENT
+    assert retry_after_seconds(FakeResponse({'Retry-After': '7'})) == 7.0
+    assert retry_after_seconds(FakeResponse({'Retry-After': 'Thu, 01 Jan 1970 00:00:00 GMT'})) == 0.0
+    assert retry_after_seconds(FakeResponse({})) is None
@@ -0,0 +1,42 @@
+from asset_store import AssetStore, hash_bytes
+
+
+def test_identical_bytes_are_stored_once(tmp_path):
+    store = AssetStore(str(tmp_path / 'assets'))
+    first = store.put('https://cdn.test/a/logo.png', b'png-bytes', 'image/png')
+    second = store.put('https://cdn.test/b/logo-copy.png', b'png-bytes', 'image/png')
+    assert first == second
+    assert len(list((tmp_path / 'assets').iterdir())) == 1
+    assert store.lookup('https://cdn.test/b/logo-copy.png') == first
+
+
+def test_manifest_lets_reruns_skip_stored_urls(tmp_path):
+    store = AssetStore(str(tmp_path / 'assets'))
+    name = store.put('https://cdn.test/app.js', b'js')
+    store.save()
+    assert AssetStore(str(tmp_path / 'assets')).lookup('https://cdn.test/app.js') == name
+    # A file deleted behind the store's back is not reported as stored
+    (tmp_path / 'assets' / name).unlink()
+    assert AssetStore(str(tmp_path / 'assets')).lookup('https://cdn.test/app.js') is None
+
+
+def test_extensionless_urls_get_an_extension(tmp_path):
+    store = AssetStore(str(tmp_path / 'assets'))
+    assert store.put('https://fonts.test/css?family=X', b'body{}', 'text/css; charset=utf-8').endswith('.css')
+
+
+def test_deduplicate_points_pages_at_the_canonical_file(tmp_path):
+    assets = tmp_path / 'assets'
+    assets.mkdir()
+    (assets / 'photo.jpg').write_bytes(b'same')
+    (assets / 'photo_1.jpg').write_bytes(b'same')
+    (assets / 'other.jpg').write_bytes(b'different')
+    page = tmp_path / 'page.html'
+    page.write_text('<img src="assets/photo_1.jpg"><img src="https://cdn.test/assets/photo_1.jpg">')
+
+    store = AssetStore(str(assets))
+    assert store.deduplicate([str(page)]) == len(b'same')
+    assert not (assets / 'photo_1.jpg').exists()
+    # Only local references change, never CDN paths that happen to contain /assets/
+    assert page.read_text() == '<img src="assets/photo.jpg"><img src="https://cdn.test/assets/photo_1.jpg">'
+    assert store.files[hash_bytes(b'same')] == 'photo.jpg'
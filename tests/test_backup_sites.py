@@ -0,0 +1,176 @@
+import functools
+import json
+import os
+import threading
+import time
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from backup_sites import HOST_STRIPES, FleetLimits, estimated_seconds, load_sites, run_fleet
+from benchmark import MockKajabiServer
+
+
+class FakeManager:
+    def BoundedSemaphore(self, value):
+        return value
+
+
+@pytest.fixture
+def server():
+    mock = MockKajabiServer()
+    mock.start()
+    yield mock
+    mock.stop()
+
+
+@pytest.fixture
+def missing_pages(tmp_path):
+    """A server answering 404 to everything"""
+    empty = tmp_path / 'empty'
+    empty.mkdir()
+    server = ThreadingHTTPServer(('127.0.0.1', 0), functools.partial(SimpleHTTPRequestHandler, directory=str(empty)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+class InFlightHandler(SimpleHTTPRequestHandler):
+    """Serves files slowly, recording the most requests in flight at once"""
+    lock = threading.Lock()
+    in_flight = 0
+    peak = 0
+    requests = []
+
+    def do_GET(self):
+        cls = type(self)
+        with cls.lock:
+            cls.in_flight += 1
+            cls.peak = max(cls.peak, cls.in_flight)
+            cls.requests.append(self.path)
+        try:
+            time.sleep(0.05)
+            super().do_GET()
+        finally:
+            with cls.lock:
+                cls.in_flight -= 1
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def asset_host(tmp_path):
+    """One host serving a page that loads six images"""
+    root = tmp_path / 'origin'
+    root.mkdir()
+    images = ''.join(f'<img src="/img-{i}.png">' for i in range(6))
+    (root / 'page.html').write_text(f'<html><head><title>Page</title></head><body>{images}</body></html>')
+    for i in range(6):
+        (root / f"img-{i}.png").write_bytes(b'png' * (i + 1))
+    handler = type('Handler', (InFlightHandler,), {'requests': []})
+    server = ThreadingHTTPServer(('127.0.0.1', 0), functools.partial(handler, directory=str(root)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}", handler
+    server.shutdown()
+    server.server_close()
+
+
+def write_config(tmp_path, sites):
+    path = tmp_path / 'sites.json'
+    path.write_text(json.dumps({'sites': sites}))
+    return str(path)
+
+
+def test_load_sites_resolves_url_files_next_to_the_config(tmp_path):
+    sites = load_sites(write_config(tmp_path, [{'name': 'one', 'urls': 'one.txt'},
+                                               {'name': 'two', 'crawl': ['https://two.test/']}]))
+    assert sites[0]['urls'] == str(tmp_path / 'one.txt')
+    assert 'urls' not in sites[1]
+
+
+@pytest.mark.parametrize('sites', [
+    [{'name': 'same', 'urls': 'a.txt'}, {'name': 'same', 'urls': 'b.txt'}],
+    [{'name': f'bad{os.sep}name', 'urls': 'a.txt'}],
+    [{'name': 'nothing'}],
+])
+def test_load_sites_rejects_bad_configs(tmp_path, sites):
+    with pytest.raises(ValueError):
+        load_sites(write_config(tmp_path, sites))
+
+
+def test_estimates_prefer_the_previous_run(tmp_path):
+    urls = tmp_path / 'urls.txt'
+    urls.write_text('https://a.test/1\nhttps://a.test/2\n# comment\nhttps://a.test/3\n')
+    site = {'name': 'a', 'urls': str(urls), 'host_rate': 0.5}
+    assert estimated_seconds(site, {}) == 6.0
+    assert estimated_seconds(site, {'a': {'elapsed_seconds': 42.0}}) == 42.0
+    assert estimated_seconds({'name': 'b', 'crawl': ['https://b.test/'], 'max_pages': 30, 'host_rate': 1}, {}) == 30
+
+
+def test_hosts_map_to_stable_slots():
+    limits = FleetLimits(FakeManager(), max_requests=4, host_concurrency=2)
+    assert len(limits.hosts) == HOST_STRIPES
+    assert limits.host_slot('https://A.test/x') is limits.host_slot('https://a.test/y')
+
+
+def test_fleet_backs_up_each_site_in_its_own_root(tmp_path, server):
+    sites = []
+    for name in ('first', 'second'):
+        (tmp_path / f"{name}.txt").write_text('\n'.join(server.urls(3, prefix=f"/{name}")))
+        sites.append({'name': name, 'urls': f"{name}.txt", 'host_rate': 100, 'build': False, 'snapshot': False})
+    root = str(tmp_path / 'sites')
+
+    fleet = run_fleet(load_sites(write_config(tmp_path, sites)), root, processes=2, max_requests=2)
+
+    assert fleet['sites_failed'] == []
+    assert fleet['pages'] == 6
+    for name in ('first', 'second'):
+        with open(os.path.join(root, name, 'scraper_results.json')) as f:
+            assert sorted(page['url'] for page in json.load(f)) == sorted(server.urls(3, prefix=f"/{name}"))
+    with open(os.path.join(root, 'fleet_report.json')) as f:
+        assert [site['name'] for site in json.load(f)['sites']] == ['first', 'second']
+
+
+def test_fleet_streams_bodies_through_the_capped_transport(tmp_path, server):
+    (tmp_path / 'streamed.txt').write_text('\n'.join(server.urls(3)))
+    sites = [{'name': 'streamed', 'urls': 'streamed.txt', 'host_rate': 100, 'stream': True,
+              'build': False, 'snapshot': False}]
+    root = str(tmp_path / 'sites')
+
+    fleet = run_fleet(load_sites(write_config(tmp_path, sites)), root, processes=1)
+
+    assert fleet['sites_failed'] == []
+    assert fleet['pages'] == 3
+    with open(os.path.join(root, 'streamed', 'scraper_results.json')) as f:
+        pages = json.load(f)
+    assert sorted(page['url'] for page in pages) == sorted(server.urls(3))
+    assert all(page['html_content'].startswith('<') for page in pages)
+
+
+def test_site_fails_when_every_url_fails(tmp_path, missing_pages):
+    (tmp_path / 'gone.txt').write_text('\n'.join(f"{missing_pages}/page-{i}" for i in range(2)))
+    sites = [{'name': 'gone', 'urls': 'gone.txt', 'host_rate': 100, 'build': False, 'snapshot': False}]
+
+    fleet = run_fleet(load_sites(write_config(tmp_path, sites)), str(tmp_path / 'sites'), processes=1)
+
+    assert fleet['sites_failed'] == ['gone']
+    assert fleet['sites'][0]['failed'] == 2
+    assert 'All 2 URLs failed' in fleet['sites'][0]['error']
+
+
+def test_mirrored_assets_take_the_fleet_slots(tmp_path, asset_host):
+    url, handler = asset_host
+    (tmp_path / 'pages.txt').write_text(f"{url}/page.html\n")
+    sites = [{'name': 'mirrored', 'urls': 'pages.txt', 'host_rate': 100, 'mirror_assets': True,
+              'snapshot': False}]
+    root = tmp_path / 'sites'
+
+    fleet = run_fleet(load_sites(write_config(tmp_path, sites)), str(root), processes=1, host_concurrency=1)
+
+    assert fleet['sites_failed'] == []
+    assert sorted(handler.requests) == sorted(['/page.html'] + [f"/img-{i}.png" for i in range(6)])
+    # The mirror runs 8 download threads, but the host cap allows one request at a time
+    assert handler.peak == 1
+    assert len(os.listdir(root / 'mirrored' / 'assets')) == 7
@@ -0,0 +1,50 @@
+import json
+
+import pytest
+import requests
+
+from benchmark import MockKajabiServer, percentile
+from enhanced_scraper import EnhancedKajabiScraper
+
+
+@pytest.fixture
+def server():
+    mock = MockKajabiServer()
+    mock.start()
+    yield mock
+    mock.stop()
+
+
+def test_percentile_is_nearest_rank():
+    values = list(range(1, 101))
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile([], 50) == 0.0
+
+
+def test_mock_server_serves_a_unique_page_per_url(server):
+    first, second = (requests.get(url, timeout=5) for url in server.urls(2))
+    assert first.status_code == 200
+    assert first.text != second.text
+    assert server.requests == 2
+
+
+def test_mock_server_errors():
+    mock = MockKajabiServer(error_rate=1.0)
+    mock.start()
+    try:
+        assert requests.get(mock.urls(1)[0], timeout=5).status_code == 503
+    finally:
+        mock.stop()
+
+
+def test_async_scrape_of_the_mock_site(server, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    urls = server.urls(6)
+    (tmp_path / 'urls.txt').write_text('\n'.join(urls))
+    scraper = EnhancedKajabiScraper(concurrency=3, host_rate=200, host_burst=10, per_host_concurrency=3)
+    scraper.scrape_all_urls_async('urls.txt')
+
+    results = json.loads((tmp_path / 'scraper_results.json').read_text())
+    assert sorted(r['url'] for r in results) == sorted(urls)
+    assert all(r['html_content'] for r in results)
@@ -0,0 +1,79 @@
+import json
+import os
+
+from build_site import SiteBuilder, extract_title_from_html
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def write_results(path, pages):
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(pages, f)
+
+
+def pages(about_body='About us'):
+    return [
+        {'url': 'https://site.test/', 'html_content': '<title>Home</title><p>Welcome</p>',
+         'scraped_at': '2026-01-01T00:00:00'},
+        {'url': 'https://site.test/about', 'html_content': f'<title>About</title><p>{about_body}</p>',
+         'scraped_at': '2026-01-02T00:00:00'},
+        {'url': 'https://site.test/blog/first-post', 'html_content': '<title> First\n post </title>',
+         'scraped_at': '2026-01-03T00:00:00'},
+    ]
+
+
+def builder(tmp_path):
+    return SiteBuilder(results_file=str(tmp_path / 'results.json'),
+                       template_file=os.path.join(REPO_DIR, 'index_template.html'), output_dir=str(tmp_path))
+
+
+def test_builds_pages_and_index_in_one_pass(tmp_path):
+    write_results(tmp_path / 'results.json', pages())
+    entries = builder(tmp_path).build()
+    assert entries == [
+        ('Home', 'https://site.test/', 'homepage.html'),
+        ('About', 'https://site.test/about', 'about.html'),
+        ('Blog: First post', 'https://site.test/blog/first-post', 'blog_first_post.html'),
+    ]
+    assert (tmp_path / 'about.html').read_text() == '<title>About</title><p>About us</p>'
+    index = (tmp_path / 'index.html').read_text()
+    assert 'href="about.html"' in index and 'Blog: First post' in index
+
+
+def test_second_build_writes_nothing(tmp_path):
+    write_results(tmp_path / 'results.json', pages())
+    builder(tmp_path).build()
+    again = builder(tmp_path)
+    again.build()
+    assert again.stats['written'] == 0
+
+
+def test_only_changed_pages_are_rewritten(tmp_path):
+    write_results(tmp_path / 'results.json', pages())
+    builder(tmp_path).build()
+    write_results(tmp_path / 'results.json', pages('New text'))
+    again = builder(tmp_path)
+    written = []
+    write_output = again.write_output
+    again.write_output = lambda filename, content: write_output(filename, content) and written.append(filename)
+    again.build()
+    assert (tmp_path / 'about.html').read_text().endswith('New text</p>')
+    # The index only lists titles, so it is current; no other page is touched
+    assert written == ['about.html']
+
+
+def test_first_build_trusts_identical_files_on_disk(tmp_path):
+    write_results(tmp_path / 'results.json', pages())
+    (tmp_path / 'homepage.html').write_text('<title>Home</title><p>Welcome</p>')
+    first = builder(tmp_path)
+    written = []
+    write_output = first.write_output
+    first.write_output = lambda filename, content: write_output(filename, content) and written.append(filename)
+    first.build()
+    assert 'homepage.html' not in written
+    assert 'about.html' in written
+
+
+def test_title_fallbacks():
+    assert extract_title_from_html('<html><head><title>\n A  title\n</title></head></html>') == 'A title'
+    assert extract_title_from_html('<p>no head</p>') == 'Untitled Page'
@@ -0,0 +1,43 @@
+from crawl_frontier import CrawlFrontier
+
+
+def drain(frontier):
+    order = []
+    while frontier:
+        order.append(frontier.pop())
+    return order
+
+
+def test_urls_are_deduplicated_after_normalization():
+    frontier = CrawlFrontier(['https://site.test/'])
+    added = frontier.push_links(['https://site.test/about', 'https://SITE.test/about/',
+                                 'https://site.test/about#team', 'https://site.test/'], 0)
+    assert added == 1
+    assert len(frontier) == 2
+
+
+def test_shallow_and_short_paths_come_first():
+    frontier = CrawlFrontier(['https://site.test/'])
+    frontier.pop()
+    frontier.push_links(['https://site.test/blog/2024/post', 'https://site.test/about'], 0)
+    frontier.push('https://site.test/deeper', 2)
+    assert drain(frontier) == [('https://site.test/about', 1), ('https://site.test/blog/2024/post', 1),
+                               ('https://site.test/deeper', 2)]
+
+
+def test_scope_limits():
+    frontier = CrawlFrontier(['https://site.test/'], max_depth=1)
+    assert not frontier.push('https://other.test/page', 1)
+    assert not frontier.push('https://site.test/logo.PNG', 1)
+    assert not frontier.push('https://site.test/login', 1)
+    assert not frontier.push('mailto:someone@site.test', 1)
+    assert not frontier.push('https://site.test/too-deep', 2)
+    assert frontier.push('https://site.test/ok', 1)
+
+
+def test_allowed_domains_and_page_cap():
+    frontier = CrawlFrontier(['https://site.test/'], allowed_domains=['site.test', 'cdn.site.test'], max_pages=3)
+    assert frontier.push('https://cdn.site.test/page', 1)
+    assert frontier.push('https://site.test/a', 1)
+    assert not frontier.push('https://site.test/b', 1)
+    assert len(frontier.seen) == 3
@@ -0,0 +1,131 @@
+import hashlib
+import json
+import os
+import re
+
+from asset_store import hash_file
+from deploy_manifest import IMMUTABLE, STATE_FILE, UPLOAD_MANIFEST, cache_headers, prepare_deploy
+
+LOGO = b'\x89PNG logo'
+
+
+def sha(data):
+    return hashlib.sha256(data).hexdigest()[:12]
+
+
+def write(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data if isinstance(data, bytes) else data.encode('utf-8'))
+
+
+def built_site(root):
+    write(root / 'home.html', '<link href="assets/site.css"><img src="./assets/logo.png">'
+                              '<img src="https://cdn.test/assets/logo.png">')
+    write(root / 'about.html', '<img src="assets/logo_1.png">')
+    write(root / 'about.html.gz', b'gz')
+    write(root / 'assets' / 'logo.png', LOGO)
+    write(root / 'assets' / 'logo_1.png', LOGO)
+    write(root / 'assets' / 'site.css', '@import "fonts.css"; body { background: url(\'logo.png\') }')
+    write(root / 'assets' / 'fonts.css', '@font-face { src: url("font.woff2") }')
+    write(root / 'assets' / 'font.woff2', b'font')
+    write(root / 'assets' / 'manifest.json', '{}')
+    write(root / 'index' / 'page-2.json', '[]')
+    write(root / 'vercel.json', json.dumps({'version': 2, 'routes': [{'src': '/', 'dest': '/index.html'}],
+                                           'builds': [{'src': '**/*', 'use': '@vercel/static'}]}))
+    # Not built pages: the index template and a page from an older build
+    write(root / 'index_template.html', '<a href="{{href}}">{{title}}</a>')
+    write(root / 'old.html', '<p>old</p>')
+    # The build manifest the deploy starts from
+    return {name: hash_file(str(root / name)) for name in ('home.html', 'about.html', 'index/page-2.json')}
+
+
+def snapshot(root):
+    return {path: path.read_bytes() for path in root.rglob('*')
+            if path.is_file() and 'deploy' not in path.relative_to(root).parts}
+
+
+def test_deploy_dir_hashes_assets_and_leaves_the_sources_alone(tmp_path):
+    manifest = built_site(tmp_path)
+    built = dict(manifest)
+    before = snapshot(tmp_path)
+    prepare_deploy(str(tmp_path), manifest)
+
+    # Only the upload manifest and its state are new outside deploy/
+    after = snapshot(tmp_path)
+    assert {path: data for path, data in after.items() if path.name not in (UPLOAD_MANIFEST, STATE_FILE)} == before
+
+    deploy = tmp_path / 'deploy'
+    logo = f"logo.{sha(LOGO)}.png"
+    font = f"font.{sha(b'font')}.woff2"
+    fonts_css = f'@font-face {{ src: url("{font}") }}'
+    fonts = f"fonts.{sha(fonts_css.encode())}.css"
+    site_css = f'@import "{fonts}"; body {{ background: url(\'{logo}\') }}'
+    site = f"site.{sha(site_css.encode())}.css"
+    # Byte-identical copies share the canonical name; store manifests and .gz siblings stay out
+    assert sorted(os.listdir(deploy / 'assets')) == sorted([logo, font, fonts, site])
+    assert (deploy / 'assets' / fonts).read_text() == fonts_css
+    assert (deploy / 'assets' / site).read_text() == site_css
+    assert (deploy / 'home.html').read_text() == (
+        f'<link href="assets/{site}"><img src="./assets/{logo}"><img src="https://cdn.test/assets/logo.png">')
+    assert (deploy / 'about.html').read_text() == f'<img src="assets/{logo}">'
+    assert not (deploy / 'about.html.gz').exists()
+    assert (deploy / 'index' / 'page-2.json').read_text() == '[]'
+    # Only pages the build wrote are deployed
+    assert sorted(path.name for path in deploy.glob('*.html')) == ['about.html', 'home.html']
+    assert not (deploy / 'index_template.html').exists()
+
+    # The build manifest holds the digest of every deployed file
+    deployed = [path for path in deploy.rglob('*') if path.is_file() and path.name != 'vercel.json']
+    assert manifest == {**built, **{path.relative_to(tmp_path).as_posix(): hash_file(str(path))
+                                    for path in deployed}}
+
+
+def test_upload_manifest_lists_only_changed_files(tmp_path):
+    built = built_site(tmp_path)
+    first = prepare_deploy(str(tmp_path), dict(built))
+    assert first['files'] == 8 and len(first['changed']) == 8 and first['removed'] == []
+    assert 'index_template.html' not in [entry['file'] for entry in first['changed']]
+    assert json.loads((tmp_path / UPLOAD_MANIFEST).read_text())['changed'] == first['changed']
+    assert not (tmp_path / 'deploy' / UPLOAD_MANIFEST).exists()
+
+    manifest = dict(built)
+    prepare_deploy(str(tmp_path), manifest)
+    unchanged = prepare_deploy(str(tmp_path), manifest)
+    assert unchanged['changed'] == [] and unchanged['removed'] == []
+    assert unchanged['deploy_stats']['written'] == 0
+
+    # A new logo renames it, so the stylesheet naming it and the pages change too
+    before = set(os.listdir(tmp_path / 'deploy' / 'assets'))
+    write(tmp_path / 'assets' / 'logo.png', b'new logo')
+    write(tmp_path / 'assets' / 'logo_1.png', b'new logo')
+    changed = prepare_deploy(str(tmp_path), manifest)
+    after = set(os.listdir(tmp_path / 'deploy' / 'assets'))
+    files = [entry['file'] for entry in changed['changed']]
+    assert files[:2] == ['about.html', f"assets/logo.{sha(b'new logo')}.png"]
+    assert files[2].startswith('assets/site.') and files[3:] == ['home.html']
+    assert changed['removed'] == sorted(f"assets/{name}" for name in before - after)
+    assert len(changed['removed']) == 2 and f"assets/logo.{sha(LOGO)}.png" in changed['removed']
+    assert not any(f"deploy/{name}" in manifest for name in changed['removed'])
+
+
+def test_vercel_config_drops_routes_and_marks_hashed_assets_immutable(tmp_path):
+    manifest = built_site(tmp_path)
+    source = (tmp_path / 'vercel.json').read_text()
+    prepare_deploy(str(tmp_path), manifest, html_max_age=60)
+
+    assert (tmp_path / 'vercel.json').read_text() == source
+    config = json.loads((tmp_path / 'deploy' / 'vercel.json').read_text())
+    assert 'routes' not in config and config['builds'] == json.loads(source)['builds']
+    assert config['headers'] == cache_headers(60)
+
+    def cache_control(path):
+        values = [rule['headers'][0]['value'] for rule in config['headers']
+                  if re.fullmatch(rule['source'], path)]
+        assert len(values) <= 1
+        return values[0] if values else None
+
+    assert cache_control(f"/assets/logo.{sha(LOGO)}.png") == IMMUTABLE
+    assert cache_control('/assets/variants/0123abcd-480.webp') == IMMUTABLE
+    assert cache_control('/assets/logo.png') is None
+    assert cache_control('/home.html') == cache_control('/') == 'public, max-age=60, must-revalidate'
+    assert cache_control('/search/shard-a.json') == 'public, max-age=60, must-revalidate'
@@ -0,0 +1,42 @@
+import json
+
+from extract_pages import PageExtractor, load_metadata
+
+PAGE = ('<html><head><title>About</title><meta name="description" content="Who we are"></head>'
+        '<body><nav><a href="/">Home</a></nav><main><p>Our story</p></main>'
+        '<a href="https://elsewhere.test/">x</a><img src="/team.jpg"></body></html>')
+
+
+def run(tmp_path, pages, parser='fast'):
+    (tmp_path / 'results.json').write_text(json.dumps(pages))
+    extractor = PageExtractor(str(tmp_path / 'results.json'), str(tmp_path / 'meta.jsonl'), workers=2, parser=parser)
+    return extractor, extractor.run()
+
+
+def test_extracts_metadata_for_every_page(tmp_path):
+    _, metadata = run(tmp_path, [{'url': 'https://site.test/about', 'html_content': PAGE}])
+    record = metadata['https://site.test/about']
+    assert record['title'] == 'About'
+    assert record['description'] == 'Who we are'
+    assert record['text'] == 'Our story'
+    assert record['links'] == ['https://site.test/']
+    assert record['images'] == ['https://site.test/team.jpg']
+    assert load_metadata(str(tmp_path / 'meta.jsonl')) == metadata
+
+
+def test_unchanged_pages_reuse_their_metadata(tmp_path):
+    pages = [{'url': 'https://site.test/about', 'html_content': PAGE},
+             {'url': 'https://site.test/other', 'html_content': '<title>Other</title>'}]
+    run(tmp_path, pages)
+    pages[1]['html_content'] = '<title>Renamed</title>'
+    extractor, metadata = run(tmp_path, pages)
+    assert extractor.stats == {'extracted': 1, 'cached': 1}
+    assert metadata['https://site.test/other']['title'] == 'Renamed'
+
+
+def test_switching_parser_re_extracts(tmp_path):
+    pages = [{'url': 'https://site.test/about', 'html_content': PAGE}]
+    run(tmp_path, pages)
+    extractor, metadata = run(tmp_path, pages, parser='html.parser')
+    assert extractor.stats['extracted'] == 1
+    assert metadata['https://site.test/about']['title'] == 'About'
@@ -0,0 +1,84 @@
+import os
+
+import pytest
+
+from benchmark import REPO_DIR, SAVED_PAGES
+from html_scanner import PageScanner, scan_page
+from page_extractors import extract_metadata
+
+URL = 'https://site.test/blog/post'
+PAGE = '''<!DOCTYPE html>
+<html><head>
+<title> First &amp; Best </title>
+<meta name="description" content="About us">
+<meta property="og:image" content="/og.png">
+<meta property="og:title" content="OG title">
+<link rel="canonical" href="/blog/post">
+</head><body>
+<nav><a href="/">Home</a><a href="https://other.test/">Elsewhere</a></nav>
+<div class="content"><p>Fallback area</p></div>
+<main><h1>Heading</h1><script>var ignored = 1;</script><p>Body <b>text</b></p>
+<img src="a.png" srcset="a-1x.png 1x, a-2x.png 2x"><a href="next">Next</a></main>
+</body></html>'''
+
+
+def test_scan_collects_everything_in_one_pass():
+    result = scan_page(PAGE, URL)
+    assert result['title'] == 'First & Best'
+    assert result['description'] == 'About us'
+    assert result['canonical'] == URL
+    assert result['meta']['og:title'] == 'OG title'
+    assert result['links'] == ['https://site.test/', 'https://site.test/blog/next']
+    assert result['images'] == ['https://site.test/blog/a.png', 'https://site.test/blog/a-1x.png',
+                                'https://site.test/blog/a-2x.png', 'https://site.test/og.png']
+    # <main> is the first content selector, even though .content comes earlier in the page
+    assert result['text'] == 'Heading\nBody\ntext\nNext'
+
+
+def test_head_only_stops_before_the_body():
+    result = scan_page(PAGE, URL, head_only=True)
+    assert result['title'] == 'First & Best'
+    assert result['canonical'] == URL
+    assert 'links' not in result and 'text' not in result
+
+
+def test_incremental_feed_matches_a_single_feed():
+    scanner = PageScanner(URL)
+    for i in range(0, len(PAGE), 7):
+        scanner.feed(PAGE[i:i + 7])
+    scanner.close()
+    assert scanner.result() == scan_page(PAGE, URL)
+
+
+def comparable(metadata):
+    return {**metadata, 'links': sorted(metadata['links'])}
+
+
+def test_matches_beautifulsoup_on_the_sample_page():
+    expected = extract_metadata(PAGE, URL, 'html.parser')
+    result = scan_page(PAGE, URL)
+    assert comparable({key: result[key] for key in expected}) == comparable(expected)
+
+
+@pytest.mark.parametrize('name', SAVED_PAGES)
+def test_matches_beautifulsoup_on_saved_pages(name):
+    path = os.path.join(REPO_DIR, name)
+    if not os.path.exists(path):
+        pytest.skip(f"{name} is not in this checkout")
+    with open(path, encoding='utf-8') as f:
+        html = f.read()
+    url = 'https://melissa.respira.live/' + name
+    expected = extract_metadata(html, url, 'html.parser')
+    result = scan_page(html, url)
+    assert comparable({key: result[key] for key in expected}) == comparable(expected)
+
+
+def test_links_only_skips_everything_but_links():
+    html = ('<html><head><title>T</title><meta name="description" content="D">'
+            '<link rel="canonical" href="/c"></head><body><a href="/a">a</a><img src="/i.png"></body></html>')
+    scanner = PageScanner('https://site.test/', links_only=True)
+    scanner.feed(html)
+    scanner.close()
+    assert list(scanner.links) == ['https://site.test/a']
+    assert scanner.title == '' and scanner.description is None and scanner.meta == {}
+    assert scanner.canonical == '' and not scanner.images and 'text' not in scanner.result()
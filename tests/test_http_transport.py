@@ -0,0 +1,84 @@
+import gzip
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from http_transport import DEFAULT_HEADERS, HTTPTransport, ResponseTooLarge, shared_transport
+from rate_limiter import PERMANENT, classify_failure
+
+BODY = ('<p>' + 'kajabi ' * 5000 + '</p>').encode()
+
+
+class Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path == '/headers':
+            body = json.dumps(dict(self.headers)).encode()
+            encoding = None
+        else:
+            body, encoding = gzip.compress(BODY), 'gzip'
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        if encoding:
+            self.send_header('Content-Encoding', encoding)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture(scope='module')
+def base_url():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_get_reads_and_decodes_the_body(base_url):
+    transport = HTTPTransport()
+    response = transport.get(f"{base_url}/page")
+    assert response.status_code == 200
+    assert response.content == BODY
+    assert response.text.startswith('<p>kajabi')
+    transport.close()
+
+
+def test_stream_hands_out_decoded_chunks(base_url):
+    transport = HTTPTransport()
+    with transport.stream(f"{base_url}/page") as (response, chunks):
+        assert response.status_code == 200
+        received = list(chunks)
+    assert b''.join(received) == BODY
+    transport.close()
+
+
+def test_size_cap_applies_to_the_decoded_body(base_url):
+    # The gzipped body is far below the cap; decoded it is not
+    transport = HTTPTransport(max_body_bytes=len(BODY) // 2)
+    with pytest.raises(ResponseTooLarge) as error:
+        transport.get(f"{base_url}/page")
+    assert classify_failure(error.value) == PERMANENT
+    transport.close()
+
+
+def test_per_request_headers_do_not_leak_into_the_session(base_url):
+    transport = HTTPTransport()
+    sent = transport.get(f"{base_url}/headers", headers={'User-Agent': 'first', 'If-None-Match': '"x"'}).json()
+    assert sent['User-Agent'] == 'first'
+    assert sent['If-None-Match'] == '"x"'
+    assert sent['Accept-Encoding'] == DEFAULT_HEADERS['Accept-Encoding']
+    assert 'If-None-Match' not in transport.get(f"{base_url}/headers").json()
+    assert 'If-None-Match' not in transport.session.headers
+    transport.close()
+
+
+def test_shared_transport_is_reused_per_configuration():
+    assert shared_transport(pool_size=3) is shared_transport(pool_size=3)
+    assert shared_transport(pool_size=3) is not shared_transport(pool_size=4)
+    adapter = shared_transport(pool_size=3).session.get_adapter('https://site.test/')
+    assert adapter._pool_maxsize == 3
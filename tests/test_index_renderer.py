@@ -0,0 +1,60 @@
+import json
+import os
+
+from index_renderer import (CHUNK_SIZE, FIRST_PAGE_SIZE, INDEX_DIR, CompiledTemplate, load_template,
+                            render_index)
+
+TEMPLATE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'index_template.html')
+
+
+def entries(count):
+    return [(f"Page {i}", f"https://site.test/page-{i}", f"page-{i}.html") for i in range(count)]
+
+
+def test_template_renders_and_escapes():
+    template = CompiledTemplate('<h1>{{SITE_NAME}}</h1><ul>{{#each pages}}<li>{{title}}</li>{{/each}}</ul>{{MISSING}}')
+    html = template.render({'SITE_NAME': 'A & B', 'pages': [{'title': '<b>one</b>'}, {'title': 'two'}]})
+    assert html == '<h1>A &amp; B</h1><ul><li>&lt;b&gt;one&lt;/b&gt;</li><li>two</li></ul>'
+
+
+def test_first_page_is_rendered_and_the_rest_is_chunked():
+    count = FIRST_PAGE_SIZE + CHUNK_SIZE + 1
+    template = CompiledTemplate('{{RENDERED_PAGES}}/{{TOTAL_PAGES}}:{{#each pages}}[{{href}}]{{/each}}')
+    files = render_index(template, entries(count), '2026-10-18T12:00:00')
+
+    assert files['index.html'].startswith(f"{FIRST_PAGE_SIZE}/{count}:[page-0.html]")
+    assert files['index.html'].count('[') == FIRST_PAGE_SIZE
+    manifest = json.loads(files[f"{INDEX_DIR}/manifest.json"])
+    assert manifest == {'total': count, 'rendered': FIRST_PAGE_SIZE,
+                        'chunks': [f"{INDEX_DIR}/pages-0.json", f"{INDEX_DIR}/pages-1.json"]}
+    first, second = (json.loads(files[path]) for path in manifest['chunks'])
+    assert len(first) == CHUNK_SIZE
+    assert first[0] == list(entries(count)[FIRST_PAGE_SIZE])
+    assert second == [list(entries(count)[-1])]
+
+
+def test_small_sites_have_no_chunks():
+    files = render_index(CompiledTemplate('{{TOTAL_PAGES}}'), entries(3), '2026-10-18T12:00:00')
+    assert sorted(files) == ['index.html', f"{INDEX_DIR}/manifest.json"]
+    assert json.loads(files[f"{INDEX_DIR}/manifest.json"])['chunks'] == []
+
+
+def test_real_template_renders():
+    files = render_index(load_template(TEMPLATE), entries(60), '2026-10-18T12:00:00',
+                         site_name='Test Site', site_url='https://site.test')
+    html = files['index.html']
+    assert '{{' not in html
+    assert 'href="page-49.html"' in html
+    assert 'page-50.html' not in html
+    assert f'{INDEX_DIR}/manifest.json' in html
+
+
+def test_compiled_template_is_reused_until_the_file_changes(tmp_path):
+    path = tmp_path / 'template.html'
+    path.write_text('v1 {{X}}')
+    first = load_template(str(path))
+    assert load_template(str(path)) is first
+
+    path.write_text('v2 {{X}}')
+    os.utime(path, (os.path.getmtime(path) + 10,) * 2)
+    assert load_template(str(path)).render({'X': 1}) == 'v2 1'
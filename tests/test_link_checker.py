@@ -0,0 +1,109 @@
+import functools
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from link_checker import LinkMap, check_site, find_links, output_path, output_url
+from results_store import write_results_atomic
+
+SITE = 'https://site.test'
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def live(tmp_path):
+    """A live server with one page; everything else is a 404"""
+    root = tmp_path / 'live'
+    root.mkdir()
+    (root / 'ok.html').write_text('<p>ok</p>')
+    server = ThreadingHTTPServer(('127.0.0.1', 0), functools.partial(QuietHandler, directory=str(root)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def link_map():
+    return LinkMap([f"{SITE}/", f"{SITE}/about", f"{SITE}/blog/first-post", f"{SITE}/search?q=x"],
+                   extra_hosts=['www.custom.test'])
+
+
+def test_lookup_by_path_on_any_site_host():
+    links = link_map()
+    assert links.lookup(f"{SITE}/about") == 'about.html'
+    assert links.lookup('https://www.custom.test/about') == 'about.html'
+    assert links.lookup(f"{SITE}/about?utm_source=mail") == 'about.html'
+    assert links.lookup('https://other.test/about') is None
+    assert links.lookup(f"{SITE}/missing") is None
+
+
+def test_rewrite_points_backed_up_links_at_local_files():
+    html = ('<a href="/about#team">A</a> <a class="x" href=\'../blog/first-post\'>B</a> '
+            '<a href="https://other.test/about">C</a> <a href="#top">D</a> <a href="mailto:x@site.test">E</a>')
+    assert link_map().rewrite(html, f"{SITE}/blog/") == (
+        '<a href="about.html#team">A</a> <a class="x" href=\'blog_first_post.html\'>B</a> '
+        '<a href="https://other.test/about">C</a> <a href="#top">D</a> <a href="mailto:x@site.test">E</a>')
+
+
+def test_output_urls_map_to_the_output_tree():
+    assert output_path(output_url('about.html')) == 'about.html'
+    assert output_path(output_url('')) == 'index.html'
+    assert output_path(output_url('assets/my%20logo.png')) == 'assets/my logo.png'
+    assert output_path(f"{SITE}/about.html") is None
+    # Relative links in a built page resolve inside the output tree
+    assert find_links('<a href="about.html">', output_url('index.html')) == [output_url('about.html')]
+
+
+def test_checks_the_built_pages(tmp_path, live, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_results_atomic('scraper_results.json', [
+        {'url': f"{SITE}/", 'html_content': f'<a href="{live}/scraped-only">not built</a>'},
+        {'url': f"{SITE}/about", 'html_content': '<p>about</p>'},
+    ])
+    (tmp_path / 'assets').mkdir()
+    (tmp_path / 'assets' / 'logo.png').write_bytes(b'png')
+    (tmp_path / 'homepage.html').write_text(
+        '<a href="about.html">About</a> <a href="gone.html">Gone</a> <a href="/about.html#x">Root</a>'
+        '<img src="assets/logo.png"> <img src="assets/missing.png">'
+        f'<a href="{live}/ok.html">Live</a> <a href="{live}/dead.html">Dead</a> <a href="{SITE}/about">Abs</a>')
+    (tmp_path / 'about.html').write_text('<a href="homepage.html">Home</a>')
+
+    report = check_site(ttl=3600)
+
+    broken = {entry['url']: entry for entry in report['broken']}
+    assert sorted(broken) == sorted([f"{live}/dead.html", 'assets/missing.png', 'gone.html'])
+    assert broken['gone.html']['pages'] == ['homepage.html']
+    assert broken['gone.html']['error'] == 'Missing from the build output'
+    assert broken['assets/missing.png']['kind'] == 'asset'
+    assert broken[f"{live}/dead.html"]['status'] == 404
+    # Links of the results' HTML were not checked: only the built pages were
+    assert f"{live}/scraped-only" not in str(report)
+    assert report['pages'] == 2
+    assert report['stats']['missing'] == 2
+    assert report['stats']['checked'] == 2
+
+    again = check_site(ttl=3600)
+    assert again['stats']['pages_cached'] == 2
+    assert again['stats']['checked'] == 0
+    assert again['broken'] == report['broken']
+
+
+def test_only_checks_pages_the_build_wrote(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_results_atomic('scraper_results.json', [{'url': f"{SITE}/about", 'html_content': '<p>about</p>'}])
+    (tmp_path / 'about.html').write_text('<a href="index.html">Home</a>')
+    (tmp_path / 'index.html').write_text('<a href="about.html">About</a>')
+    # The index template and stray pages sit next to the built pages but are not part of the site
+    (tmp_path / 'index_template.html').write_text('<a href="{{href}}">{{title}}</a> <a href="{{SITE_URL}}">Live</a>')
+    (tmp_path / 'draft.html').write_text('<a href="gone.html">Gone</a>')
+
+    report = check_site(ttl=3600)
+
+    assert report['pages'] == 2
+    assert report['broken'] == []
+    assert report['stats']['missing'] == 0
@@ -0,0 +1,107 @@
+import functools
+import threading
+from http.server import SimpleHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from asset_store import AssetStore
+from mirror_assets import AssetMirror, css_references, find_subresources
+
+PAGE_URL = 'https://site.test/blog/post'
+PAGE = '''<html><head>
+<link rel="stylesheet" href="/css/site.css">
+<link rel="canonical" href="https://site.test/blog/post">
+<meta property="og:image" content="https://cdn.test/og.png">
+<script src="app.js"></script>
+<style>.hero { background: url('/img/hero.jpg') }</style>
+</head><body>
+<img src="https://cdn.test/a.png?w=1&amp;h=2" srcset="https://cdn.test/a-1x.png 1x, https://cdn.test/a-2x.png 2x">
+<img src="data:image/gif;base64,R0lGOD">
+<div style="background-image: url(&quot;/img/bg.png&quot;)"></div>
+<a href="/other-page">not an asset</a>
+</body></html>'''
+
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def static_server(tmp_path):
+    root = tmp_path / 'origin'
+    (root / 'fonts').mkdir(parents=True)
+    (root / 'fonts' / 'brand.woff2').write_bytes(b'font-bytes')
+    (root / 'logo.png').write_bytes(b'png-bytes')
+    (root / 'site.css').write_text("@import 'extra.css';\nbody { background: url(logo.png) }")
+    (root / 'extra.css').write_text("@font-face { src: url('fonts/brand.woff2') }")
+    server = ThreadingHTTPServer(('127.0.0.1', 0), functools.partial(QuietHandler, directory=str(root)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+def test_finds_every_subresource():
+    assert find_subresources(PAGE, PAGE_URL) == {
+        'https://site.test/css/site.css',
+        'https://cdn.test/og.png',
+        'https://site.test/blog/app.js',
+        'https://site.test/img/hero.jpg',
+        'https://cdn.test/a.png?w=1&h=2',
+        'https://cdn.test/a-1x.png',
+        'https://cdn.test/a-2x.png',
+        'https://site.test/img/bg.png',
+    }
+
+
+def test_css_references():
+    css = "@import \"reset.css\"; a { background: url( 'x.png' ) } b { src: url(font.woff) }"
+    assert sorted(css_references(css)) == ['font.woff', 'reset.css', 'x.png']
+
+
+def test_rewrite_points_mirrored_urls_at_local_files(tmp_path):
+    store = AssetStore(str(tmp_path / 'assets'))
+    store.put('https://cdn.test/a.png?w=1&h=2', b'a', 'image/png')
+    store.put('https://cdn.test/a-2x.png', b'a2x', 'image/png')
+    store.put('https://site.test/img/hero.jpg', b'hero', 'image/jpeg')
+    mirror = AssetMirror(store)
+
+    html = mirror.rewrite(PAGE, PAGE_URL)
+    a_local = store.lookup('https://cdn.test/a.png?w=1&h=2')
+    assert f'src="assets/{a_local}"' in html
+    # Mirrored srcset candidates are rewritten, the others keep their URL and descriptor
+    assert f'https://cdn.test/a-1x.png 1x, assets/{store.lookup("https://cdn.test/a-2x.png")} 2x' in html
+    assert f"url('assets/{store.lookup('https://site.test/img/hero.jpg')}')" in html
+    # Not mirrored: left alone
+    assert 'href="/css/site.css"' in html
+    assert 'href="/other-page"' in html
+
+
+def test_mirrors_stylesheets_and_what_they_reference(tmp_path, static_server):
+    store = AssetStore(str(tmp_path / 'assets'))
+    mirror = AssetMirror(store, workers=2)
+    mapping = mirror.mirror([f"{static_server}/site.css"])
+
+    assert set(mapping) == {f"{static_server}/{name}"
+                            for name in ('site.css', 'extra.css', 'logo.png', 'fonts/brand.woff2')}
+    assert mirror.stats['downloaded'] == 4
+    # Stored stylesheets point at their mirrored siblings
+    with open(tmp_path / 'assets' / mapping[f"{static_server}/site.css"]) as f:
+        site_css = f.read()
+    assert f"@import '{mapping[f'{static_server}/extra.css']}'" in site_css
+    assert f"url({mapping[f'{static_server}/logo.png']})" in site_css
+    with open(tmp_path / 'assets' / mapping[f"{static_server}/extra.css"]) as f:
+        assert f"url('{mapping[f'{static_server}/fonts/brand.woff2']}')" in f.read()
+
+    # A second run finds everything in the store
+    again = AssetMirror(AssetStore(str(tmp_path / 'assets')))
+    assert again.mirror([f"{static_server}/site.css"]) == {}
+    assert again.stats['downloaded'] == 0
+
+
+def test_rewrites_escaped_url_in_style_attribute(tmp_path):
+    store = AssetStore(str(tmp_path / 'assets'))
+    store.put('https://site.test/img/bg.png', b'bg', 'image/png')
+    html = AssetMirror(store).rewrite('<div style="background-image: url(&quot;/img/bg.png&quot;)">', PAGE_URL)
+    assert html == f'<div style="background-image: url(assets/{store.lookup("https://site.test/img/bg.png")})">'
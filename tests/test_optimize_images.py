@@ -0,0 +1,64 @@
+import json
+import os
+
+import pytest
+
+from optimize_images import VARIANT_DIR, ImageOptimizer, ImageRewriter, available_formats
+
+IMAGES = {
+    'hero image.jpg': {
+        'hash': 'a' * 64, 'width': 1200, 'height': 800,
+        'variants': {'webp': [[480, 'aaaa-480.webp'], [960, 'aaaa-960.webp'], [1200, 'aaaa-1200.webp']]},
+    },
+}
+
+
+def test_images_with_variants_become_pictures():
+    html = '<img src="assets/hero%20image.jpg" alt="Hero"><img src="assets/hero%20image.jpg" alt="Again">'
+    first, second = ImageRewriter(images=IMAGES).rewrite(html).split('</picture>')[:2]
+    assert first.startswith('<picture><source type="image/webp" srcset="assets/variants/aaaa-480.webp 480w, '
+                            'assets/variants/aaaa-960.webp 960w, assets/variants/aaaa-1200.webp 1200w"')
+    assert '<img src="assets/hero%20image.jpg" alt="Hero" decoding="async" width="1200" height="800">' in first
+    # Only the first image stays eager (it is usually the LCP element)
+    assert 'loading="lazy"' not in first
+    assert 'loading="lazy"' in second
+
+
+def test_other_images_only_get_loading_hints():
+    html = ('<img src="https://cdn.test/x.png" loading="eager">'
+            '<img src="assets/unknown.png" />'
+            '<picture><img src="assets/hero%20image.jpg"></picture>')
+    assert ImageRewriter(images=IMAGES).rewrite(html) == (
+        '<img src="https://cdn.test/x.png" loading="eager" decoding="async">'
+        '<img src="assets/unknown.png" loading="lazy" decoding="async">'
+        '<picture><img src="assets/hero%20image.jpg"></picture>')
+
+
+def test_rewriter_reads_the_variants_manifest(tmp_path):
+    root = tmp_path / 'assets'
+    (root / VARIANT_DIR).mkdir(parents=True)
+    (root / VARIANT_DIR / 'manifest.json').write_text(json.dumps({'version': 1, 'images': IMAGES}))
+    rewriter = ImageRewriter(str(root))
+    assert rewriter.images == IMAGES
+
+
+def test_variants_are_generated_once(tmp_path):
+    Image = pytest.importorskip('PIL.Image')
+    if not available_formats():
+        pytest.skip("Pillow was built without WebP support")
+    root = tmp_path / 'assets'
+    root.mkdir()
+    Image.new('RGB', (1000, 500), 'red').save(root / 'photo.png')
+
+    optimizer = ImageOptimizer(str(root), workers=1, widths=(480, 1600))
+    entry = optimizer.run()['photo.png']
+    assert (entry['width'], entry['height']) == (1000, 500)
+    # Never upscaled: 1600 collapses to the original width
+    assert [width for width, _ in entry['variants']['webp']] == [480, 1000]
+    for files in entry['variants'].values():
+        for _, filename in files:
+            assert os.path.exists(root / VARIANT_DIR / filename)
+
+    again = ImageOptimizer(str(root), workers=1, widths=(480, 1600))
+    again.run()
+    assert again.stats == dict(again.stats, processed=0, cached=1)
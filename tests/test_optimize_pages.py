@@ -0,0 +1,64 @@
+import gzip
+
+from optimize_pages import PageOptimizer, minify_css, minify_html, optimize_html, write_precompressed
+
+SCRIPT = '''<script>
+    const card = `
+      <div class="card">
+          ${title}
+      </div>`;
+    const pattern = /  two spaces /;
+    const text = "line one \\
+    line two";
+</script>'''
+
+
+def test_scripts_keep_multiline_template_literals_and_strings():
+    html = f"<html>\n  <body>\n    <p>Hello   world</p>\n    {SCRIPT}\n  </body>\n</html>"
+    assert SCRIPT in minify_html(html)
+
+
+def test_pre_and_textarea_are_untouched():
+    html = '<pre>  keep\n    this</pre>   <textarea>  and\n  this</textarea>'
+    assert minify_html(html) == '<pre>  keep\n    this</pre> <textarea>  and\n  this</textarea>'
+
+
+def test_html_whitespace_and_comments_are_collapsed():
+    html = '<div>\n\n    <!-- note -->\n    <p>a    b</p>\n<!--[if IE]><p>old</p><![endif]-->\n</div>'
+    assert minify_html(html) == '<div>\n<p>a b</p>\n<!--[if IE]><p>old</p><![endif]-->\n</div>'
+
+
+def test_css_is_minified_outside_strings():
+    css = '/* header */\n.a  >  .b {\n  color: red;\n  content: "  spaced  ;  ";\n}\n'
+    assert minify_css(css) == '.a>.b{color:red;content:"  spaced  ;  "}'
+
+
+def test_dead_kajabi_markup_is_stripped():
+    html = ('<head><meta name="csrf-token" content="abc">\n'
+            '<script>window.rudderanalytics = [];</script>\n'
+            '<script src="/track_analytics.js"></script>\n<title>Page</title></head>')
+    assert optimize_html(html) == '<head><title>Page</title></head>'
+
+
+def test_precompressed_output_is_reproducible(tmp_path):
+    path = str(tmp_path / 'page.html')
+    write_precompressed(path, b'<p>hello</p>' * 100)
+    first = (tmp_path / 'page.html.gz').read_bytes()
+    write_precompressed(path, b'<p>hello</p>' * 100)
+    assert (tmp_path / 'page.html.gz').read_bytes() == first
+    assert gzip.decompress(first) == b'<p>hello</p>' * 100
+
+
+def test_unchanged_pages_are_not_reoptimized(tmp_path):
+    cache_file = str(tmp_path / 'cache.json')
+    pages = [('a.html', '<p>a   a</p>', 1), ('b.html', '<p>b   b</p>', 2)]
+    optimizer = PageOptimizer(cache_file, workers=1)
+    assert list(optimizer.optimize(pages, lambda name, digest: True)) == [
+        ('a.html', '<p>a a</p>', 1), ('b.html', '<p>b b</p>', 2)]
+    optimizer.save()
+
+    again = PageOptimizer(cache_file, workers=1)
+    changed = [pages[0], ('b.html', '<p>new</p>', 2)]
+    assert list(again.optimize(changed, lambda name, digest: True)) == [
+        ('a.html', None, 1), ('b.html', '<p>new</p>', 2)]
+    assert again.stats['cached'] == 1
@@ -0,0 +1,96 @@
+import json
+
+import pytest
+
+from page_archive import MAGIC, ZLIB_DICT_SIZE, PageArchive, is_archive, pack, train_dictionary
+from results_store import write_results_atomic
+
+BOILERPLATE = '\n'.join(f'<div class="kajabi-section section-{i}">shared navigation block</div>' for i in range(20))
+
+
+def pages(count=5):
+    return [{'url': f'https://site.test/page-{i}', 'title': f'Page {i}',
+             'html_content': f'<html>\n{BOILERPLATE}\n<p>unique body {i}</p>\n</html>'}
+            for i in range(count)]
+
+
+def test_dictionary_keeps_shared_lines_only():
+    dictionary = train_dictionary([page['html_content'] for page in pages()])
+    assert b'shared navigation block' in dictionary
+    assert b'unique body' not in dictionary
+    assert len(dictionary) <= ZLIB_DICT_SIZE
+
+
+def test_round_trip_with_dictionary(tmp_path):
+    records = pages()
+    dictionary = train_dictionary([page['html_content'] for page in records])
+    path = str(tmp_path / 'pages.archive')
+    archive = PageArchive(path, dictionary=dictionary)
+    for record in records:
+        archive.append(record)
+    archive.close()
+
+    reopened = PageArchive(path)
+    assert reopened.dictionary == dictionary
+    assert len(reopened) == len(records)
+    assert 'https://site.test/page-3' in reopened
+    assert reopened.get('https://site.test/page-3') == records[3]
+    assert reopened.get('https://site.test/missing') is None
+    assert list(reopened) == records
+    assert is_archive(path)
+
+
+def test_dictionary_makes_records_smaller(tmp_path):
+    records = pages()
+    dictionary = train_dictionary([page['html_content'] for page in records])
+    plain = PageArchive(str(tmp_path / 'plain.archive'))
+    shared = PageArchive(str(tmp_path / 'shared.archive'), dictionary=dictionary)
+    data = json.dumps(records[0]).encode()
+    assert len(shared.compress(data)) < len(plain.compress(data))
+
+
+def test_newer_record_replaces_older(tmp_path):
+    path = str(tmp_path / 'pages.archive')
+    archive = PageArchive(path)
+    archive.append({'url': 'https://site.test/', 'html_content': 'old'})
+    archive.append({'url': 'https://site.test/', 'html_content': 'new'})
+    assert archive.get('https://site.test/')['html_content'] == 'new'
+    archive.close()
+    assert [record['html_content'] for record in PageArchive(path)] == ['new']
+
+
+def test_torn_frame_is_truncated_and_index_rebuilt(tmp_path):
+    path = tmp_path / 'pages.archive'
+    archive = PageArchive(str(path))
+    for record in pages(3):
+        archive.append(record)
+    archive.close()
+    # Crash mid-append: a partial frame at the end and a stale index
+    with open(path, 'ab') as f:
+        f.write(b'\x00\x00\x10\x00partial')
+    reopened = PageArchive(str(path))
+    assert len(reopened) == 3
+    assert not path.read_bytes().endswith(b'partial')
+
+
+def test_wrong_dictionary_is_rejected(tmp_path):
+    path = tmp_path / 'pages.archive'
+    PageArchive(str(path), dictionary=b'some shared lines').close()
+    (tmp_path / 'pages.archive.dict').write_bytes(b'another dictionary')
+    with pytest.raises(ValueError):
+        PageArchive(str(path))
+
+
+def test_pack_and_export_round_trip(tmp_path):
+    results = str(tmp_path / 'scraper_results.json')
+    write_results_atomic(results, pages())
+    archive_file = str(tmp_path / 'pages.archive')
+    archive = pack(results, archive_file)
+    assert archive.dictionary
+    assert not is_archive(results)
+    assert MAGIC in open(archive_file, 'rb').readline().decode()
+
+    exported = str(tmp_path / 'exported.json')
+    PageArchive(archive_file).export_json(exported)
+    with open(exported) as f:
+        assert json.load(f) == pages()
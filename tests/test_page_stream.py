@@ -0,0 +1,92 @@
+import json
+import os
+
+import pytest
+
+from benchmark import MockKajabiServer
+from enhanced_scraper import EnhancedKajabiScraper
+from page_stream import BodySpool
+from revalidation import content_hash
+
+PAGE = ('<html><head><title>Breathe &amp; Relax</title>'
+        '<meta name="description" content="Calm down"></head>'
+        '<body><a href="/next">next</a><a href="https://other.test/">out</a><p>café ✓</p></body></html>')
+# Per-run timestamps differ between two scrapes of the same page
+TIMESTAMPS = ('scraped_at', 'checked_at')
+
+
+@pytest.fixture
+def server():
+    mock = MockKajabiServer()
+    mock.start()
+    yield mock
+    mock.stop()
+
+
+def test_capture_spools_and_parses_across_chunk_boundaries(tmp_path):
+    data = PAGE.encode('utf-8')
+    # One-byte chunks split the multi-byte characters and every tag
+    chunks = [data[i:i + 1] for i in range(len(data))]
+    page = BodySpool(str(tmp_path / 'bodies')).capture('https://site.test/page', chunks, 'utf-8')
+
+    with open(page['body_file'], encoding='utf-8', newline='') as f:
+        assert f.read() == PAGE
+    assert page['content_hash'] == content_hash(PAGE)
+    assert page['size'] == len(data)
+    assert page['links'] == ['https://site.test/next']
+    # Titles and descriptions are left to the extraction stage, as for plain results
+    assert set(page) == {'body_file', 'content_hash', 'size', 'links'}
+
+
+def test_failed_capture_leaves_no_spool_file(tmp_path):
+    def broken():
+        yield b'<html>'
+        raise OSError('connection reset')
+
+    spool = BodySpool(str(tmp_path / 'bodies'))
+    with pytest.raises(OSError):
+        spool.capture('https://site.test/page', broken())
+    assert os.listdir(tmp_path / 'bodies') == []
+
+
+def scrape(tmp_path, urls, stream):
+    run_dir = tmp_path / ('streamed' if stream else 'plain')
+    run_dir.mkdir()
+    os.chdir(run_dir)
+    (run_dir / 'urls.txt').write_text('\n'.join(urls))
+    EnhancedKajabiScraper(host_rate=200, stream_bodies=stream).scrape_all_urls('urls.txt')
+    with open(run_dir / 'scraper_results.json') as f:
+        return json.load(f)
+
+
+def journaled_result(tmp_path, url, stream):
+    run_dir = tmp_path / ('streamed-journal' if stream else 'plain-journal')
+    run_dir.mkdir()
+    os.chdir(run_dir)
+    scraper = EnhancedKajabiScraper(host_rate=200, stream_bodies=stream)
+    scraper.record_result(url, scraper.scrape_url(url))
+    with open(run_dir / 'scraper_journal.jsonl') as f:
+        return [json.loads(line) for line in f][-1]['result']
+
+
+def test_streamed_results_match_plain_results(tmp_path, server, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    urls = server.urls(3)
+    plain = scrape(tmp_path, urls, stream=False)
+    streamed = scrape(tmp_path, urls, stream=True)
+
+    def without_timestamps(records):
+        return sorted(({k: v for k, v in record.items() if k not in TIMESTAMPS} for record in records),
+                      key=lambda record: record['url'])
+
+    assert without_timestamps(streamed) == without_timestamps(plain)
+    # Compaction folded the spool into the results file
+    assert not os.path.exists(tmp_path / 'streamed' / '.bodies')
+
+
+def test_streamed_journal_records_have_the_plain_fields(tmp_path, server, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    url = server.urls(1)[0]
+    plain = journaled_result(tmp_path, url, stream=False)
+    streamed = journaled_result(tmp_path, url, stream=True)
+    assert set(streamed) - {'body_file'} == set(plain) - {'html_content'}
@@ -0,0 +1,58 @@
+import asyncio
+import logging
+
+import pytest
+
+from enhanced_scraper import EnhancedKajabiScraper
+from rate_limiter import HostRateLimiter, TokenBucket
+
+
+def test_bucket_spaces_requests_after_the_burst():
+    bucket = TokenBucket(rate=10, burst=2)
+    waits = [bucket.reserve() for _ in range(4)]
+    assert waits[:2] == [0.0, 0.0]
+    # Later callers queue behind earlier reservations
+    assert waits[2] == pytest.approx(0.1, abs=0.02)
+    assert waits[3] == pytest.approx(0.2, abs=0.02)
+
+
+def test_block_delays_the_next_reservation():
+    bucket = TokenBucket(rate=100, burst=1)
+    bucket.block(0.5)
+    assert bucket.reserve() == pytest.approx(0.5, abs=0.05)
+
+
+def test_hosts_have_independent_buckets():
+    limiter = HostRateLimiter(rate=1, burst=1, host_rates={'slow.test': 0.1})
+    assert limiter.bucket('https://a.test/x') is limiter.bucket('https://a.test/y')
+    assert limiter.bucket('https://a.test/x') is not limiter.bucket('https://b.test/x')
+    assert limiter.bucket('https://slow.test/').rate == 0.1
+    # A drained host does not hold up another one
+    limiter.bucket('https://a.test/').reserve()
+    assert limiter.bucket('https://b.test/').reserve() == 0.0
+
+
+def test_async_acquire_waits_for_the_budget():
+    limiter = HostRateLimiter(rate=20, burst=1)
+
+    async def fetch_three():
+        return [await limiter.acquire('https://a.test/') for _ in range(3)]
+
+    waits = asyncio.run(fetch_three())
+    assert waits[0] == 0.0
+    assert all(wait == pytest.approx(0.05, abs=0.02) for wait in waits[1:])
+
+
+def test_batch_progress_counts_this_batch(tmp_path, monkeypatch, caplog):
+    monkeypatch.chdir(tmp_path)
+    scraper = EnhancedKajabiScraper(host_rate=1000, host_burst=100)
+    # Completed in an earlier run: must not inflate this batch's count
+    for n in range(30):
+        scraper.store.add_result({'url': f"https://site.test/old-{n}", 'html_content': ''})
+    monkeypatch.setattr(scraper, 'scrape_url', lambda url: {'url': url, 'html_content': 'x', 'changed': True,
+                                                            'checked_at': 'now'})
+    urls = [f"https://site.test/new-{n}" for n in range(3)]
+    with caplog.at_level(logging.INFO):
+        scraper.process_batch(urls, 0)
+    progress = [r.getMessage() for r in caplog.records if r.getMessage().startswith('Progress')]
+    assert progress == [f"Progress: {n}/3 URLs of this batch done" for n in (1, 2, 3)]
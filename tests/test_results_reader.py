@@ -0,0 +1,55 @@
+import json
+import os
+
+import results_reader
+from results_reader import index_path, iter_records_with_offsets, iter_results, load_index, load_result
+from results_store import write_results_atomic
+
+
+def records():
+    return [
+        {'url': 'https://site.test/', 'html_content': '<p>home</p>'},
+        # Multi-byte text, so byte offsets differ from character offsets
+        {'url': 'https://site.test/café', 'html_content': '<p>naïve “quotes” ✓</p>' * 50},
+        {'url': 'https://site.test/last', 'html_content': '<p>' + 'x' * 5000 + '</p>'},
+    ]
+
+
+def test_streams_records_in_small_reads(tmp_path, monkeypatch):
+    monkeypatch.setattr(results_reader, 'CHUNK_SIZE', 64)
+    path = tmp_path / 'results.json'
+    path.write_text(json.dumps(records(), indent=2, ensure_ascii=False), encoding='utf-8')
+    assert list(iter_results(str(path))) == records()
+
+
+def test_offsets_point_at_each_record(tmp_path):
+    path = tmp_path / 'results.json'
+    path.write_text(json.dumps(records(), ensure_ascii=False), encoding='utf-8')
+    data = path.read_bytes()
+    for record, offset, length in iter_records_with_offsets(str(path)):
+        assert json.loads(data[offset:offset + length]) == record
+
+
+def test_sidecar_index_is_written_with_the_results(tmp_path):
+    path = str(tmp_path / 'results.json')
+    write_results_atomic(path, records())
+    assert os.path.exists(index_path(path))
+    assert load_result('https://site.test/café', path) == records()[1]
+    assert load_result('https://site.test/missing', path) is None
+
+
+def test_stale_index_is_rebuilt(tmp_path):
+    path = tmp_path / 'results.json'
+    write_results_atomic(str(path), records())
+    # Rewritten by another tool: the stamp no longer matches
+    path.write_text(json.dumps(records()[::-1]))
+    offsets = load_index(str(path))
+    offset, length = offsets['https://site.test/']
+    assert json.loads(path.read_bytes()[offset:offset + length])['html_content'] == '<p>home</p>'
+    assert load_result('https://site.test/last', str(path)) == records()[2]
+
+
+def test_empty_results(tmp_path):
+    path = str(tmp_path / 'results.json')
+    write_results_atomic(path, [])
+    assert list(iter_results(path)) == []
@@ -0,0 +1,90 @@
+import json
+
+import pytest
+
+from results_store import ResultsJournal, ResultsStore
+
+
+def page(url, body='<html></html>'):
+    return {'url': url, 'html_content': body, 'checked_at': '2026-01-01T00:00:00'}
+
+
+def test_journal_survives_a_crash_before_compaction(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    store = ResultsStore()
+    store.add_result(page('https://site.test/a'))
+    store.add_failure('https://site.test/b')
+    store.set_batch(3)
+    store.journal.close()  # the process dies here: no compaction
+
+    reopened = ResultsStore()
+    assert reopened.is_completed('https://site.test/a')
+    assert reopened.is_failed('https://site.test/b')
+    assert reopened.progress['current_batch'] == 3
+    assert reopened.get_result('https://site.test/a')['html_content'] == '<html></html>'
+
+
+def test_torn_final_line_is_dropped(tmp_path):
+    path = tmp_path / 'journal.jsonl'
+    path.write_text(json.dumps({'type': 'failed', 'url': 'https://site.test/a'}) + '\n{"type": "res')
+    assert list(ResultsJournal(str(path)).replay()) == [{'type': 'failed', 'url': 'https://site.test/a'}]
+    # The torn bytes are gone, so later appends start on a clean line
+    assert path.read_text().endswith('}\n')
+
+
+def test_compaction_writes_the_legacy_files_and_empties_the_journal(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    store = ResultsStore()
+    store.add_result(page('https://site.test/a', 'first'))
+    store.add_result(page('https://site.test/b'))
+    # A refresh replaces the stored record instead of adding a second one
+    store.add_result(page('https://site.test/a', 'second'))
+    store.compact()
+
+    assert not (tmp_path / 'scraper_journal.jsonl').exists()
+    results = json.loads((tmp_path / 'scraper_results.json').read_text())
+    assert [(r['url'], r['html_content']) for r in results] == [
+        ('https://site.test/a', 'second'), ('https://site.test/b', '<html></html>')]
+    progress = json.loads((tmp_path / 'scraper_progress.json').read_text())
+    assert progress['completed_urls'] == ['https://site.test/a', 'https://site.test/b']
+
+
+def test_replay_after_compaction_does_not_duplicate(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    store = ResultsStore()
+    store.add_result(page('https://site.test/a'))
+    store.compact()
+    store.add_result(page('https://site.test/a', 'newer'))
+    store.journal.close()
+
+    reopened = ResultsStore()
+    assert len(reopened.results) == 1
+    assert reopened.get_result('https://site.test/a')['html_content'] == 'newer'
+    assert reopened.progress['completed_urls'] == ['https://site.test/a']
+
+
+def spooled(tmp_path, name, body):
+    (tmp_path / '.bodies').mkdir(exist_ok=True)
+    (tmp_path / '.bodies' / f"{name}.html").write_text(body)
+    return {'url': f"https://site.test/{name}", 'body_file': f".bodies/{name}.html",
+            'checked_at': '2026-01-01T00:00:00'}
+
+
+@pytest.mark.parametrize('body_dir', ['.bodies', None])
+def test_result_with_a_lost_body_file_is_scraped_again(tmp_path, monkeypatch, caplog, body_dir):
+    monkeypatch.chdir(tmp_path)
+    store = ResultsStore(body_dir='.bodies')
+    store.add_result(spooled(tmp_path, 'a', 'kept'))
+    store.add_result(spooled(tmp_path, 'b', 'lost'))
+    store.journal.close()  # the process dies here: no compaction
+    (tmp_path / '.bodies' / 'b.html').unlink()
+
+    reopened = ResultsStore(body_dir=body_dir)
+    assert reopened.is_completed('https://site.test/a')
+    assert not reopened.is_completed('https://site.test/b')
+    assert not reopened.has_result('https://site.test/b')
+    assert '.bodies/b.html of https://site.test/b is missing' in caplog.text
+
+    reopened.compact()
+    results = json.loads((tmp_path / 'scraper_results.json').read_text())
+    assert [(r['url'], r['html_content']) for r in results] == [('https://site.test/a', 'kept')]
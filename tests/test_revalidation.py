@@ -0,0 +1,60 @@
+import json
+
+from revalidation import build_result, conditional_headers, content_hash
+from results_store import ResultsStore
+
+
+class FakeResponse:
+    def __init__(self, text='', status_code=200, headers=None):
+        self.text = text
+        self.status_code = status_code
+        self.headers = headers or {}
+
+
+def stored(body='<p>v1</p>'):
+    return {'url': 'https://site.test/a', 'html_content': body, 'etag': '"v1"',
+            'last_modified': 'Wed, 01 Jan 2025 00:00:00 GMT', 'content_hash': content_hash(body),
+            'checked_at': '2025-01-01T00:00:00'}
+
+
+def test_conditional_headers_from_the_stored_validators():
+    assert conditional_headers(None) == {}
+    assert conditional_headers(stored()) == {'If-None-Match': '"v1"',
+                                             'If-Modified-Since': 'Wed, 01 Jan 2025 00:00:00 GMT'}
+
+
+def test_304_keeps_the_stored_record():
+    result = build_result('https://site.test/a', FakeResponse(status_code=304), stored())
+    assert result['changed'] is False
+    assert result['html_content'] == '<p>v1</p>'
+    assert result['checked_at'] != '2025-01-01T00:00:00'
+
+
+def test_identical_body_without_validators_is_unchanged():
+    previous = stored()
+    del previous['content_hash']
+    result = build_result('https://site.test/a', FakeResponse('<p>v1</p>'), previous)
+    assert result['changed'] is False
+    assert result['content_hash'] == content_hash('<p>v1</p>')
+
+
+def test_new_body_is_a_new_record():
+    result = build_result('https://site.test/a', FakeResponse('<p>v2</p>', headers={'ETag': '"v2"'}), stored())
+    assert result['changed'] is True
+    assert (result['html_content'], result['etag']) == ('<p>v2</p>', '"v2"')
+
+
+def test_changed_flag_is_never_stored(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    store = ResultsStore()
+    result = build_result('https://site.test/a', FakeResponse('<p>v1</p>'))
+    store.add_result(result)
+    assert result['changed'] is True  # the caller still sees it
+    unchanged = build_result('https://site.test/a', FakeResponse(status_code=304), store.get_result(result['url']))
+    store.mark_unchanged(result['url'], unchanged['checked_at'])
+    store.journal.close()
+
+    for record in ResultsStore().results:
+        assert 'changed' not in record
+    store.compact()
+    assert all('changed' not in record for record in json.loads((tmp_path / 'scraper_results.json').read_text()))
@@ -0,0 +1,80 @@
+import json
+
+import pytest
+import requests
+from urllib3.util import connection
+
+from benchmark import MockKajabiServer
+from http_transport import HTTPTransport
+from scrape_metrics import Metrics, metrics
+
+
+@pytest.fixture
+def server():
+    mock = MockKajabiServer()
+    mock.start()
+    yield mock
+    mock.stop()
+
+
+def test_counters_and_spans():
+    registry = Metrics()
+    registry.incr('pages_fetched')
+    registry.incr('bytes_downloaded', 512)
+    for seconds in (0.1, 0.2, 0.3):
+        registry.observe('fetch', seconds)
+    with registry.span('parse'):
+        pass
+
+    snapshot = registry.snapshot()
+    assert snapshot['counters'] == {'pages_fetched': 1, 'bytes_downloaded': 512}
+    fetch = snapshot['timings']['fetch']
+    assert fetch['count'] == 3
+    assert fetch['total_seconds'] == pytest.approx(0.6)
+    assert fetch['p50_seconds'] == pytest.approx(0.2)
+    assert fetch['max_seconds'] == pytest.approx(0.3)
+    assert snapshot['timings']['parse']['count'] == 1
+
+
+def test_write_run_file(tmp_path):
+    registry = Metrics()
+    registry.incr('retries')
+    path = registry.write('scrape', str(tmp_path))
+    with open(path) as f:
+        data = json.load(f)
+    assert data['run'] == 'scrape'
+    assert data['counters'] == {'retries': 1}
+
+
+def test_prometheus_endpoint_is_local_by_default():
+    registry = Metrics()
+    registry.incr('pages-fetched')
+    registry.observe('ttfb', 0.05)
+    server = registry.serve(0)
+    try:
+        assert server.server_address[0] == '127.0.0.1'
+        response = requests.get(f"http://127.0.0.1:{server.server_address[1]}/metrics", timeout=5)
+        assert 'kajabi_backup_pages_fetched_total 1' in response.text
+        assert 'kajabi_backup_ttfb_seconds_count 1' in response.text
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_transport_times_new_connections_without_patching_urllib3(server):
+    original = connection.create_connection
+    before = metrics.snapshot()
+    transport = HTTPTransport(pool_size=2)
+    try:
+        for url in server.urls(3):
+            assert transport.get(url, timeout=5).status_code == 200
+    finally:
+        transport.close()
+    after = metrics.snapshot()
+
+    assert connection.create_connection is original
+    opened = after['counters'].get('connections_opened', 0) - before['counters'].get('connections_opened', 0)
+    # The mock server speaks HTTP/1.0, so every request opens a connection
+    assert opened == 3
+    assert after['timings']['connect']['count'] - before['timings'].get('connect', {}).get('count', 0) == 3
+    assert after['timings']['dns']['count'] - before['timings'].get('dns', {}).get('count', 0) == 3
@@ -0,0 +1,76 @@
+import json
+import os
+import shutil
+import subprocess
+
+import pytest
+
+from search_index import SEARCH_DIR, build_search_index, shard_of, stem, tokenize
+
+TEMPLATE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'index_template.html')
+
+SAMPLES = [
+    'Breathing exercises for Beginners',
+    'Café crème, naïve résumé — Ångström',
+    'The studies studied: running, stopped, happily; repeatedly!',
+    "Don't stop-believing in 2024's plans_v2 (100%)",
+    'Ｆｕｌｌｗｉｄｔｈ ﬁnance ① ² and ǅemal',
+    'Здравствуйте, мир! Γειά σου κόσμε. 日本語のテキスト',
+    'emoji 🧘‍♀️ calm 🌿 mind',
+    'I a an be it is',
+]
+
+
+def docs():
+    return [
+        {'title': 'Breathing Basics', 'href': 'breathing.html', 'description': 'How to breathe', 'text': 'Slow breathing calms the body.'},
+        {'title': 'Meditation', 'href': 'meditation.html', 'description': 'x' * 300, 'text': 'Breathing and meditating daily.'},
+    ]
+
+
+def test_tokenize_folds_stems_and_drops_stopwords():
+    assert tokenize('The Cafés are RUNNING happily') == ['caf', 'runn', 'happi']
+    assert stem('studies') == 'study'
+    assert stem('breathe') == 'breath'
+    # Stems keep at least MIN_STEM characters
+    assert stem('using') == 'using'
+
+
+def test_index_files():
+    files = build_search_index(docs())
+    meta = json.loads(files[f"{SEARCH_DIR}/meta.json"])
+    assert meta['doc_count'] == 2
+    assert json.loads(files[f"{SEARCH_DIR}/docs.json"])[1] == ['Meditation', 'meditation.html', 'x' * 160]
+
+    shards = [json.loads(files[f"{SEARCH_DIR}/shard-{n}.json"]) for n in range(meta['shard_count'])]
+    term = tokenize('breathing')[0]
+    # Every term lives in the shard its hash points at; postings are [doc, count] pairs, titles count 3x
+    assert shards[shard_of(term, meta['shard_count'])][term] == [0, 4, 1, 1]
+
+
+def _browser_tokenizer() -> str:
+    with open(TEMPLATE, encoding='utf-8') as f:
+        template = f.read()
+    start = template.index('// Same rules as tokenize() in search_index.py')
+    end = template.index('function card(', start)
+    return template[start:end]
+
+
+@pytest.mark.skipif(shutil.which('node') is None, reason="needs node to run the browser tokenizer")
+def test_browser_tokenizer_matches_python():
+    files = build_search_index(docs() * 3)
+    meta = json.loads(files[f"{SEARCH_DIR}/meta.json"])
+    meta['shard_count'] = 7
+    script = (
+        f"var meta = {json.dumps(meta)};\n"
+        "var stopwords = new Set(meta.stopwords);\n"
+        f"{_browser_tokenizer()}\n"
+        f"var samples = {json.dumps(SAMPLES)};\n"
+        "console.log(JSON.stringify(samples.map(function (text) {\n"
+        "    var terms = tokenize(text);\n"
+        "    return [terms, terms.map(shardOf)];\n"
+        "})));\n"
+    )
+    output = subprocess.run(['node', '-e', script], capture_output=True, text=True, check=True).stdout
+    expected = [[tokenize(text), [shard_of(term, 7) for term in tokenize(text)]] for text in SAMPLES]
+    assert json.loads(output) == expected
@@ -0,0 +1,59 @@
+import random
+
+from snapshot_store import MAX_CHUNK, SnapshotStore, chunk_text
+
+
+def big_page(seed=0, lines=3000):
+    rng = random.Random(seed)
+    return ''.join(f"<p>line {i} {rng.random()}</p>\n" for i in range(lines))
+
+
+def pages(body):
+    return [{'url': 'https://site.test/', 'html_content': body, 'status_code': 200, 'etag': '"v1"'},
+            {'url': 'https://site.test/about', 'html_content': '<p>about</p>', 'status_code': 200}]
+
+
+def test_chunks_reassemble_and_respect_the_size_cap():
+    text = big_page() + 'x' * (MAX_CHUNK * 2 + 10)
+    chunks = list(chunk_text(text))
+    assert b''.join(chunks).decode() == text
+    assert max(len(chunk) for chunk in chunks) <= MAX_CHUNK
+
+
+def test_an_edit_only_adds_the_chunks_around_it(tmp_path):
+    store = SnapshotStore(str(tmp_path / 'snapshots'))
+    body = big_page()
+    first = store.record(pages(body))
+    written = store.stats['chunks_written']
+    assert written > 5
+
+    lines = body.splitlines(keepends=True)
+    lines[1500] = '<p>edited</p>\n'
+    second = store.record(pages(''.join(lines)))
+    assert store.stats['chunks_written'] - written <= 2
+    assert store.diff(first, second) == {'added': [], 'removed': [], 'changed': ['https://site.test/']}
+    assert '+<p>edited</p>' in store.page_diff(first, second, 'https://site.test/')
+
+
+def test_pages_round_trip_with_their_metadata(tmp_path):
+    store = SnapshotStore(str(tmp_path / 'snapshots'))
+    snapshot_id = store.record(pages(big_page(lines=50)))
+    assert list(store.iter_pages(snapshot_id)) == [
+        {'url': 'https://site.test/', 'html_content': big_page(lines=50), 'status_code': 200, 'etag': '"v1"'},
+        {'url': 'https://site.test/about', 'html_content': '<p>about</p>', 'status_code': 200},
+    ]
+
+
+def test_resolve_and_prune(tmp_path):
+    store = SnapshotStore(str(tmp_path / 'snapshots'))
+    old = store.record(pages('<p>old only</p>\n'))
+    new = store.record(pages('<p>new</p>\n'))
+    assert new > old
+    assert store.resolve(None) == new
+    assert store.resolve(None, offset=1) == old
+    assert store.resolve(new) == new
+
+    # The old home page chunk is only used by the pruned snapshot
+    assert store.prune(keep=1) == 1
+    assert store.snapshot_ids() == [new]
+    assert [page['html_content'] for page in store.iter_pages(new)] == ['<p>new</p>\n', '<p>about</p>']
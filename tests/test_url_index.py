@@ -0,0 +1,41 @@
+import pytest
+
+from results_store import ResultsStore
+from url_utils import normalize_url, url_to_filename
+
+
+@pytest.mark.parametrize('variant', [
+    'https://Site.Test/about',
+    'https://site.test/about/',
+    'https://site.test:443/about',
+    'https://site.test/about#team',
+    '  https://site.test/about  ',
+])
+def test_variants_normalize_to_one_key(variant):
+    assert normalize_url(variant) == 'https://site.test/about'
+
+
+def test_query_and_non_default_port_stay_distinct():
+    assert normalize_url('https://site.test/a?page=2') != normalize_url('https://site.test/a')
+    assert normalize_url('http://site.test:8080/') == 'http://site.test:8080/'
+
+
+def test_store_indexes_dedupe_url_variants(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    store = ResultsStore()
+    store.add_result({'url': 'https://site.test/about', 'html_content': 'one'})
+    store.add_result({'url': 'https://SITE.test/about/', 'html_content': 'two'})
+    store.add_failure('https://site.test/gone')
+    store.add_failure('https://site.test/gone/')
+
+    assert store.is_completed('https://site.test/about#x')
+    assert len(store.results) == 1
+    assert store.get_result('https://site.test/about')['html_content'] == 'two'
+    assert store.progress['completed_urls'] == ['https://site.test/about']
+    assert store.progress['failed_urls'] == ['https://site.test/gone']
+
+
+def test_filenames():
+    assert url_to_filename('https://site.test/') == 'homepage.html'
+    assert url_to_filename('https://site.test/blog/my-post') == 'blog_my_post.html'
+    assert url_to_filename('https://site.test/opt-in/thanks') == 'opt_in_thanks.html'
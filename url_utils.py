@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+URL helpers shared by the scrapers and generators
+"""
+
+from urllib.parse import urlparse, urlunparse
+
+DEFAULT_PORTS = {'http': 80, 'https': 443}
+
+
+def normalize_url(url: str) -> str:
+    """Normalize a URL for deduplication (scheme/host case, default port, trailing slash, fragment)"""
+    parsed = urlparse(url.strip())
+    scheme = parsed.scheme.lower()
+    host = (parsed.hostname or '').lower()
+    if parsed.port and parsed.port != DEFAULT_PORTS.get(scheme):
+        host = f"{host}:{parsed.port}"
+    path = parsed.path.rstrip('/') or '/'
+    return urlunparse((scheme, host, path, parsed.params, parsed.query, ''))
+
+
+def is_blog_post(url: str) -> bool:
+    """Whether a URL is a blog post (as opposed to the /blog listing)"""
+    return '/blog/' in urlparse(url).path
+
+
+def url_to_filename(url: str) -> str:
+    """Convert URL to the filename of its page in the backup"""
+    parsed = urlparse(url)
+    path = parsed.path.strip('/')
+    if not path:
+        return 'homepage.html'  # Root URL goes to homepage.html
+    
+    if is_blog_post(url):
+        # Extract just the blog post slug from the path
+        slug = path.split('blog/')[-1]
+        return f"blog_{slug.replace('/', '_').replace('-', '_')}.html"
+    
+    # Replace special characters with underscores
+    return path.replace('/', '_').replace('-', '_') + '.html'